@@ -485,11 +485,12 @@ def compute_plan_costs(s):
     }
 
 # 면적별 단위비용 계산 함수
-def cost_per_ha_for_area(plan_costs, target_area_ha, role=None):
+def cost_per_ha_for_area(plan_costs, target_area_ha):
     """
     target_area_ha: 분석 대상 면적 (ha)
     단위면적당 비용 (원/ha) 반환
     트랙터 고정비는 해당 면적 기준 전체 공정 총 가동시간으로 안분
+    (안분 비율은 tractor_alloc 에서 미리 계산한 plan_costs["tractor_share"] 사용)
     """
     eff = plan_costs["eff_ha"]
     if eff <= 0:
@@ -506,19 +507,7 @@ def cost_per_ha_for_area(plan_costs, target_area_ha, role=None):
         total_fixed += hourly_fixed * total_hours
 
     # 트랙터 고정비 안분 (면적별 그래프용)
-    tractor_type = plan_costs.get("tractor_type")
-    if tractor_type and role and eff > 0:
-        total_t_hours = 0.0
-        for p in processes:
-            if p in process_data:
-                s2 = process_data[p][role]
-                if s2["level"].get("tractor_type") == tractor_type:
-                    e2 = float(s2["eff_ha"])
-                    total_t_hours += (target_area_ha / e2) if e2 > 0 else 0.0
-        if total_t_hours > 0:
-            this_proc_hours = target_area_ha / eff
-            tractor_share = this_proc_hours / total_t_hours
-            total_fixed += TRACTOR_ANNUAL_FIXED * tractor_share
+    total_fixed += TRACTOR_ANNUAL_FIXED * plan_costs.get("tractor_share", 0.0)
 
     total_cost = total_variable + total_fixed
     return total_cost / target_area_ha  # 원/ha
@@ -530,18 +519,29 @@ def calc_annual_fixed(price, life_years):
 
 TRACTOR_ANNUAL_FIXED = calc_annual_fixed(TRACTOR_PRICE_VAL, TRACTOR_LIFE_YEARS)
 
-# 역할별로 트랙터 종류별 총 연간 가동시간 집계 (안분 분모)
-# 각 공정의 연간 가동시간 = area_ha / eff_ha (현재 면적 기준)
-tractor_total_hours = {"도입안": {}, "비교안": {}}
+# 역할별 트랙터 안분표 (리런당 1회 계산 → 결과 테이블·합산 그래프·공정별 그래프 공용)
+# 공정 가동시간 = 면적 / 능률 이므로
+# - 면적 A 에서 트랙터 총 가동시간 = A × Σ(1/능률)   (inv_eff_sum)
+# - 안분 비율 = (1/능률) / Σ(1/능률)                 (면적과 무관)
+tractor_alloc = {}
 for role in ["도입안", "비교안"]:
-    total_h = 0.0
+    inv_eff_sum = {}
     for proc, pdata in process_data.items():
         s = pdata[role]
-        level = s["level"]
-        if level.get("tractor_type") == "트랙터":
-            eff = float(s["eff_ha"])
-            total_h += (area_ha / eff) if eff > 0 else 0.0
-    tractor_total_hours[role]["트랙터"] = total_h
+        tractor_type = s["level"].get("tractor_type")
+        eff = float(s["eff_ha"])
+        if tractor_type and eff > 0:
+            inv_eff_sum[tractor_type] = inv_eff_sum.get(tractor_type, 0.0) + 1.0 / eff
+
+    share = {}
+    for proc, pdata in process_data.items():
+        s = pdata[role]
+        tractor_type = s["level"].get("tractor_type")
+        eff = float(s["eff_ha"])
+        if tractor_type and eff > 0:
+            share[proc] = (1.0 / eff) / inv_eff_sum[tractor_type]
+
+    tractor_alloc[role] = {"inv_eff_sum": inv_eff_sum, "share": share}
 
 # 공정별 계획 비용 파라미터 계산
 plan_params = {}
@@ -549,6 +549,7 @@ for proc, pdata in process_data.items():
     plan_params[proc] = {}
     for role in ["도입안", "비교안"]:
         plan_params[proc][role] = compute_plan_costs(pdata[role])
+        plan_params[proc][role]["tractor_share"] = tractor_alloc[role]["share"].get(proc, 0.0)
 
 # 현재 설정 면적(area_ha)에서의 결과 (기존 결과 테이블용)
 results = []
@@ -571,13 +572,10 @@ for proc, pdata in process_data.items():
             )
 
         # 트랙터 고정비 안분: 이 공정 가동시간 / 트랙터 전체 공정 총 가동시간
-        tractor_type = level.get("tractor_type")
-        if tractor_type and eff > 0:
+        tractor_share = pc["tractor_share"]
+        if tractor_share > 0:
             this_proc_hours = area_ha / eff
-            total_t_hours = tractor_total_hours[role].get(tractor_type, 0.0)
-            if total_t_hours > 0:
-                tractor_share = this_proc_hours / total_t_hours
-                hourly_fixed += (TRACTOR_ANNUAL_FIXED * tractor_share) / this_proc_hours
+            hourly_fixed += (TRACTOR_ANNUAL_FIXED * tractor_share) / this_proc_hours
 
         hourly_total = hourly_variable + hourly_fixed
 
@@ -609,7 +607,7 @@ line_data = []
 for area in area_range:
     for role in ["도입안", "비교안"]:
         total_cost_per_ha = sum(
-            cost_per_ha_for_area(plan_params[proc][role], area, role=role)
+            cost_per_ha_for_area(plan_params[proc][role], area)
             for proc in processes
         )
         line_data.append({
@@ -651,7 +649,7 @@ proc_line_data = []
 for area in area_range:
     for proc in processes:
         for role in ["도입안", "비교안"]:
-            c = cost_per_ha_for_area(plan_params[proc][role], area, role=role)
+            c = cost_per_ha_for_area(plan_params[proc][role], area)
             proc_line_data.append({
                 "면적 (ha)": round(area, 2),
                 "공정": proc,
@@ -1,16 +1,66 @@
+import functools
+
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
+import numpy as np
+import streamlit.components.v1 as components
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from onion_catalog import get_catalog, catalog_error
+from onion_engine import (
+    RATIO_SALVAGE, RATIO_REPAIR, RATIO_INTEREST, TRACTOR_LIFE_YEARS, ROLES, AREA_GRID_TOL,
+    calc_annual_fixed,
+)
+from onion_cache import LRUCache, PlanCache, canonical_key
+from onion_cube import ResultsCube
+from onion_explorer import cdn_reachable, explorer_html, explorer_payload
+from onion_figures import FigureCache
+from onion_graph import build_cost_graph
+from onion_metrics import MetricsExporter
+from onion_optimize import level_records, optimize_mix
+from onion_profile import ProfileRegistry, RerunProfiler, bucket_labels
+from onion_session import MEMORY_SAMPLE_SEC, LevelStateManager, SessionRegistry, level_key, session_memory
+from onion_uncertainty import CONVERGENCE_CONFIDENCE, CONVERGENCE_REPS, simulate, simulate_stream, convergence_study
 
 # 1. 페이지 설정
 st.set_page_config(page_title="농작업 경제성 분석기 Pro", layout="wide")
 st.title("🚜 농작업 경제성 및 시간 효율 분석 (1ha 기준)")
 st.markdown("### 📊 공정별 비용(원/ha) 및 소요시간(시간/ha) 비교 분석")
 
+# --- [리런 프로파일러] ---
+# 리런을 이름 붙인 구간으로 나눠 시간을 잰다 (세션별·서버 전체 히스토그램, URL 에 ?profile=1 이면 사이드바 패널).
+# 최상위 코드는 profiler.checkpoint(), 함수는 @profiled — fragment 만 다시 실행되면 그 fragment 가 리런 하나가 된다.
+@st.cache_resource
+def get_profile_registry():
+    """서버 프로세스 공유 리런 구간 히스토그램 (환경변수 ONION_PROFILE_LOG 가 있으면 리런마다 JSON 한 줄 기록)"""
+    return ProfileRegistry()
+
+def get_profiler() -> RerunProfiler:
+    if "_rerun_profiler" not in st.session_state:
+        ctx = get_script_run_ctx()
+        sink = get_profile_registry().sink(ctx.session_id if ctx is not None else "-")
+        st.session_state["_rerun_profiler"] = RerunProfiler(sink=sink)
+    return st.session_state["_rerun_profiler"]
+
+def profiled(name: str):
+    """함수 실행 시간을 구간 name 으로 기록 (fragment 단독 리런이면 리런 하나로)"""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            ctx = get_script_run_ctx()
+            fragment_run = bool(ctx is not None and ctx.fragment_ids_this_run)
+            with get_profiler().run(name, standalone=fragment_run):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+profiler = get_profiler()
+profiler.begin_run()
+
 # --- [설정: 고정 상수 및 공식 파라미터] ---
-RATIO_SALVAGE = 0.05   # 폐기가치율 5%
-RATIO_REPAIR = 0.06    # 연 수리비율 6%
-RATIO_INTEREST = 0.025 # 연 이자율 2.5%
+# 폐기가치율·수리비율·이자율, 트랙터 내구연한은 onion_engine 에서 관리
 
 # --- [사이드바 1: 기본값 설정] ---
 st.sidebar.header("⚙️ 기본값 설정")
@@ -26,10 +76,10 @@ st.sidebar.markdown("**🚜 트랙터 가격 설정** (공통 자산 — 전 공
 st.sidebar.caption("트랙터는 여러 공정에 걸쳐 사용되므로 여기서 한 번만 입력합니다.")
 TRACTOR_PRICE_VAL = st.sidebar.number_input("트랙터 가격 (원)", value=50000000, step=1000000, format="%d", key="tractor_price")
 st.sidebar.caption(f"💰 {TRACTOR_PRICE_VAL:,} 원 ({TRACTOR_PRICE_VAL // 10000:,} 만원)")
-TRACTOR_LIFE_YEARS = 8  # 트랙터 공통 내구연한
 
 # 1인당 시간당 급여 (계산용 변수)
 UNIT_HOURLY_WAGE = LABOR_COST_PER_DAY / WORK_HOURS_PER_DAY
+profiler.checkpoint("사이드바 입력")
 
 # --- [사이드바 2: 계산식 보기] ---
 st.sidebar.markdown("---")
@@ -71,211 +121,12 @@ with st.sidebar.expander("📌 유동비 계산식", expanded=False):
 """
     )
 
-# --- [기계화 수준 DB] -------------------------------------------------
-# assets: 고정비 계산 대상(가격/내구연한)
-# tractor_fuel_lph: 유류비(시간당) 계산용. 트랙터 없으면 0.
-# default_eff_ha, default_workers: 초기 입력값
-MECH_LEVELS = {
-    "파종·육묘": [
-        {
-            "label": "인력 파종",
-            "tractor_type": None,
-            "tractor_fuel_lph": 0.0,
-            "assets": [],
-            "default_eff_ha": 0.0312,
-            "default_workers": 3,
-        },
-        {
-            "label": "파종기",
-            "tractor_type": None,   # 트랙터 미사용 (연료소모만 있음)
-            "tractor_fuel_lph": 8.0,
-            "assets": [
-                {"name": "파종기", "price": 11000000, "life_years": 7},
-            ],
-            "default_eff_ha": 0.2500,
-            "default_workers": 1,
-        },
-    ],
-    "정식 준비": [
-        {
-            "label": "동력방제기 + 휴립피복기",
-            "tractor_type": "트랙터",
-            "tractor_fuel_lph": 12.0,
-            "assets": [
-                {"name": "휴립피복기", "price": 11800000, "life_years": 10},
-                {"name": "동력방제기", "price": 1500000, "life_years": 7},
-            ],
-            "default_eff_ha": 0.0588,
-            "default_workers": 1,
-        },
-        {
-            "label": "복합휴립피복기",
-            "tractor_type": "트랙터",
-            "tractor_fuel_lph": 13.5,
-            "assets": [
-                {"name": "복합휴립피복기", "price": 25000000, "life_years": 10},
-            ],
-            "default_eff_ha": 0.1429,
-            "default_workers": 1,
-        },
-        {
-            "label": "복합휴립피복기 (자율주행)",
-            "tractor_type": "트랙터",
-            "tractor_fuel_lph": 13.5,
-            "assets": [
-                {"name": "복합휴립피복기", "price": 25000000, "life_years": 10},
-                {"name": "자율주행키트", "price": 12000000, "life_years": 6},
-            ],
-            "default_eff_ha": 0.1429,
-            "default_workers": 1,
-        },
-    ],
-    "정식": [
-        {
-            "label": "인력 정식",
-            "tractor_type": None,
-            "tractor_fuel_lph": 0.0,
-            "assets": [],
-            "default_eff_ha": 0.0031,
-            "default_workers": 5,
-        },
-        {
-            "label": "반자동 정식기",
-            "tractor_type": None,
-            "tractor_fuel_lph": 0.0,
-            "assets": [
-                {"name": "반자동정식기", "price": 15000000, "life_years": 7},
-            ],
-            "default_eff_ha": 0.0250,
-            "default_workers": 3,
-        },
-        {
-            "label": "정식기 (8조)",
-            "tractor_type": "트랙터",
-            "tractor_fuel_lph": 10.0,
-            "assets": [
-                {"name": "자동정식기(8조)", "price": 49000000, "life_years": 5},
-            ],
-            "default_eff_ha": 0.0565,
-            "default_workers": 2,
-        },
-        {
-            "label": "정식기 (8조) (자율주행)",
-            "tractor_type": "트랙터",
-            "tractor_fuel_lph": 10.0,
-            "assets": [
-                {"name": "자동정식기(8조)", "price": 49000000, "life_years": 5},
-                {"name": "자율주행키트", "price": 12000000, "life_years": 6},
-            ],
-            "default_eff_ha": 0.0629,
-            "default_workers": 1,
-        },
-    ],
-    "방제": [
-        {
-            "label": "인력 방제",
-            "tractor_type": None,
-            "tractor_fuel_lph": 0.0,
-            "assets": [],
-            "default_eff_ha": 0.1053,
-            "default_workers": 2,
-        },
-        {
-            "label": "동력방제기",
-            "tractor_type": None,
-            "tractor_fuel_lph": 0.0,
-            "assets": [
-                {"name": "동력방제기", "price": 1500000, "life_years": 7},
-            ],
-            "default_eff_ha": 0.5988,
-            "default_workers": 1,
-        },
-        {
-            "label": "승용형 붐 스프레이어",
-            "tractor_type": "트랙터",
-            "tractor_fuel_lph": 10.0,
-            "assets": [
-                {"name": "붐 스프레이어", "price": 35000000, "life_years": 10},
-            ],
-            "default_eff_ha": 1.2500,
-            "default_workers": 1,
-        },
-        {
-            "label": "방제 드론",
-            "tractor_type": None,
-            "tractor_fuel_lph": 0.0,
-            "assets": [
-                {"name": "농업용 드론", "price": 25000000, "life_years": 5},
-            ],
-            "default_eff_ha": 3.0303,
-            "default_workers": 1,
-        },
-    ],
-    "줄기절단": [
-        {
-            "label": "인력 줄기절단",
-            "tractor_type": None,
-            "tractor_fuel_lph": 0.0,
-            "assets": [],
-            "default_eff_ha": 0.0058,
-            "default_workers": 5,
-        },
-        {
-            "label": "줄기절단기",
-            "tractor_type": "트랙터",
-            "tractor_fuel_lph": 12.0,
-            "assets": [
-                {"name": "줄기절단기", "price": 5000000, "life_years": 10},
-            ],
-            "default_eff_ha": 0.2000,
-            "default_workers": 1,
-        },
-    ],
-    "수확": [
-        {
-            "label": "굴취기 + 인력 수집",
-            "tractor_type": "트랙터",
-            "tractor_fuel_lph": 14.0,
-            "assets": [
-                {"name": "굴취기", "price": 68000000, "life_years": 9},
-            ],
-            "default_eff_ha": 0.0032,
-            "default_workers": 5,
-        },
-        {
-            "label": "굴취기 + 수집기",
-            "tractor_type": "트랙터",
-            "tractor_fuel_lph": 16.0,
-            "assets": [
-                {"name": "굴취기", "price": 68000000, "life_years": 9},
-                {"name": "수집기", "price": 18150000, "life_years": 9},
-            ],
-            "default_eff_ha": 0.0671,
-            "default_workers": 2,
-        },
-        {
-            "label": "일관 수확기",
-            "tractor_type": None,
-            "tractor_fuel_lph": 18.0,
-            "assets": [
-                {"name": "일관수확기", "price": 180000000, "life_years": 10},
-            ],
-            "default_eff_ha": 0.0943,
-            "default_workers": 1,
-        },
-        {
-            "label": "일관 수확기 (자율주행)",
-            "tractor_type": None,
-            "tractor_fuel_lph": 18.0,
-            "assets": [
-                {"name": "일관수확기", "price": 180000000, "life_years": 10},
-                {"name": "자율주행키트", "price": 15000000, "life_years": 6},
-            ],
-            "default_eff_ha": 0.0943,
-            "default_workers": 1,
-        },
-    ],
-}
+# --- [기계화 수준 DB] → equipment_catalog.json ---
+# 서버 프로세스가 한 번 읽어 모든 세션이 공유 (파일이 바뀌면 다음 리런에서 다시 읽음)
+catalog = get_catalog()
+MECH_LEVELS = catalog.mech_levels
+if catalog_error():
+    st.sidebar.warning(f"⚠️ 장비 카탈로그 갱신 실패 — 이전 카탈로그({catalog.version})를 계속 사용합니다.\n\n{catalog_error()}")
 
 # --- [1. 분석 대상 면적 설정] ---
 st.header("1. 분석 대상 면적 설정")
@@ -294,24 +145,106 @@ with col2:
         area_ha = input_area / 100
 
 st.info(f"📐 **환산 면적:** {area_ha:.4f} ha ({area_ha * 3025:,.0f} 평)")
+profiler.checkpoint("면적 입력")
 
 # --- [2. 공정별 설정] ---
 st.header("2. 공정별 작업 조건 설정")
 
-processes = ["파종·육묘", "정식 준비", "정식", "방제", "줄기절단", "수확"]
-process_data = {}
-tabs = st.tabs(processes)
+processes = list(catalog.processes)
+
+# 화면은 fragment 단위로 나눠 다시 실행한다 (위젯을 바꾸면 그 위젯이 속한 fragment 만 리런)
+# - panel_<공정>: 공정 탭 하나 (도입안·비교안 패널) → st.session_state["process_data"][공정]
+# - plan_table: 표 일괄 입력 (입력 방식이 '표로 한 번에 입력' 일 때 공정 탭 대신)
+# '선택한 공정 탭만 그리기' 를 켜면 열린 탭의 패널만 위젯으로 그리고, 나머지 공정은 보관값으로 계획만 만든다.
+# - results: 3. 분석 결과 / optimizer: 4. 최적 조합 / uncertainty: 5. 몬테카를로 / cube_view: 6. 스윕 조회
+# 공정 패널 입력이 바뀌면 그 공정 패널과 계획에 의존하는 fragment 만 다시 실행하고,
+# 사이드바·면적(1.) 입력이 바뀌면 앱 전체를 다시 실행한다.
+PLAN_DEPENDENTS = ["results", "optimizer", "uncertainty"]
+ANNUAL_USE_OPTIONS = ["현재 면적만", "직접 입력"]
+
+if "process_data" not in st.session_state:
+    st.session_state["process_data"] = {}
+
+# 수준 인덱스가 들어간 위젯 키 정리 — 이전 수준 키는 지우고 사용자 수정값만 보관소에 남긴다
+level_state = LevelStateManager(st.session_state, processes, ROLES)
+
+def level_widget_defaults(role: str, proc: str, level_idx: int) -> dict:
+    """수준 하나의 위젯 키 → DB 기본값 (보관소에는 이 값과 다른 값만 남긴다)"""
+    level = MECH_LEVELS[proc][level_idx]
+    defaults = {
+        level_key("eff", role, proc, level_idx): float(level["default_eff_ha"]),
+        level_key("work", role, proc, level_idx): int(level["default_workers"]),
+        level_key("opt", role, proc, level_idx): ANNUAL_USE_OPTIONS[0],
+        level_key("anu", role, proc, level_idx): 200.0,
+    }
+    for a_idx, asset in enumerate(level.get("assets") or []):
+        defaults[level_key("asset_price", role, proc, level_idx, a_idx)] = int(asset["price"])
+    return defaults
+
+# --- [공정 탭 지연 그리기] ---
+# 숨긴 탭의 위젯은 만들지 않으므로 Streamlit 이 그 상태를 지운다. 탭을 떠날 때(콜백) 위젯 값을
+# 수준별 보관소로, 수준 선택을 PARKED_LEVELS_KEY 로 옮겨 두고, 숨긴 공정의 계획은 보관값으로 만든다.
+PARKED_LEVELS_KEY = "_parked_levels"
+
+def set_level(role: str, proc: str, level_idx: int):
+    """수준 선택값 지정 (위젯 상태 + 숨긴 탭용 보관값)"""
+    st.session_state[f"lvl_{role}_{proc}"] = int(level_idx)
+    st.session_state.setdefault(PARKED_LEVELS_KEY, {})[f"{role}|{proc}"] = int(level_idx)
+
+def current_level_idx(role: str, proc: str) -> int:
+    key = f"lvl_{role}_{proc}"
+    if key in st.session_state:
+        level_idx = int(st.session_state[key])
+    else:
+        level_idx = int(st.session_state.get(PARKED_LEVELS_KEY, {}).get(f"{role}|{proc}", 0))
+    return level_idx if 0 <= level_idx < len(MECH_LEVELS[proc]) else 0  # 카탈로그가 바뀌어 없어진 수준
+
+def park_process_panels(keep: str = None):
+    """keep 외 공정 패널의 위젯 값을 보관소로 옮김 (탭 전환·지연 그리기 켜기 콜백)"""
+    parked = st.session_state.setdefault(PARKED_LEVELS_KEY, {})
+    for proc in processes:
+        if proc == keep:
+            continue
+        for role in ROLES:
+            level_idx = current_level_idx(role, proc)
+            parked[f"{role}|{proc}"] = level_idx
+            defaults = level_widget_defaults(role, proc, level_idx)
+            values = {k: st.session_state[k] for k in defaults if k in st.session_state}
+            if values:
+                level_state.store(role, proc, level_idx, values, defaults)
+
+def park_inactive_panels():
+    park_process_panels(keep=st.session_state.get("process_tab", processes[0]))
+
+def stored_plan(proc: str, role: str) -> dict:
+    """위젯 없이 보관값(수준 선택 + 수준별 보관소)으로 만든 계획 — render_plan_panel 과 같은 형식"""
+    level_idx = current_level_idx(role, proc)
+    level = MECH_LEVELS[proc][level_idx]
+    value = lambda field, default, *a_idx: level_state.initial(level_key(field, role, proc, level_idx, *a_idx), default)
+    eff_ha = float(value("eff", float(level["default_eff_ha"])))
+    mode = value("opt", ANNUAL_USE_OPTIONS[0])
+    if mode == ANNUAL_USE_OPTIONS[1]:
+        annual_hours = float(value("anu", 200.0))
+    else:
+        annual_hours = (area_ha / eff_ha) if eff_ha > 0 else 1.0
+    return {
+        "level": level,
+        "level_idx": level_idx,
+        "eff_ha": eff_ha,
+        "workers": int(value("work", int(level["default_workers"]))),
+        "annual_hours": annual_hours,
+        "annual_hours_mode": mode,
+        "custom_assets": [
+            {"name": a["name"], "price": int(value("asset_price", int(a["price"]), a_idx)), "life_years": a["life_years"]}
+            for a_idx, a in enumerate(level.get("assets") or [])
+        ],
+    }
 
-def calculate_hourly_fixed_cost(price: float, annual_hours: float, useful_life: float) -> float:
-    """시간당 고정비 = 연간(수리+이자+감가) / 연간가동시간"""
-    if price <= 0 or annual_hours <= 0 or useful_life <= 0:
-        return 0.0
-    annual_repair = price * RATIO_REPAIR
-    annual_interest = price * RATIO_INTEREST
-    salvage_value = price * RATIO_SALVAGE
-    annual_depreciation = (price - salvage_value) / useful_life
-    return (annual_repair + annual_interest + annual_depreciation) / annual_hours
+def rerun_after_panel_edit(proc: str):
+    """공정 패널 위젯 on_change 콜백 — 해당 공정 패널 + 의존 fragment 만 리런"""
+    st.rerun([f"panel_{proc}"] + PLAN_DEPENDENTS)
 
+@profiled("계획 패널 위젯")
 def render_plan_panel(proc: str, role: str):
     """role: '도입안' 또는 '비교안'"""
     st.markdown(f"#### 🧩 [{proc}] {role}")
@@ -322,15 +255,24 @@ def render_plan_panel(proc: str, role: str):
         st.stop()
 
     level_labels = [x["label"] for x in level_items]
+    parked = st.session_state.get(PARKED_LEVELS_KEY, {}).get(f"{role}|{proc}")
+    if f"lvl_{role}_{proc}" not in st.session_state and parked is not None:
+        st.session_state[f"lvl_{role}_{proc}"] = parked  # 숨겼던 탭을 다시 그릴 때 수준 선택 복원
+    if st.session_state.get(f"lvl_{role}_{proc}", 0) >= len(level_items):
+        del st.session_state[f"lvl_{role}_{proc}"]  # 카탈로그가 바뀌어 없어진 수준
     
     # 기계화 수준 선택
     sel_level_idx = st.selectbox(
         f"{role} 기계화 수준",
         range(len(level_labels)),
         format_func=lambda x: level_labels[x],
-        key=f"lvl_{role}_{proc}"
+        key=f"lvl_{role}_{proc}",
+        on_change=rerun_after_panel_edit,
+        args=(proc,),
     )
     level = level_items[sel_level_idx]
+    level_state.evict(role, proc, sel_level_idx, lambda i: level_widget_defaults(role, proc, i))
+    key = lambda field, *a_idx: level_key(field, role, proc, sel_level_idx, *a_idx)
 
     asset_names = ", ".join([a["name"] for a in level.get("assets", [])]) if level.get("assets") else "없음(인력 중심)"
     tractor_type = level.get("tractor_type")
@@ -347,11 +289,13 @@ def render_plan_panel(proc: str, role: str):
         for a_idx, asset in enumerate(level["assets"]):
             custom_price = st.number_input(
                 f"{asset['name']} 가격 (원)",
-                value=int(asset["price"]),
+                value=level_state.initial(key("asset_price", a_idx), int(asset["price"])),
                 min_value=0,
                 step=100000,
                 format="%d",
-                key=f"asset_price_{role}_{proc}_{sel_level_idx}_{a_idx}",
+                key=key("asset_price", a_idx),
+                on_change=rerun_after_panel_edit,
+                args=(proc,),
                 help=f"기본값: {asset['price']:,}원 / 내구연한: {asset['life_years']}년"
             )
             st.caption(f"💰 **{custom_price:,} 원** ({custom_price // 10000:,} 만원)")
@@ -371,34 +315,43 @@ def render_plan_panel(proc: str, role: str):
     with c1:
         eff_ha = st.number_input(
             "작업 능률 (ha/h)",
-            value=default_eff,
+            value=level_state.initial(key("eff"), default_eff),
             format="%.4f",
-            key=f"eff_{role}_{proc}_{sel_level_idx}"  # 레벨 인덱스 포함하여 키 변경
+            key=key("eff"),  # 레벨 인덱스 포함하여 키 변경
+            on_change=rerun_after_panel_edit,
+            args=(proc,),
         )
     with c2:
         workers = st.number_input(
             "투입 인력 (명)",
-            value=default_work,
+            value=level_state.initial(key("work"), default_work),
             min_value=0,
             step=1,
-            key=f"work_{role}_{proc}_{sel_level_idx}"  # 레벨 인덱스 포함하여 키 변경
+            key=key("work"),  # 레벨 인덱스 포함하여 키 변경
+            on_change=rerun_after_panel_edit,
+            args=(proc,),
         )
 
     st.markdown("---")
     annual_use_opt = st.radio(
         "연간 가동 시간 기준 (고정비 산출용)",
-        ["현재 면적만", "직접 입력"],
-        key=f"opt_{role}_{proc}_{sel_level_idx}",
+        ANNUAL_USE_OPTIONS,
+        index=ANNUAL_USE_OPTIONS.index(level_state.initial(key("opt"), ANNUAL_USE_OPTIONS[0])),
+        key=key("opt"),
+        on_change=rerun_after_panel_edit,
+        args=(proc,),
         horizontal=True
     )
 
     if annual_use_opt == "직접 입력":
         annual_hours = st.number_input(
             "연간 예상 가동시간(h)",
-            value=200.0,
+            value=level_state.initial(key("anu"), 200.0),
             min_value=1.0,
             step=10.0,
-            key=f"anu_{role}_{proc}_{sel_level_idx}",
+            key=key("anu"),
+            on_change=rerun_after_panel_edit,
+            args=(proc,),
             help="이 '패키지(트랙터/작업기/키트/장비)'가 1년 동안 작업하는 총 시간"
         )
     else:
@@ -407,331 +360,1168 @@ def render_plan_panel(proc: str, role: str):
 
     return {
         "level": level,
+        "level_idx": sel_level_idx,
         "eff_ha": eff_ha,
         "workers": workers,
         "annual_hours": annual_hours,
+        "annual_hours_mode": annual_use_opt,
         "custom_assets": custom_assets  # 사용자가 수정한 가격 (없으면 DB 기본값 그대로)
     }
 
-for i, proc in enumerate(processes):
-    with tabs[i]:
-        col_left, col_right = st.columns(2)
-
-        with col_left:
-            plan_intro = render_plan_panel(proc, "도입안")
-
-        with col_right:
-            plan_base = render_plan_panel(proc, "비교안")
-
-        process_data[proc] = {"도입안": plan_intro, "비교안": plan_base}
-
-# --- [3. 분석 결과] ---
-st.header("3. 📈 분석 결과")
-st.markdown("---")
-
-# 면적 범위 설정 (꺾은선 그래프용)
-st.subheader("📐 단위면적당 비용 분석 면적 범위 설정")
-col_range1, col_range2 = st.columns(2)
-with col_range1:
-    area_min_ha = st.number_input("최소 면적 (ha)", value=1.0, min_value=0.1, step=0.5)
-with col_range2:
-    area_max_ha = st.number_input("최대 면적 (ha)", value=10.0, min_value=0.5, step=0.5)
-area_steps = st.slider("면적 구간 수", min_value=5, max_value=30, value=10)
-
-import numpy as np
-area_range = np.linspace(area_min_ha, area_max_ha, area_steps)
-
-# 공정별 고정비·유동비 계산 (면적 독립 부분)
-def compute_plan_costs(s):
-    """
-    한 계획(plan)에 대해
-    - total_fixed_cost: 전체 고정비 합계 (원) - 면적에 무관
-    - hourly_variable: 시간당 유동비 (원/h)
-    - eff_ha: 작업 능률 (ha/h)
-    반환
-    """
-    level = s["level"]
-    hourly_fuel = float(level.get("tractor_fuel_lph", 0.0)) * FUEL_PRICE
-    hourly_labor = float(s["workers"]) * UNIT_HOURLY_WAGE
-    hourly_variable = hourly_fuel + hourly_labor
-
-    # 고정비: 연간 가동시간을 '현재 면적만' 모드일 때 면적에 따라 재계산해야 하므로
-    # asset별 연간비용(수리+이자+감가)을 먼저 계산
-    annual_fixed_costs = []
-    assets_to_use = s.get("custom_assets") if s.get("custom_assets") else level.get("assets", [])
-    for asset in assets_to_use:
-        price = float(asset["price"])
-        life = float(asset["life_years"])
-        salvage = price * RATIO_SALVAGE
-        annual_repair = price * RATIO_REPAIR
-        annual_interest = price * RATIO_INTEREST
-        annual_depreciation = (price - salvage) / life
-        annual_fixed = annual_repair + annual_interest + annual_depreciation
-        annual_fixed_costs.append({
-            "annual_fixed": annual_fixed,
-            "price": price,
-            "life": life,
-            "annual_hours_mode": s.get("annual_hours_mode", "현재 면적만"),
-            "annual_hours_fixed": float(s["annual_hours"]),  # 직접입력시 사용
-        })
-
+@profiled("공정 탭")
+def process_panel(proc: str):
+    """공정 탭 하나 — 결과는 세션 상태에 두고 results 이하 fragment 가 읽는다"""
+    col_left, col_right = st.columns(2)
+
+    with col_left:
+        plan_intro = render_plan_panel(proc, "도입안")
+
+    with col_right:
+        plan_base = render_plan_panel(proc, "비교안")
+
+    st.session_state["process_data"][proc] = {"도입안": plan_intro, "비교안": plan_base}
+
+# --- [2-1. 표 일괄 입력] ---
+# 공정 × 역할 12행을 표 하나(st.session_state[PLAN_TABLE_KEY], 행 dict 목록)로 편집한다.
+# 편집기 변경분(edited_rows)은 콜백에서 행 단위로 표에 반영하고, 편집기 키 버전을 올려 변경분을 비운다.
+# 그 다음 리런에서는 값이 바뀐 행의 계획만 다시 만들어 process_data 에 넣는다 (나머지 행은 그대로 재사용).
+INPUT_MODES = ["공정별 입력", "표로 한 번에 입력"]
+PLAN_TABLE_KEY = "plan_table"
+N_ASSET_SLOTS = max(len(lv.get("assets") or []) for levels in MECH_LEVELS.values() for lv in levels)
+ASSET_PRICE_COLUMNS = [f"작업기{i + 1} 가격 (원)" for i in range(N_ASSET_SLOTS)]
+PLAN_TABLE_COLUMNS = [
+    "공정", "구분", "기계화 수준", "작업기", "작업 능률 (ha/h)", "투입 인력 (명)",
+    "연간 가동시간 기준", "연간 가동시간(h)",
+] + ASSET_PRICE_COLUMNS
+
+def plan_table_row(proc: str, role: str, plan: dict = None, level_idx: int = 0) -> dict:
+    """계획(render_plan_panel 반환값) → 표 한 행 (plan 이 없으면 level_idx 수준의 기본값)"""
+    level = MECH_LEVELS[proc][plan["level_idx"] if plan else level_idx]
+    assets = level.get("assets") or []
+    prices = [a["price"] for a in ((plan or {}).get("custom_assets") or assets)]
+    direct = bool(plan) and plan["annual_hours_mode"] == ANNUAL_USE_OPTIONS[1]
+    row = {
+        "공정": proc,
+        "구분": role,
+        "기계화 수준": level["label"],
+        "작업기": ", ".join(a["name"] for a in assets) or "없음(인력 중심)",
+        "작업 능률 (ha/h)": float(plan["eff_ha"] if plan else level["default_eff_ha"]),
+        "투입 인력 (명)": int(plan["workers"] if plan else level["default_workers"]),
+        "연간 가동시간 기준": plan["annual_hours_mode"] if plan else ANNUAL_USE_OPTIONS[0],
+        "연간 가동시간(h)": float(plan["annual_hours"]) if direct else 200.0,
+    }
+    for i, col in enumerate(ASSET_PRICE_COLUMNS):
+        row[col] = int(prices[i]) if i < len(prices) else None
+    return row
+
+def plan_table_row_error(row: dict):
+    """표 한 행 검증 — 문제가 있으면 메시지, 없으면 None"""
+    proc, role = row["공정"], row["구분"]
+    where = f"[{proc}·{role}]"
+    if row["기계화 수준"] not in catalog.level_index.get(proc, {}):
+        return f"{where} '{row['기계화 수준']}' 은(는) 이 공정의 기계화 수준이 아닙니다."
+    is_missing = lambda v: v is None or (isinstance(v, float) and np.isnan(v))
+    if is_missing(row["작업 능률 (ha/h)"]) or row["작업 능률 (ha/h)"] < 0:
+        return f"{where} 작업 능률은 0 이상이어야 합니다."
+    if is_missing(row["투입 인력 (명)"]) or row["투입 인력 (명)"] < 0:
+        return f"{where} 투입 인력은 0 이상이어야 합니다."
+    if row["연간 가동시간 기준"] not in ANNUAL_USE_OPTIONS:
+        return f"{where} 연간 가동시간 기준은 {' / '.join(ANNUAL_USE_OPTIONS)} 중 하나여야 합니다."
+    if row["연간 가동시간 기준"] == ANNUAL_USE_OPTIONS[1] and (
+        is_missing(row["연간 가동시간(h)"]) or row["연간 가동시간(h)"] < 1
+    ):
+        return f"{where} 연간 가동시간은 1시간 이상이어야 합니다."
+    level = catalog.level(proc, row["기계화 수준"])
+    for col, asset in zip(ASSET_PRICE_COLUMNS, level.get("assets") or []):
+        if is_missing(row[col]) or row[col] < 0:
+            return f"{where} {asset['name']} 가격({col})은 0 이상이어야 합니다."
+    return None
+
+def plan_from_table_row(row: dict) -> dict:
+    """표 한 행 → render_plan_panel 과 같은 형식의 계획"""
+    proc = row["공정"]
+    level_idx = catalog.level_index[proc][row["기계화 수준"]]
+    level = MECH_LEVELS[proc][level_idx]
+    eff_ha = float(row["작업 능률 (ha/h)"])
+    mode = row["연간 가동시간 기준"]
+    if mode == ANNUAL_USE_OPTIONS[1]:
+        annual_hours = float(row["연간 가동시간(h)"])
+    else:
+        annual_hours = (area_ha / eff_ha) if eff_ha > 0 else 1.0
     return {
-        "hourly_variable": hourly_variable,
-        "annual_fixed_costs": annual_fixed_costs,
-        "eff_ha": float(s["eff_ha"]),
         "level": level,
-        "annual_hours_source": s["annual_hours"],
-        "tractor_type": level.get("tractor_type"),
+        "level_idx": level_idx,
+        "eff_ha": eff_ha,
+        "workers": int(row["투입 인력 (명)"]),
+        "annual_hours": annual_hours,
+        "annual_hours_mode": mode,
+        "custom_assets": [
+            {"name": a["name"], "price": int(row[col]), "life_years": a["life_years"]}
+            for col, a in zip(ASSET_PRICE_COLUMNS, level.get("assets") or [])
+        ],
     }
 
-# 면적별 단위비용 계산 함수
-def cost_per_ha_for_area(plan_costs, target_area_ha, role=None):
+def plan_table_from_process_data() -> list:
+    process_data = st.session_state["process_data"]
+    return [
+        plan_table_row(proc, role, process_data.get(proc, {}).get(role))
+        for proc in processes for role in ROLES
+    ]
+
+def apply_plan_table_edits(editor_key: str):
+    """표 편집기 on_change 콜백 — 변경분을 행 단위로 검증해 표에 반영 (기계화 수준이 바뀐 행은 그 수준 기본값에서 시작)"""
+    rows = list(st.session_state[PLAN_TABLE_KEY])
+    errors = []
+    for pos, edits in st.session_state[editor_key].get("edited_rows", {}).items():
+        row = rows[int(pos)]
+        label = edits.get("기계화 수준", row["기계화 수준"])
+        if label != row["기계화 수준"] and label in catalog.level_index[row["공정"]]:
+            row = plan_table_row(row["공정"], row["구분"], level_idx=catalog.level_index[row["공정"]][label])
+        new = {**row, **edits}
+        error = plan_table_row_error(new)
+        if error:
+            errors.append(error)
+        else:
+            rows[int(pos)] = new
+    st.session_state[PLAN_TABLE_KEY] = rows
+    st.session_state["plan_table_errors"] = errors
+    st.session_state["plan_table_version"] = st.session_state.get("plan_table_version", 0) + 1
+    st.rerun([PLAN_TABLE_KEY] + PLAN_DEPENDENTS)
+
+@profiled("표 일괄 입력")
+def plan_table_panel():
+    """공정 × 역할 표 하나로 전체 계획 편집 — 바뀐 행만 process_data 에 반영"""
+    if PLAN_TABLE_KEY not in st.session_state:
+        st.session_state[PLAN_TABLE_KEY] = plan_table_from_process_data()
+    rows = st.session_state[PLAN_TABLE_KEY]
+    editor_key = f"plan_table_editor_{st.session_state.get('plan_table_version', 0)}"
+    all_labels = list(dict.fromkeys(lv["label"] for p in processes for lv in MECH_LEVELS[p]))
+
+    st.caption("엑셀 등에서 여러 행을 복사해 붙여넣을 수 있습니다. 작업기 가격은 해당 수준의 작업기 수만큼만 반영됩니다.")
+    st.data_editor(
+        pd.DataFrame(rows, columns=PLAN_TABLE_COLUMNS),
+        key=editor_key,
+        on_change=apply_plan_table_edits,
+        args=(editor_key,),
+        num_rows="fixed",
+        hide_index=True,
+        use_container_width=True,
+        disabled=["공정", "구분", "작업기"],
+        column_config={
+            "기계화 수준": st.column_config.SelectboxColumn(options=all_labels, required=True),
+            "작업 능률 (ha/h)": st.column_config.NumberColumn(min_value=0.0, format="%.4f"),
+            "투입 인력 (명)": st.column_config.NumberColumn(min_value=0, step=1),
+            "연간 가동시간 기준": st.column_config.SelectboxColumn(options=ANNUAL_USE_OPTIONS, required=True),
+            "연간 가동시간(h)": st.column_config.NumberColumn(min_value=1.0, step=10.0, format="%.1f"),
+            **{col: st.column_config.NumberColumn(min_value=0, step=100000, format="%d") for col in ASSET_PRICE_COLUMNS},
+        },
+    )
+    for error in st.session_state.get("plan_table_errors", []):
+        st.warning(f"⚠️ 반영하지 않은 행: {error}")
+
+    # 행 단위 반영 — 행 값(현재 면적 기준이면 면적 포함)이 지난번과 같으면 계획을 다시 만들지 않는다
+    applied = st.session_state.setdefault("plan_table_applied", {})
+    process_data = st.session_state["process_data"]
+    changed = []
+    for row in rows:
+        proc, role = row["공정"], row["구분"]
+        signature = tuple(row.values()) + ((area_ha,) if row["연간 가동시간 기준"] == ANNUAL_USE_OPTIONS[0] else ())
+        if applied.get((proc, role)) != signature:
+            process_data.setdefault(proc, {})[role] = plan_from_table_row(row)
+            applied[(proc, role)] = signature
+            changed.append(f"{proc}·{role}")
+    st.caption(f"이번 리런에서 다시 반영한 행: {', '.join(changed) or '없음'}")
+
+def switch_input_mode():
+    """입력 방식 전환 콜백 — 현재 계획을 새 입력 방식으로 옮긴다"""
+    if st.session_state["input_mode"] == INPUT_MODES[1]:
+        st.session_state[PLAN_TABLE_KEY] = plan_table_from_process_data()
+        st.session_state.pop("plan_table_applied", None)
+        st.session_state.pop("plan_table_errors", None)
+        return
+    # 표 → 공정별 위젯: 수준 선택값과 위젯 초기값(보관소)으로 옮긴다 (카탈로그와 맞지 않는 행은 건너뛰고 알림)
+    skipped = []
+    for row in st.session_state.get(PLAN_TABLE_KEY, []):
+        proc, role = row["공정"], row["구분"]
+        error = plan_table_row_error({col: row.get(col) for col in PLAN_TABLE_COLUMNS})
+        if error:
+            skipped.append(error)
+            continue
+        level_idx = catalog.level_index[proc][row["기계화 수준"]]
+        level = MECH_LEVELS[proc][level_idx]
+        values = {
+            level_key("eff", role, proc, level_idx): float(row["작업 능률 (ha/h)"]),
+            level_key("work", role, proc, level_idx): int(row["투입 인력 (명)"]),
+            level_key("opt", role, proc, level_idx): row["연간 가동시간 기준"],
+            level_key("anu", role, proc, level_idx): float(row["연간 가동시간(h)"]),
+        }
+        for a_idx, col in enumerate(ASSET_PRICE_COLUMNS[:len(level.get("assets") or [])]):
+            values[level_key("asset_price", role, proc, level_idx, a_idx)] = int(row[col])
+        set_level(role, proc, level_idx)
+        level_state.store(role, proc, level_idx, values, level_widget_defaults(role, proc, level_idx))
+    st.session_state["input_mode_skipped"] = skipped
+
+def revalidate_plan_table(rows: list):
     """
-    엑셀 로직과 동일:
-    - 고정비(원/ha): area_ha 기준으로 계산된 고정값 -> 면적이 바뀌어도 불변
-    - 유동비(원/ha): 시간당유동비 / 작업능률 -> 면적이 바뀌어도 불변
-    - 총비용(원) = 고정비(원/ha) + 유동비(원/ha) * target_area_ha
-    - 단위면적당 비용(원/ha) = 총비용 / target_area_ha
+    카탈로그가 바뀐 뒤 저장된 표 행 다시 검증 → (새 행 목록, 메시지 목록)
+    통과한 행은 새 카탈로그 수준으로 다시 만들고, 수준 라벨이 없어진 행 등은 기본값으로 되돌린다.
     """
-    eff = plan_costs["eff_ha"]
-    if eff <= 0:
-        return 0.0
-
-    # 고정비(원/ha): area_ha 기준 연간사용시간으로 계산 -> 고정값
-    fixed_per_ha = 0.0
-    for afc in plan_costs["annual_fixed_costs"]:
-        annual_hours = afc["annual_hours_fixed"]  # area_ha / eff 로 계산된 고정값
-        hourly_fixed = afc["annual_fixed"] / annual_hours if annual_hours > 0 else 0
-        fixed_per_ha += hourly_fixed / eff
-
-    # 트랙터 고정비 안분 (area_ha 기준 고정)
-    tractor_type = plan_costs.get("tractor_type")
-    if tractor_type and role and eff > 0:
-        total_t_hours = 0.0
-        for p in processes:
-            if p in process_data:
-                s2 = process_data[p][role]
-                if s2["level"].get("tractor_type") == tractor_type:
-                    e2 = float(s2["eff_ha"])
-                    total_t_hours += (area_ha / e2) if e2 > 0 else 0.0
-        if total_t_hours > 0:
-            this_proc_hours = area_ha / eff
-            tractor_share = this_proc_hours / total_t_hours
-            fixed_per_ha += (TRACTOR_ANNUAL_FIXED * tractor_share) / this_proc_hours / eff
-
-    # 유동비(원/ha): 시간당유동비 / 작업능률 -> 면적 무관 고정값
-    variable_per_ha = plan_costs["hourly_variable"] / eff
-
-    # 총비용 = 고정비(상수) + 유동비(원/ha) * 면적
-    total_cost = fixed_per_ha + variable_per_ha * target_area_ha
-    return total_cost / target_area_ha  # 원/ha
+    saved = {(r["공정"], r["구분"]): r for r in rows}
+    out, errors = [], []
+    for proc in processes:
+        for role in ROLES:
+            row = saved.get((proc, role))
+            if row is None:
+                out.append(plan_table_row(proc, role))
+                continue
+            row = {col: row.get(col) for col in PLAN_TABLE_COLUMNS}
+            error = plan_table_row_error(row)
+            if error:
+                errors.append(f"{error} 장비 카탈로그가 바뀌어 이 행을 기본값으로 되돌렸습니다.")
+                out.append(plan_table_row(proc, role))
+            else:
+                out.append(plan_table_row(proc, role, plan_from_table_row(row)))
+    return out, errors
+
+# --- [카탈로그 갱신 반영] ---
+# 카탈로그를 다시 읽어 공정의 수준 목록이 바뀌면, 저장해 둔 수준 인덱스(선택값·숨긴 탭 보관 수준·수준별 보관소)가
+# 다른 수준을 가리키거나 목록 밖이 되므로 그 공정 것은 초기화하고, 표에 저장된 행은 새 카탈로그로 다시 검증한다.
+CATALOG_STATE_KEY = "_catalog_state"
+
+def sync_catalog_state() -> list:
+    """세션 상태를 현재 카탈로그에 맞춤 → 수준 목록이 바뀐 공정 (세션 첫 리런이거나 카탈로그가 그대로면 빈 목록)"""
+    levels = {p: [lv["label"] for lv in MECH_LEVELS[p]] for p in processes}
+    previous = st.session_state.get(CATALOG_STATE_KEY)
+    st.session_state[CATALOG_STATE_KEY] = {"version": catalog.version, "levels": levels}
+    if previous is None or previous["version"] == catalog.version:
+        return []
+    changed = [p for p in dict.fromkeys([*previous["levels"], *levels]) if previous["levels"].get(p) != levels.get(p)]
+    parked = st.session_state.get(PARKED_LEVELS_KEY, {})
+    for proc in changed:
+        for role in ROLES:
+            st.session_state.pop(f"lvl_{role}_{proc}", None)
+            parked.pop(f"{role}|{proc}", None)
+        level_state.reset(proc)
+        if proc not in levels:
+            st.session_state["process_data"].pop(proc, None)
+    if PLAN_TABLE_KEY in st.session_state:
+        st.session_state[PLAN_TABLE_KEY], st.session_state["plan_table_errors"] = revalidate_plan_table(
+            st.session_state[PLAN_TABLE_KEY]
+        )
+        st.session_state.pop("plan_table_applied", None)  # 모든 행을 새 수준으로 다시 반영
+        st.session_state["plan_table_version"] = st.session_state.get("plan_table_version", 0) + 1
+    return changed
+
+catalog_changed = sync_catalog_state()
+if catalog_changed:
+    st.sidebar.info(f"ℹ️ 장비 카탈로그의 수준 목록이 바뀐 공정({', '.join(catalog_changed)})의 수준 선택·수정값을 초기화했습니다.")
+
+input_mode = st.radio(
+    "입력 방식",
+    INPUT_MODES,
+    key="input_mode",
+    on_change=switch_input_mode,
+    horizontal=True,
+    help="표로 한 번에 입력: 12개 계획(공정 × 도입안·비교안)을 표 하나에서 편집·붙여넣기",
+)
+if input_mode == INPUT_MODES[0]:
+    for error in st.session_state.pop("input_mode_skipped", []):
+        st.warning(f"⚠️ 공정별 입력으로 옮기지 못한 행: {error}")
+    lazy_tabs = st.checkbox(
+        "선택한 공정 탭만 그리기",
+        key="lazy_tabs",
+        on_change=park_inactive_panels,
+        help="열린 탭의 입력 위젯만 만들고, 나머지 공정은 저장된 값으로 계산합니다 (공정이 많을수록 리런이 빨라짐).",
+    )
+    if lazy_tabs:
+        tabs = st.tabs(processes, key="process_tab", on_change=park_inactive_panels)
+    else:
+        tabs = st.tabs(processes)
+    for i, proc in enumerate(processes):
+        with tabs[i]:
+            if lazy_tabs and not tabs[i].open:
+                st.session_state["process_data"][proc] = {role: stored_plan(proc, role) for role in ROLES}
+                continue
+            st.fragment(process_panel, key=f"panel_{proc}")(proc)
+else:
+    st.fragment(plan_table_panel, key=PLAN_TABLE_KEY)()
+profiler.checkpoint("공정 입력 (탭·표 구성)")
 
 # --- [트랙터 연간 고정비 계산 (공통 자산)] ---
-def calc_annual_fixed(price, life_years):
-    salvage = price * RATIO_SALVAGE
-    return price * RATIO_REPAIR + price * RATIO_INTEREST + (price - salvage) / life_years
-
-TRACTOR_ANNUAL_FIXED = calc_annual_fixed(TRACTOR_PRICE_VAL, TRACTOR_LIFE_YEARS)
-
-# 역할별로 트랙터 종류별 총 연간 가동시간 집계 (안분 분모)
-# 각 공정의 연간 가동시간 = area_ha / eff_ha (현재 면적 기준)
-tractor_total_hours = {"도입안": {}, "비교안": {}}
-for role in ["도입안", "비교안"]:
-    total_h = 0.0
-    for proc, pdata in process_data.items():
-        s = pdata[role]
-        level = s["level"]
-        if level.get("tractor_type") == "트랙터":
-            eff = float(s["eff_ha"])
-            total_h += (area_ha / eff) if eff > 0 else 0.0
-    tractor_total_hours[role]["트랙터"] = total_h
-
-# 공정별 계획 비용 파라미터 계산
-plan_params = {}
-for proc, pdata in process_data.items():
-    plan_params[proc] = {}
-    for role in ["도입안", "비교안"]:
-        plan_params[proc][role] = compute_plan_costs(pdata[role])
-
-# 현재 설정 면적(area_ha)에서의 결과 (기존 결과 테이블용)
-results = []
-for proc, pdata in process_data.items():
-    for role in ["도입안", "비교안"]:
-        s = pdata[role]
-        level = s["level"]
-        pc = plan_params[proc][role]
-
-        hourly_variable = pc["hourly_variable"]
-        eff = pc["eff_ha"]
-
-        hourly_fixed = 0.0
-        assets_to_use = s.get("custom_assets") if s.get("custom_assets") else level.get("assets", [])
-        for asset in assets_to_use:
-            hourly_fixed += calculate_hourly_fixed_cost(
-                price=float(asset["price"]),
-                annual_hours=float(s["annual_hours"]),
-                useful_life=float(asset["life_years"])
-            )
+TRACTOR_ANNUAL_FIXED = float(calc_annual_fixed(TRACTOR_PRICE_VAL, TRACTOR_LIFE_YEARS))
 
-        # 트랙터 고정비 안분: 이 공정 가동시간 / 트랙터 전체 공정 총 가동시간
-        tractor_type = level.get("tractor_type")
-        if tractor_type and eff > 0:
-            this_proc_hours = area_ha / eff
-            total_t_hours = tractor_total_hours[role].get(tractor_type, 0.0)
-            if total_t_hours > 0:
-                tractor_share = this_proc_hours / total_t_hours
-                hourly_fixed += (TRACTOR_ANNUAL_FIXED * tractor_share) / this_proc_hours
+@st.cache_resource
+def get_session_registry():
+    """서버 프로세스 안 세션별 메모리 보고 (사이드바 세션 메모리 현황용)"""
+    return SessionRegistry()
 
-        hourly_total = hourly_variable + hourly_fixed
+@st.cache_resource
+def get_plan_cache():
+    """서버 프로세스 전체가 공유하는 계획 평가 캐시 (입력 해시 키 → 세션 간 공유 안전)"""
+    return PlanCache()
 
-        if eff > 0:
-            cost_per_ha = hourly_total / eff
-            time_per_ha = 1.0 / eff
-        else:
-            cost_per_ha = 0.0
-            time_per_ha = 0.0
-
-        results.append({
-            "공정": proc,
-            "구분": role,
-            "세부수준": level["label"],
-            "ha당_비용(현재면적)": cost_per_ha,
-            "ha당_시간": time_per_ha,
-            "상세": f"시간당:{hourly_total:,.0f}원 (유동:{hourly_variable:,.0f} / 고정:{hourly_fixed:,.0f})"
-        })
+plan_cache = get_plan_cache()
 
-df_res = pd.DataFrame(results)
+@st.cache_resource
+def get_figure_cache():
+    """서버 프로세스 공유 그래프 캐시 (데이터·옵션 해시 키 → 입력이 같으면 만들어 둔 Figure 재사용)"""
+    return FigureCache()
 
-# --- [4. 그래프] ---
+figure_cache = get_figure_cache()
 
-# 4-1. 면적별 단위비용 꺾은선 그래프 (전체 합산)
-st.subheader("💰 면적별 단위면적당 총 비용 (원/ha) — 전 공정 합산")
-st.caption("고정비는 총액이 일정하므로, 면적이 커질수록 단위비용이 감소합니다.")
+@st.cache_resource
+def get_convergence_cache():
+    """서버 프로세스 공유 수렴도 비교 결과 (계획·분포·면적·시드 해시 키 → 140만 회 평가를 입력당 한 번만)"""
+    return LRUCache(maxsize=32)
 
-line_data = []
-for area in area_range:
-    for role in ["도입안", "비교안"]:
-        total_cost_per_ha = sum(
-            cost_per_ha_for_area(plan_params[proc][role], area, role=role)
-            for proc in processes
+convergence_cache = get_convergence_cache()
+
+def cost_graph(area_grid=None):
+    """
+    세션별 비용 모델 의존성 그래프에 현재 입력을 넣어 반환
+    바뀐 입력의 하위 노드만 dirty 가 되고, get() 할 때 필요한 노드만 다시 계산한다.
+    (계획 레코드는 서버 공유 plan_cache 의 계획 단위 캐시 경유, 카탈로그가 바뀌면 그래프를 새로 만든다)
+    """
+    if st.session_state.get("cost_graph_catalog") != catalog.version:
+        st.session_state["cost_graph"] = build_cost_graph(
+            processes, ROLES, plan_cache, intro=ROLES.index("도입안"), base=ROLES.index("비교안")
         )
-        line_data.append({
-            "면적 (ha)": round(area, 2),
-            "구분": role,
-            "단위비용 (원/ha)": total_cost_per_ha,
-        })
+        st.session_state["cost_graph_catalog"] = catalog.version
+    graph = st.session_state["cost_graph"]
+    inputs = dict(
+        process_data=st.session_state["process_data"],
+        area_ha=area_ha,
+        fuel_price=FUEL_PRICE,
+        unit_hourly_wage=UNIT_HOURLY_WAGE,
+        tractor_price=TRACTOR_PRICE_VAL,
+    )
+    if area_grid is not None:
+        inputs["area_grid"] = area_grid
+    graph.set(**inputs)
+    return graph
 
-df_line = pd.DataFrame(line_data)
+def evaluate_current():
+    """
+    현재 공정 계획 평가 — results·optimizer·uncertainty fragment 공용
+    반환: plans, allocation, coef (fragment 가 따로 리런돼도 바뀐 것이 없으면 재계산 없음)
+    """
+    graph = cost_graph()
+    return {k: graph.get(k) for k in ("plans", "allocation", "coef")}
+
+def rerun_after_range_edit():
+    """면적 범위 위젯 on_change 콜백 — 면적 격자를 쓰는 fragment 만 리런"""
+    st.rerun(["results", "uncertainty"])
+
+def break_even_verdict(be: dict, i=()):
+    """손익분기 판정 문구 (be: break_even_area 의 per_process 또는 total)"""
+    area = be["area"][i]
+    if np.isfinite(area):
+        if be["intro_wins_above"][i]:
+            return f"{area:.2f}ha 이상에서 도입안 유리"
+        return f"{area:.2f}ha 이하에서 도입안 유리"
+    if be["intro_always"][i]:
+        return "전 면적에서 도입안 유리"
+    if be["base_always"][i]:
+        return "전 면적에서 비교안 유리"
+    return "비용 동일"
+
+def mark_break_even(fig, area, fixed, variable, area_min_ha, area_max_ha, size=12):
+    """분석 면적 범위 안의 손익분기점을 그래프에 표시"""
+    if np.isfinite(area) and area_min_ha <= area <= area_max_ha:
+        fig.add_scatter(
+            x=[area],
+            y=[fixed / area + variable],
+            mode="markers",
+            marker=dict(size=size, symbol="star", color="crimson"),
+            name=f"손익분기 ({area:.2f}ha)",
+        )
 
-fig_line = px.line(
-    df_line,
-    x="면적 (ha)",
-    y="단위비용 (원/ha)",
-    color="구분",
-    markers=True,
-    labels={"단위비용 (원/ha)": "단위면적당 비용 (원/ha)", "면적 (ha)": "작업 면적 (ha)"},
-)
-fig_line.update_traces(mode="lines+markers", marker=dict(size=7))
-fig_line.update_layout(
-    yaxis_title="비용 (원/ha)",
-    xaxis_title="작업 면적 (ha)",
-    legend_title_text="",
-    hovermode="x unified"
-)
-# 현재 설정 면적 표시
-fig_line.add_vline(
-    x=area_ha,
-    line_dash="dash",
-    line_color="gray",
-    annotation_text=f"현재 설정 면적 ({area_ha:.2f}ha)",
-    annotation_position="top right"
-)
-st.plotly_chart(fig_line, use_container_width=True)
-
-# 4-2. 공정별 꺾은선 그래프 (개별 공정) - 공정별 독립 y축
-st.subheader("📊 공정별 면적별 단위비용 비교")
-
-cols = st.columns(3)
-for idx, proc in enumerate(processes):
-    proc_data = []
-    for area in area_range:
-        for role in ["도입안", "비교안"]:
-            c = cost_per_ha_for_area(plan_params[proc][role], area, role=role)
-            proc_data.append({
-                "면적 (ha)": round(area, 2),
-                "구분": role,
-                "단위비용 (원/ha)": c,
-            })
-    df_proc = pd.DataFrame(proc_data)
+# --- [그래프 생성 (figure_cache builder — 그래프에 쓰는 값은 모두 인자로 받는다)] ---
+def build_total_cost_figure(df_line, show_markers, area_ha, be_area, be_fixed, be_variable, area_min_ha, area_max_ha):
+    """면적별 단위비용 꺾은선 (전 공정 합산) + 현재 면적 + 손익분기점"""
+    fig = px.line(
+        df_line,
+        x="면적 (ha)",
+        y="단위비용 (원/ha)",
+        color="구분",
+        markers=show_markers,
+        labels={"단위비용 (원/ha)": "단위면적당 비용 (원/ha)", "면적 (ha)": "작업 면적 (ha)"},
+    )
+    fig.update_traces(mode="lines+markers" if show_markers else "lines", marker=dict(size=7))
+    fig.update_layout(
+        yaxis_title="비용 (원/ha)",
+        xaxis_title="작업 면적 (ha)",
+        legend_title_text="",
+        hovermode="x unified"
+    )
+    # 현재 설정 면적 표시
+    fig.add_vline(
+        x=area_ha,
+        line_dash="dash",
+        line_color="gray",
+        annotation_text=f"현재 설정 면적 ({area_ha:.2f}ha)",
+        annotation_position="top right"
+    )
+    # 손익분기점 표시 (전 공정 합산)
+    mark_break_even(fig, be_area, be_fixed, be_variable, area_min_ha, area_max_ha)
+    return fig
 
-    fig_p = px.line(
+def build_process_cost_figure(df_proc, proc, show_markers, be_area, be_fixed, be_variable, area_min_ha, area_max_ha):
+    """공정 하나의 면적별 단위비용 꺾은선 (공정별 독립 y축) + 손익분기점"""
+    fig = px.line(
         df_proc,
         x="면적 (ha)",
         y="단위비용 (원/ha)",
         color="구분",
-        markers=True,
+        markers=show_markers,
         title=proc,
         labels={"단위비용 (원/ha)": "원/ha", "구분": ""},
         color_discrete_map={"도입안": "#1f77b4", "비교안": "#aec7e8"},
     )
-    fig_p.update_traces(marker=dict(size=5))
-    fig_p.update_layout(
+    fig.update_traces(marker=dict(size=5))
+    fig.update_layout(
         hovermode="x unified",
         legend_title_text="",
         margin=dict(t=40, b=20),
         yaxis=dict(rangemode="tozero"),
     )
-    with cols[idx % 3]:
-        st.plotly_chart(fig_p, use_container_width=True)
-
-# 4-3. 소요시간 비교 (기존 바 차트 유지)
-st.subheader("⏱️ 소요 시간 비교 (시간/ha)")
-fig_time = px.bar(
-    df_res,
-    x="공정",
-    y="ha당_시간",
-    color="구분",
-    barmode="group",
-    text="ha당_시간",
-    labels={"ha당_시간": "단위 면적당 시간 (h/ha)"}
-)
-fig_time.update_traces(texttemplate='%{text:.1f}h')
-fig_time.update_layout(yaxis_title="시간 (Hour/ha)", legend_title_text="")
-st.plotly_chart(fig_time, use_container_width=True)
-
-# --- [5. 결과 테이블] ---
-st.markdown("---")
-st.subheader("📋 결과 테이블 (현재 설정 면적 기준)")
-st.dataframe(df_res, use_container_width=True)
-
-# --- [6. 요약 통계] ---
-st.markdown("---")
-col_s1, col_s2 = st.columns(2)
-
-with col_s1:
-    total_intro_cost = df_res[df_res["구분"] == "도입안"]["ha당_비용(현재면적)"].sum()
-    total_base_cost = df_res[df_res["구분"] == "비교안"]["ha당_비용(현재면적)"].sum()
-    diff_cost = total_base_cost - total_intro_cost
-
-    st.info(f"**[비용 비교]** 현재 설정 면적 ({area_ha:.2f}ha) 기준, 단위면적당(원/ha)")
-    st.write(f"비교안: {total_base_cost:,.0f} 원/ha vs 도입안: {total_intro_cost:,.0f} 원/ha")
-    if diff_cost > 0:
-        st.success(f"👉 도입안이 **{diff_cost:,.0f} 원/ha** 비용 절감")
-    elif diff_cost < 0:
-        st.error(f"👉 도입안이 **{abs(diff_cost):,.0f} 원/ha** 비용 증가")
-    else:
-        st.write("👉 비용 동일")
-
-with col_s2:
-    total_intro_time = df_res[df_res["구분"] == "도입안"]["ha당_시간"].sum()
-    total_base_time = df_res[df_res["구분"] == "비교안"]["ha당_시간"].sum()
-    diff_time = total_base_time - total_intro_time
-
-    st.info("**[시간 비교]** 1ha 작업 시")
-    st.write(f"비교안: {total_base_time:.1f} 시간 vs 도입안: {total_intro_time:.1f} 시간")
-    if total_intro_time > 0 and diff_time > 0:
-        st.success(f"👉 도입안이 **{diff_time:.1f} 시간** 단축 ({total_base_time/total_intro_time:.1f}배)")
-    elif total_intro_time > 0 and diff_time < 0:
-        st.error("👉 도입안이 더 오래 걸림")
+    mark_break_even(fig, be_area, be_fixed, be_variable, area_min_ha, area_max_ha, size=10)
+    return fig
+
+def build_time_figure(df_res):
+    """공정별 ha당 소요시간 막대 (도입안·비교안)"""
+    fig = px.bar(
+        df_res,
+        x="공정",
+        y="ha당_시간",
+        color="구분",
+        barmode="group",
+        text="ha당_시간",
+        labels={"ha당_시간": "단위 면적당 시간 (h/ha)"}
+    )
+    fig.update_traces(texttemplate='%{text:.1f}h')
+    fig.update_layout(yaxis_title="시간 (Hour/ha)", legend_title_text="")
+    return fig
+
+# --- [3. 분석 결과] ---
+@st.cache_resource
+def plotlyjs_cdn_reachable() -> bool:
+    """서버 프로세스당 한 번 — plotly.js CDN 에 닿지 않으면 브라우저 탐색 그래프에 번들을 내장"""
+    return cdn_reachable()
+
+@st.fragment(key="results")
+@profiled("결과")
+def results_section():
+    """3. 분석 결과 — 공정 패널·면적 범위가 바뀌면 이 fragment 만 다시 그린다"""
+    process_data = st.session_state["process_data"]
+
+    st.header("3. 📈 분석 결과")
+    st.markdown("---")
+
+    # 면적 범위 설정 (꺾은선 그래프용)
+    st.subheader("📐 단위면적당 비용 분석 면적 범위 설정")
+    col_range1, col_range2 = st.columns(2)
+    with col_range1:
+        area_min_ha = st.number_input(
+            "최소 면적 (ha)", value=1.0, min_value=0.1, step=0.5,
+            key="area_min_ha", on_change=rerun_after_range_edit,
+        )
+    with col_range2:
+        area_max_ha = st.number_input(
+            "최대 면적 (ha)", value=10.0, min_value=0.5, step=0.5,
+            key="area_max_ha", on_change=rerun_after_range_edit,
+        )
+    area_steps = st.slider(
+        "면적 구간 수", min_value=5, max_value=2000, value=10,
+        key="area_steps", on_change=rerun_after_range_edit,
+    )
+    client_explorer = st.toggle(
+        "🖱️ 브라우저에서 면적 범위 탐색 (합산 그래프 — 범위·확대·이동에 서버 리런 없음)",
+        key="client_area_explorer",
+        help="공정별 고정비 계수·유동비만 보내고 곡선은 브라우저에서 다시 그립니다.",
+    )
+    inline_plotlyjs = client_explorer and st.checkbox(
+        "plotly.js 내장 (오프라인·방화벽 환경)",
+        value=not plotlyjs_cdn_reachable(),
+        key="explorer_inline_plotlyjs",
+        help="CDN 대신 서버에 설치된 plotly.js(약 4.6MB)를 함께 보냅니다. "
+             "기본값은 서버가 CDN 에 닿는지로 정합니다 (브라우저만 막혀 있으면 직접 켜세요).",
+    )
+    area_adaptive = st.checkbox(
+        "적응형 면적 격자 (곡선이 급한 작은 면적·손익분기 교차 면적에 점 집중, 구간 수 = 최대 점 수)",
+        key="area_adaptive", on_change=rerun_after_range_edit,
+    )
+
+    # 공정별 계획 비용 계수 계산 (면적 독립 부분) — (역할, 공정) 배열
+    # 역할별 트랙터 안분표도 함께 계산 (리런당 1회 → 결과 테이블·합산 그래프·공정별 그래프 공용)
+    # 입력이 같으면 캐시에서 꺼내고, 바뀐 공정의 계획만 다시 계산
+    # 의존성 그래프: 바뀐 입력의 하위 노드만 다시 계산 (유류비 → 유동비 노드, 트랙터 가격 → 트랙터 고정비 노드)
+    # 면적 격자도 그래프 노드 — 적응형이면 coef 로 곡률·교차 면적을 보고 점을 배치
+    graph = cost_graph(dict(area_min=area_min_ha, area_max=area_max_ha, steps=area_steps, adaptive=area_adaptive))
+    tractor_alloc = graph.get("allocation")
+    coef = graph.get("coef")
+    area_range = graph.get("areas")
+    if area_adaptive:
+        st.caption(f"적응형 격자: 면적 점 {len(area_range)}개 (최대 {area_steps}개, 선형 보간 오차 {AREA_GRID_TOL:.1%} 이내, 손익분기 면적 포함)")
+
+    # 면적 격자 전체의 단위비용 — (역할, 공정, 면적)
+    curve = graph.get("curve")
+
+    # 도입안·비교안 손익분기 면적 (닫힌 해) — 공정별 + 전 공정 합산
+    break_even = graph.get("break_even")
+    profiler.checkpoint("비용 계산")
+
+    with st.sidebar.expander("🗄️ 계산 캐시 현황", expanded=False):
+        st.dataframe(pd.DataFrame(plan_cache.stats()).T, use_container_width=True)
+
+    with st.sidebar.expander("⏱️ 계산 노드별 소요시간", expanded=False):
+        st.caption(f"이번 리런에서 다시 계산한 노드: {', '.join(graph.recomputed) or '없음'}")
+        st.dataframe(
+            pd.DataFrame(graph.stats()).set_index("노드").style.format(
+                {"최근 (ms)": "{:.3f}", "누적 (ms)": "{:.3f}"}
+            ),
+            use_container_width=True,
+        )
+
+    with st.sidebar.expander("🧠 세션 메모리 현황", expanded=False):
+        ctx = get_script_run_ctx()
+        registry = get_session_registry()
+        # 세션 상태 전체를 도는 측정은 MEMORY_SAMPLE_SEC 초에 한 번만 (그 사이 리런은 마지막 측정값)
+        if ctx is not None:
+            memory = registry.sample(ctx.session_id, st.session_state)
+        else:
+            memory = session_memory(st.session_state)
+        st.caption(
+            f"이 세션: 키 {len(memory)}개 / 약 {memory['크기(KB)'].sum():,.1f} KB "
+            f"(공유 DB 항목 참조 포함 추정치, {MEMORY_SAMPLE_SEC:.0f}초마다 갱신)"
+        )
+        st.dataframe(pd.DataFrame([level_state.stats()]), hide_index=True, use_container_width=True)
+        st.dataframe(memory.head(10).style.format({"크기(KB)": "{:.1f}"}), hide_index=True, use_container_width=True)
+        st.caption("서버 전체 활성 세션")
+        st.dataframe(
+            registry.table().style.format({"메모리(KB)": "{:.1f}", "경과(초)": "{:.0f}"}),
+            hide_index=True, use_container_width=True,
+        )
+    profiler.checkpoint("진단 패널")
+
+    # 현재 설정 면적(area_ha)에서의 결과 (기존 결과 테이블용)
+    results = []
+    for p_idx, proc in enumerate(processes):
+        for r_idx, role in enumerate(ROLES):
+            hourly_variable = coef["hourly_variable"][r_idx, p_idx]
+            hourly_fixed = coef["hourly_fixed"][r_idx, p_idx]
+            hourly_total = hourly_variable + hourly_fixed
+            results.append({
+                "공정": proc,
+                "구분": role,
+                "세부수준": process_data[proc][role]["level"]["label"],
+                "ha당_비용(현재면적)": coef["fixed"][r_idx, p_idx] + coef["variable"][r_idx, p_idx],
+                "ha당_시간": coef["time"][r_idx, p_idx],
+                "상세": f"시간당:{hourly_total:,.0f}원 (유동:{hourly_variable:,.0f} / 고정:{hourly_fixed:,.0f})"
+            })
+
+    df_res = pd.DataFrame(results)
+    profiler.checkpoint("결과 표 데이터")
+
+    # --- [4. 그래프] ---
+
+    # 4-1. 면적별 단위비용 꺾은선 그래프 (전체 합산)
+    st.subheader("💰 면적별 단위면적당 총 비용 (원/ha) — 전 공정 합산")
+    st.caption("고정비는 총액이 일정하므로, 면적이 커질수록 단위비용이 감소합니다.")
+
+    # 적응형 격자는 작은 면적 쪽 점 간격이 좁아 소수 둘째 자리로 반올림하면 점이 겹친다
+    area_labels = np.round(area_range, 4 if area_adaptive else 2)
+    show_markers = len(area_range) <= 50
+
+    intro_idx = ROLES.index("도입안")
+    if client_explorer:
+        # 곡선은 계수로 정해지므로 (역할, 공정) 계수·손익분기 면적만 보내고 브라우저에서 샘플링
+        payload = explorer_payload(
+            coef, break_even, processes, ROLES, area_ha, area_min_ha, area_max_ha, area_steps,
+            intro=intro_idx, base=ROLES.index("비교안"),
+        )
+        components.html(explorer_html(payload, height=560, inline_plotlyjs=inline_plotlyjs), height=560)
+        profiler.checkpoint("브라우저 탐색 그래프")
     else:
-        st.warning("👉 시간이 0으로 계산되었습니다(능률 설정 확인).")
+        # 입력(곡선 데이터·면적·손익분기)이 그대로면 캐시한 그래프를 그대로 보낸다
+        total_curve = curve["total"].sum(axis=1)  # (역할, 면적)
+        df_line = pd.DataFrame({
+            "면적 (ha)": np.tile(area_labels, len(ROLES)),
+            "구분": np.repeat(ROLES, len(area_range)),
+            "단위비용 (원/ha)": total_curve.ravel(),
+        })
+        profiler.checkpoint("그래프 데이터")
+        fig_line = figure_cache.get(
+            build_total_cost_figure,
+            df_line,
+            show_markers=show_markers,
+            area_ha=float(area_ha),
+            be_area=float(break_even["total"]["area"]),
+            be_fixed=float(coef["fixed"][intro_idx].sum()),
+            be_variable=float(coef["variable"][intro_idx].sum()),
+            area_min_ha=float(area_min_ha),
+            area_max_ha=float(area_max_ha),
+        )
+        profiler.checkpoint("그래프 생성")
+        st.plotly_chart(fig_line, use_container_width=True)
+        profiler.checkpoint("그래프 전송")
+
+    # 4-2. 공정별 꺾은선 그래프 (개별 공정) - 공정별 독립 y축
+    st.subheader("📊 공정별 면적별 단위비용 비교")
+
+    cols = st.columns(3)
+    for idx, proc in enumerate(processes):
+        df_proc = pd.DataFrame({
+            "면적 (ha)": np.tile(area_labels, len(ROLES)),
+            "구분": np.repeat(ROLES, len(area_range)),
+            "단위비용 (원/ha)": curve["total"][:, idx, :].ravel(),
+        })
+        profiler.checkpoint("그래프 데이터")
+
+        fig_p = figure_cache.get(
+            build_process_cost_figure,
+            df_proc,
+            proc=proc,
+            show_markers=show_markers,
+            be_area=float(break_even["per_process"]["area"][idx]),
+            be_fixed=float(coef["fixed"][intro_idx, idx]),
+            be_variable=float(coef["variable"][intro_idx, idx]),
+            area_min_ha=float(area_min_ha),
+            area_max_ha=float(area_max_ha),
+        )
+        profiler.checkpoint("그래프 생성")
+        with cols[idx % 3]:
+            st.plotly_chart(fig_p, use_container_width=True)
+        profiler.checkpoint("그래프 전송")
+
+    # 4-3. 소요시간 비교 (기존 바 차트 유지)
+    st.subheader("⏱️ 소요 시간 비교 (시간/ha)")
+    fig_time = figure_cache.get(build_time_figure, df_res)
+    profiler.checkpoint("그래프 생성")
+    st.plotly_chart(fig_time, use_container_width=True)
+    profiler.checkpoint("그래프 전송")
+
+    with st.sidebar.expander("🖼️ 그래프 캐시 현황", expanded=False):
+        figure_stats = figure_cache.stats()
+        summary = figure_cache.summary()
+        st.caption(
+            f"서버 공유 그래프 {summary['size']}개 / 최대 {summary['maxsize']}개 "
+            "— 적중하면 그래프 생성·dict 변환을 건너뜀"
+        )
+        if figure_stats:
+            st.dataframe(
+                pd.DataFrame(figure_stats).set_index("그래프").style.format(
+                    {"적중률": "{:.0%}", "생성 누적 (ms)": "{:.1f}"}
+                ),
+                use_container_width=True,
+            )
+    profiler.checkpoint("진단 패널")
+
+    # --- [5. 결과 테이블] ---
+    st.markdown("---")
+    st.subheader("📋 결과 테이블 (현재 설정 면적 기준)")
+    st.dataframe(df_res, use_container_width=True)
+
+    st.subheader("⚖️ 손익분기 면적 (도입안 vs 비교안)")
+    st.caption("단위비용 곡선(고정비 ÷ 면적 + 유동비)이 만나는 면적을 계산식으로 직접 구한 값입니다.")
+    be_areas = np.append(break_even["per_process"]["area"], break_even["total"]["area"])
+    df_break_even = pd.DataFrame({
+        "공정": list(processes) + ["전 공정 합산"],
+        "손익분기 면적 (ha)": be_areas,
+        "손익분기 면적 (평)": be_areas * 3025,
+        "판정": [break_even_verdict(break_even["per_process"], i) for i in range(len(processes))]
+                + [break_even_verdict(break_even["total"])],
+    })
+    st.dataframe(df_break_even, use_container_width=True)
+
+    with st.expander("🚜 트랙터 고정비 안분표 (공통 자산)", expanded=False):
+        df_alloc = pd.DataFrame({
+            "공정": np.tile(processes, len(ROLES)),
+            "구분": np.repeat(ROLES, len(processes)),
+            "트랙터 가동시간 (h)": tractor_alloc["hours"].ravel(),
+            "안분 비율": tractor_alloc["share"].ravel(),
+            "안분 고정비 (원/년)": (TRACTOR_ANNUAL_FIXED * tractor_alloc["share"]).ravel(),
+        })
+        st.dataframe(df_alloc[df_alloc["안분 비율"] > 0], use_container_width=True)
+
+    # --- [6. 요약 통계] ---
+    st.markdown("---")
+    col_s1, col_s2 = st.columns(2)
+
+    with col_s1:
+        total_intro_cost = df_res[df_res["구분"] == "도입안"]["ha당_비용(현재면적)"].sum()
+        total_base_cost = df_res[df_res["구분"] == "비교안"]["ha당_비용(현재면적)"].sum()
+        diff_cost = total_base_cost - total_intro_cost
+
+        st.info(f"**[비용 비교]** 현재 설정 면적 ({area_ha:.2f}ha) 기준, 단위면적당(원/ha)")
+        st.write(f"비교안: {total_base_cost:,.0f} 원/ha vs 도입안: {total_intro_cost:,.0f} 원/ha")
+        if diff_cost > 0:
+            st.success(f"👉 도입안이 **{diff_cost:,.0f} 원/ha** 비용 절감")
+        elif diff_cost < 0:
+            st.error(f"👉 도입안이 **{abs(diff_cost):,.0f} 원/ha** 비용 증가")
+        else:
+            st.write("👉 비용 동일")
+
+    with col_s2:
+        total_intro_time = df_res[df_res["구분"] == "도입안"]["ha당_시간"].sum()
+        total_base_time = df_res[df_res["구분"] == "비교안"]["ha당_시간"].sum()
+        diff_time = total_base_time - total_intro_time
+
+        st.info("**[시간 비교]** 1ha 작업 시")
+        st.write(f"비교안: {total_base_time:.1f} 시간 vs 도입안: {total_intro_time:.1f} 시간")
+        if total_intro_time > 0 and diff_time > 0:
+            st.success(f"👉 도입안이 **{diff_time:.1f} 시간** 단축 ({total_base_time/total_intro_time:.1f}배)")
+        elif total_intro_time > 0 and diff_time < 0:
+            st.error("👉 도입안이 더 오래 걸림")
+        else:
+            st.warning("👉 시간이 0으로 계산되었습니다(능률 설정 확인).")
+    profiler.checkpoint("결과 표·요약")
+
+results_section()
+
+# --- [7. 최적 기계화 조합 탐색] ---
+def apply_levels_to_intro(level_indices):
+    """최적 조합을 도입안 기계화 수준 선택값에 반영 (다음 리런 전에 실행되는 콜백)"""
+    for proc, l_idx in zip(processes, level_indices):
+        set_level("도입안", proc, l_idx)
+    if st.session_state.get("input_mode") == INPUT_MODES[1]:
+        # 표 입력 중이면 도입안 행을 새 수준의 기본값으로 바꾸고 표 + 의존 fragment 리런
+        levels = dict(zip(processes, level_indices))
+        st.session_state[PLAN_TABLE_KEY] = [
+            plan_table_row(r["공정"], r["구분"], level_idx=int(levels[r["공정"]]))
+            if r["구분"] == "도입안" and catalog.level_index[r["공정"]].get(r["기계화 수준"]) != int(levels[r["공정"]])
+            else r
+            for r in st.session_state[PLAN_TABLE_KEY]
+        ]
+        st.session_state["plan_table_version"] = st.session_state.get("plan_table_version", 0) + 1
+        st.rerun([PLAN_TABLE_KEY] + PLAN_DEPENDENTS)
+    if st.session_state.get("lazy_tabs"):
+        # 숨긴 탭의 계획은 fragment 밖(본문)에서 만들므로 전체 리런
+        st.rerun()
+    # 바뀐 수준이 패널에 보이도록 공정 패널 전체 + 의존 fragment 리런
+    st.rerun([f"panel_{proc}" for proc in processes] + PLAN_DEPENDENTS)
+
+@st.fragment(key="optimizer")
+@profiled("최적 조합")
+def optimizer_section():
+    """4. 최적 조합 탐색 — 탐색 옵션을 바꾸면 이 fragment 만 다시 실행"""
+    process_data = st.session_state["process_data"]
+    coef = evaluate_current()["coef"]
+    intro_idx = ROLES.index("도입안")
+    total_intro_cost = (coef["fixed"][intro_idx] + coef["variable"][intro_idx]).sum()
+    total_intro_time = coef["time"][intro_idx].sum()
+
+    st.markdown("---")
+    st.header("4. 🔍 최적 기계화 조합 탐색")
+    st.caption(
+        "공정별 기계화 수준의 모든 조합 중 현재 설정 면적 기준 ha당 비용이 최소인 조합과 "
+        "비용-시간 파레토 조합을 찾습니다. 도입안에서 선택한 수준은 입력한 능률·인력·가격을, "
+        "나머지 수준은 DB 기본값을 사용하며 트랙터 고정비 안분을 반영합니다."
+    )
+
+    if st.checkbox("최적 조합 탐색 실행", value=False, key="run_optimizer"):
+        overrides = {
+            (proc, process_data[proc]["도입안"]["level_idx"]): process_data[proc]["도입안"]
+            for proc in processes
+        }
+        opt_records = level_records(MECH_LEVELS, processes, area_ha, overrides)
+        opt = optimize_mix(opt_records, area_ha, FUEL_PRICE, UNIT_HOURLY_WAGE, TRACTOR_ANNUAL_FIXED)
+        best = opt["best"]
+        pareto = opt["pareto"]
+
+        def mix_label(level_indices):
+            return " / ".join(MECH_LEVELS[p][int(i)]["label"] for p, i in zip(processes, level_indices))
+
+        st.caption(
+            f"탐색 방식: {opt['method']} — 전체 {opt['n_combinations']:,}개 조합, 파레토 조합 {len(pareto['cost'])}개"
+        )
+
+        col_o1, col_o2 = st.columns(2)
+        with col_o1:
+            st.metric(
+                "최소 비용 조합 (원/ha)",
+                f"{best['cost']:,.0f}",
+                delta=f"{best['cost'] - total_intro_cost:,.0f} (현재 도입안 대비)",
+                delta_color="inverse",
+            )
+        with col_o2:
+            st.metric(
+                "최소 비용 조합 소요시간 (h/ha)",
+                f"{best['time']:.1f}",
+                delta=f"{best['time'] - total_intro_time:.1f} (현재 도입안 대비)",
+                delta_color="inverse",
+            )
+
+        df_best = pd.DataFrame({
+            "공정": processes,
+            "최소 비용 수준": [MECH_LEVELS[p][i]["label"] for p, i in zip(processes, best["levels"])],
+            "현재 도입안": [process_data[p]["도입안"]["level"]["label"] for p in processes],
+        })
+        st.dataframe(df_best, use_container_width=True)
+        st.button(
+            "👉 최소 비용 조합을 도입안에 적용",
+            on_click=apply_levels_to_intro,
+            args=(best["levels"],),
+        )
+
+        st.subheader("⚖️ 비용-시간 파레토 조합")
+        df_pareto = pd.DataFrame({
+            "ha당 비용 (원/ha)": pareto["cost"],
+            "ha당 시간 (h/ha)": pareto["time"],
+            "조합": [mix_label(lv) for lv in pareto["levels"]],
+        })
+        fig_pareto = px.line(
+            df_pareto,
+            x="ha당 시간 (h/ha)",
+            y="ha당 비용 (원/ha)",
+            markers=True,
+            hover_data=["조합"],
+        )
+        fig_pareto.add_scatter(
+            x=[total_intro_time],
+            y=[total_intro_cost],
+            mode="markers",
+            marker=dict(size=12, symbol="x", color="gray"),
+            name="현재 도입안",
+        )
+        fig_pareto.update_layout(hovermode="closest", legend_title_text="")
+        st.plotly_chart(fig_pareto, use_container_width=True)
+        st.dataframe(df_pareto, use_container_width=True)
+
+optimizer_section()
+
+# --- [8. 불확실성 분석 (몬테카를로)] ---
+ROLE_COLORS = {"도입안": "#1f77b4", "비교안": "#ff7f0e"}
+ROLE_FILLS = {"도입안": "rgba(31,119,180,{a})", "비교안": "rgba(255,127,14,{a})"}
+
+def spread_spec(kind: str, center: float, pct: float) -> dict:
+    """중심값 ±pct% 범위를 분포 지정(spec)으로 변환 (정규분포는 ±pct% 를 ±2σ 로 해석)"""
+    half = abs(center) * pct / 100.0
+    if pct <= 0:
+        return {"kind": "fixed", "value": center}
+    if kind == "균등분포":
+        return {"kind": "uniform", "low": center - half, "high": center + half}
+    if kind == "정규분포":
+        return {"kind": "normal", "mean": center, "std": half / 2.0}
+    return {"kind": "triangular", "low": center - half, "mode": center, "high": center + half}
+
+def render_mc_results(mc: dict, kind_label: str):
+    """
+    몬테카를로 결과(simulate / simulate_stream 반환값) 표시
+    스트리밍 중에는 같은 자리를 여러 번 그리므로 처리 표본 수로 차트 key 를 구분
+    """
+    mc_areas = mc["areas"]
+    st.metric(
+        f"현재 설정 면적({area_ha:.2f}ha) 기준 도입안이 더 저렴할 확률",
+        f"{mc['prob_intro_cheaper_current'] * 100:.1f} %",
+    )
+
+    pct_idx = {q: i for i, q in enumerate(mc["percentiles"])}
+    fig_mc = go.Figure()
+    for r_idx, role in enumerate(ROLES):
+        for lo, hi, alpha in [(5, 95, 0.15), (25, 75, 0.3)]:
+            fig_mc.add_scatter(
+                x=np.concatenate([mc_areas, mc_areas[::-1]]),
+                y=np.concatenate([mc["bands"][pct_idx[hi], r_idx], mc["bands"][pct_idx[lo], r_idx][::-1]]),
+                fill="toself",
+                fillcolor=ROLE_FILLS[role].format(a=alpha),
+                line=dict(width=0),
+                hoverinfo="skip",
+                name=f"{role} P{lo}–P{hi}",
+            )
+        fig_mc.add_scatter(
+            x=mc_areas,
+            y=mc["bands"][pct_idx[50], r_idx],
+            mode="lines",
+            line=dict(color=ROLE_COLORS[role]),
+            name=f"{role} 중앙값",
+        )
+    fig_mc.update_layout(
+        xaxis_title="작업 면적 (ha)",
+        yaxis_title="비용 (원/ha)",
+        legend_title_text="",
+        hovermode="x unified",
+    )
+    st.plotly_chart(fig_mc, use_container_width=True, key=f"mc_bands_{mc['n_draws']}")
+
+    fig_prob = px.line(
+        pd.DataFrame({"면적 (ha)": mc_areas, "확률 (%)": mc["prob_intro_cheaper"] * 100}),
+        x="면적 (ha)",
+        y="확률 (%)",
+        title="면적별 도입안이 더 저렴할 확률",
+    )
+    fig_prob.update_layout(yaxis=dict(range=[0, 100]))
+    st.plotly_chart(fig_prob, use_container_width=True, key=f"mc_prob_{mc['n_draws']}")
+
+    st.dataframe(
+        pd.DataFrame(
+            mc["current_bands"].T,
+            index=list(ROLES),
+            columns=[f"P{q}" for q in mc["percentiles"]],
+        ).style.format("{:,.0f}"),
+        use_container_width=True,
+    )
+    st.caption(f"표본 {mc['n_draws']:,}개 · 분포: {kind_label} · ha당 비용(원/ha), 현재 설정 면적 기준")
+
+@st.fragment(key="uncertainty")
+@profiled("몬테카를로")
+def uncertainty_section():
+    """5. 몬테카를로 — 분포·표본 설정을 바꾸면 이 fragment 만 다시 실행"""
+    plans = evaluate_current()["plans"]
+    area_min_ha = st.session_state["area_min_ha"]
+    area_max_ha = st.session_state["area_max_ha"]
+    area_steps = st.session_state["area_steps"]
+
+    st.markdown("---")
+    st.header("5. 🎲 불확실성 분석 (몬테카를로)")
+    st.caption(
+        "1일 노임·면세유 가격·기계 가격·각 계획의 작업 능률을 현재 입력값 중심의 분포에서 뽑아 "
+        "비용 모델을 배치 단위로 반복 평가합니다. 결과는 면적별 단위비용 백분위 밴드와 "
+        "도입안이 비교안보다 저렴할 확률입니다."
+    )
+
+    if st.checkbox("몬테카를로 분석 실행", value=False, key="run_mc"):
+        mc_mode = st.radio(
+            "집계 방식",
+            ["정확 (전체 표본 보관)", "스트리밍 (분위수 스케치)"],
+            horizontal=True,
+            key="mc_mode",
+            help="스트리밍은 표본을 보관하지 않고 분위수 스케치(상대오차 ±0.5%)에 누적하므로 "
+                 "표본 수와 무관하게 메모리가 일정하며, 진행 중인 결과를 바로 보여줍니다.",
+        )
+        streaming = mc_mode.startswith("스트리밍")
+        mc_sampler_label = st.radio(
+            "표본 추출 방식",
+            ["의사난수 (MC)", "준난수 (Halton QMC)"],
+            horizontal=True,
+            key="mc_sampler",
+            help="준난수는 입력 공간을 고르게 채우는 저불일치 수열로, 같은 정밀도에 필요한 표본 수가 훨씬 적습니다.",
+        )
+        mc_sampler = "halton" if "QMC" in mc_sampler_label else "random"
+        draw_options = [10_000, 50_000, 100_000, 200_000]
+        if streaming:
+            draw_options += [1_000_000, 5_000_000]
+
+        col_u1, col_u2, col_u3 = st.columns(3)
+        with col_u1:
+            mc_kind = st.selectbox("분포 종류", ["삼각분포", "균등분포", "정규분포"], key="mc_kind")
+            mc_draws = st.select_slider("표본 수", options=draw_options, value=100_000, key="mc_draws")
+        with col_u2:
+            mc_labor_pct = st.number_input("1일 노임 변동폭 (±%)", value=10.0, min_value=0.0, max_value=90.0, step=1.0, key="mc_labor_pct")
+            mc_fuel_pct = st.number_input("면세유 가격 변동폭 (±%)", value=20.0, min_value=0.0, max_value=90.0, step=1.0, key="mc_fuel_pct")
+            mc_price_pct = st.number_input("기계 가격 변동폭 (±%)", value=10.0, min_value=0.0, max_value=90.0, step=1.0, key="mc_price_pct")
+        with col_u3:
+            mc_eff_pct = st.number_input("작업 능률 변동폭 (±%)", value=15.0, min_value=0.0, max_value=90.0, step=1.0, key="mc_eff_pct")
+            mc_seed = st.number_input("난수 시드", value=0, min_value=0, step=1, key="mc_seed")
+
+        mc_specs = {
+            "labor_cost_per_day": spread_spec(mc_kind, float(LABOR_COST_PER_DAY), mc_labor_pct),
+            "fuel_price": spread_spec(mc_kind, float(FUEL_PRICE), mc_fuel_pct),
+            "eff_factor": spread_spec(mc_kind, 1.0, mc_eff_pct),
+            "price_factor": spread_spec(mc_kind, 1.0, mc_price_pct),
+        }
+        # 밴드용 면적 격자는 최대 50점 (정확 모드: 표본 × 면적 배열 크기 제한)
+        mc_areas = np.linspace(area_min_ha, area_max_ha, min(area_steps, 50))
+        mc_args = dict(
+            plans=plans,
+            specs=mc_specs,
+            area_ha=area_ha,
+            areas=mc_areas,
+            work_hours_per_day=WORK_HOURS_PER_DAY,
+            tractor_annual_fixed=TRACTOR_ANNUAL_FIXED,
+            n_draws=int(mc_draws),
+            intro=ROLES.index("도입안"),
+            base=ROLES.index("비교안"),
+            seed=int(mc_seed),
+            sampler=mc_sampler,
+        )
+
+        if streaming:
+            # 배치마다 중간 결과로 같은 자리를 다시 그림
+            mc_progress = st.progress(0.0)
+            mc_slot = st.empty()
+            for mc in simulate_stream(**mc_args, batch_size=100_000):
+                mc_progress.progress(mc["n_draws"] / int(mc_draws), text=f"{mc['n_draws']:,} / {int(mc_draws):,} 표본")
+                with mc_slot.container():
+                    render_mc_results(mc, mc_kind)
+        else:
+            render_mc_results(simulate(**mc_args), mc_kind)
+
+        if st.checkbox("수렴도 비교 (MC vs QMC)", value=False, key="mc_convergence"):
+            conv_reps = st.select_slider(
+                "반복 횟수", options=[8, 16, 32, 64], value=CONVERGENCE_REPS, key="mc_convergence_reps",
+                help="표본 수마다 독립 추정을 이만큼 반복해 표준오차를 구합니다. 많을수록 표준오차 추정이 안정되지만 오래 걸립니다.",
+            )
+            st.caption(
+                f"표본 수별로 독립 시드로 {conv_reps}회 반복 추정한 '도입안 − 비교안' 평균 ha당 비용 차이의 "
+                "표준오차입니다 (현재 설정 면적 기준). 낮을수록 적은 표본으로 같은 정밀도에 도달합니다. "
+                f"오차 막대는 표준오차의 {CONVERGENCE_CONFIDENCE:.0%} 신뢰구간입니다."
+            )
+            sampler_labels = {"random": "MC", "halton": "QMC (Halton)"}
+            conv_key = canonical_key({
+                "plans": plans,
+                "specs": mc_specs,
+                "area_ha": area_ha,
+                "work_hours_per_day": WORK_HOURS_PER_DAY,
+                "tractor_annual_fixed": TRACTOR_ANNUAL_FIXED,
+                "seed": int(mc_seed),
+                "n_reps": int(conv_reps),
+            })
+            conv_slot = st.empty()
+
+            def compute_convergence():
+                # 캐시에 없을 때만 — (방식, 표본 수) 칸마다 진행 표시
+                conv_progress = conv_slot.progress(0.0, text="수렴도 계산 중…")
+                rows = convergence_study(
+                    plans, mc_specs, area_ha, WORK_HOURS_PER_DAY, TRACTOR_ANNUAL_FIXED,
+                    intro=ROLES.index("도입안"),
+                    base=ROLES.index("비교안"),
+                    seed=int(mc_seed),
+                    n_reps=int(conv_reps),
+                    progress=lambda done, total, row: conv_progress.progress(
+                        done / total,
+                        text=f"{sampler_labels[row['sampler']]} {row['n_draws']:,} 표본 완료 ({done} / {total})",
+                    ),
+                )
+                conv_slot.empty()
+                return rows
+
+            conv_rows = convergence_cache.get_or_compute(conv_key, compute_convergence)
+            df_conv = pd.DataFrame(conv_rows).rename(columns={
+                "sampler": "표본 추출 방식",
+                "n_draws": "표본 수",
+                "estimate": "평균 비용 차이 (원/ha)",
+                "std_error": "표준오차 (원/ha)",
+                "std_error_low": "표준오차 하한",
+                "std_error_high": "표준오차 상한",
+            })
+            df_conv["표본 추출 방식"] = df_conv["표본 추출 방식"].map(sampler_labels)
+            fig_conv = px.line(
+                df_conv.assign(
+                    _plus=df_conv["표준오차 상한"] - df_conv["표준오차 (원/ha)"],
+                    _minus=df_conv["표준오차 (원/ha)"] - df_conv["표준오차 하한"],
+                ),
+                x="표본 수",
+                y="표준오차 (원/ha)",
+                color="표본 추출 방식",
+                error_y="_plus",
+                error_y_minus="_minus",
+                markers=True,
+                log_x=True,
+                log_y=True,
+            )
+            fig_conv.update_layout(legend_title_text="")
+            st.plotly_chart(fig_conv, use_container_width=True)
+            st.dataframe(df_conv, use_container_width=True)
+
+uncertainty_section()
+
+# --- [9. 스윕 결과 조회 (결과 큐브)] ---
+@st.fragment(key="cube_view")
+@profiled("스윕 조회")
+def cube_view_section():
+    """6. 스윕 결과 조회 — 공정 계획과 무관하므로 자기 위젯이 바뀔 때만 다시 실행"""
+    st.markdown("---")
+    st.header("6. 📦 스윕 결과 조회")
+    st.caption(
+        "onion_sweep 으로 만든 결과 큐브(공정 × 역할 × 면적 × 시나리오)를 메모리 맵으로 열어 "
+        "선택한 면적의 조각만 읽습니다. 전 시나리오의 전 공정 합산 ha당 비용 분포와 최저 비용 시나리오를 보여줍니다."
+    )
+
+    if st.checkbox("스윕 결과 조회", value=False, key="run_cube_view"):
+        cube_path = st.text_input("결과 큐브 디렉터리", value="sweep_out", key="cube_path")
+        if not ResultsCube.exists(cube_path):
+            st.warning(f"'{cube_path}' 에 결과 큐브(cube.json)가 없습니다. `python onion_sweep.py 스펙.json -o {cube_path}` 로 먼저 만드세요.")
+        else:
+            cube = ResultsCube.open(cube_path)
+            cube_areas = cube.coords["area"]
+            col_c1, col_c2 = st.columns(2)
+            with col_c1:
+                cube_area = st.select_slider(
+                    "면적 (ha)",
+                    options=cube_areas,
+                    value=cube_areas[cube.index("area", area_ha)],
+                    format_func=lambda a: f"{a:,.2f}",
+                    key="cube_area",
+                )
+            with col_c2:
+                cube_role = st.selectbox("구분", cube.coords["role"], key="cube_role")
+
+            scen_cost = np.asarray(cube.sel("cost", role=cube_role, area=cube_area)).sum(axis=0)  # (시나리오,)
+            st.caption(f"시나리오 {len(scen_cost):,}개 · 큐브 {cube.shape} 중 {cube_area:,.2f}ha 조각만 읽음")
+
+            col_c3, col_c4, col_c5 = st.columns(3)
+            col_c3.metric("최소 (원/ha)", f"{np.nanmin(scen_cost):,.0f}")
+            col_c4.metric("중앙값 (원/ha)", f"{np.nanmedian(scen_cost):,.0f}")
+            col_c5.metric("최대 (원/ha)", f"{np.nanmax(scen_cost):,.0f}")
+
+            fig_cube = px.histogram(x=scen_cost, nbins=60, labels={"x": "전 공정 합산 ha당 비용 (원/ha)"})
+            fig_cube.update_layout(yaxis_title="시나리오 수", showlegend=False)
+            st.plotly_chart(fig_cube, use_container_width=True)
+
+            top = np.argsort(scen_cost)[:10]
+            df_top = pd.DataFrame({"시나리오": np.asarray(cube.coords["scenario"], dtype=object)[top]})
+            for name, values in cube.scenario_attrs.items():
+                df_top[name] = np.asarray(values, dtype=object)[top]
+            if "조합" in df_top and cube.coords["process"] == processes:
+                df_top["조합"] = [
+                    " / ".join(MECH_LEVELS[p][int(i)]["label"] for p, i in zip(processes, mix.split("-")))
+                    for mix in df_top["조합"]
+                ]
+            df_top["ha당 비용 (원/ha)"] = scen_cost[top]
+            st.subheader("🏅 최저 비용 시나리오 (상위 10)")
+            st.dataframe(df_top, use_container_width=True)
+
+cube_view_section()
+profiler.checkpoint("기타")
+
+# --- [메트릭 노출 (ONION_METRICS_PORT / ONION_METRICS_FILE)] ---
+@st.cache_resource
+def get_metrics_exporter():
+    """서버 프로세스 하나에 하나 — 리런 지연·활성 세션·캐시 적중률·세션 메모리를 엔드포인트·파일로 노출"""
+    exporter = MetricsExporter("Onion_4")
+    exporter.add_profile(get_profile_registry())
+    exporter.add_sessions(get_session_registry())
+    exporter.add_caches({
+        "계획": plan_cache.plans.stats,
+        "그래프": figure_cache.summary,
+        "수렴도": convergence_cache.stats,
+    })
+    return exporter.start_from_env()
+
+metrics_exporter = get_metrics_exporter()
+
+# --- [리런 프로파일러 패널 (URL 에 ?profile=1)] ---
+last_run = profiler.end_run()
+if st.query_params.get("profile") == "1":
+    with st.sidebar.expander("🔬 리런 구간별 소요시간", expanded=True):
+        st.caption(
+            f"직전 리런 ({last_run['run']}): {last_run['total_ms']:,.0f} ms — 안쪽 구간(바깥/안쪽)은 바깥 구간에 포함. "
+            "fragment 만 다시 실행된 리런은 그 fragment 이름으로 기록됩니다."
+        )
+        st.dataframe(
+            profiler.last_run_table().style.format({"시간 (ms)": "{:.1f}", "비율": "{:.0%}"}),
+            hide_index=True, use_container_width=True,
+        )
+        ms_format = {c: "{:.1f}" for c in ("평균 (ms)", "p50 (ms)", "p95 (ms)", "최대 (ms)")}
+        st.caption("이 세션 누적 (p50·p95 는 최근 리런 기준)")
+        st.dataframe(profiler.table().style.format(ms_format), hide_index=True, use_container_width=True)
+        profile_registry = get_profile_registry()
+        st.caption("서버 전체 세션")
+        st.dataframe(profile_registry.table().style.format(ms_format), hide_index=True, use_container_width=True)
+        st.bar_chart(
+            pd.DataFrame(
+                {"리런 수": profile_registry.recent_counts("리런: 전체")},
+                index=pd.Index(bucket_labels(), name="전체 리런 시간 (ms)"),
+            ),
+            sort=False,
+        )
+        if profile_registry.log_path:
+            st.caption(f"리런 기록 파일: {profile_registry.log_path}")
+        if metrics_exporter.address is not None:
+            host, port = metrics_exporter.address
+            st.caption(f"메트릭 엔드포인트: http://{host}:{port}/metrics")
+        if metrics_exporter.file_path:
+            st.caption(f"메트릭 파일: {metrics_exporter.file_path}")
+        if metrics_exporter.error:
+            st.warning(metrics_exporter.error)
@@ -1,12 +1,38 @@
 import streamlit as st
 import pandas as pd
+import math
+
 import plotly.express as px
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from onion_catalog import get_catalog
+from onion_metrics import MetricsExporter
+from onion_profile import ProfileRegistry, RerunProfiler
+from onion_session import SessionRegistry
 
 # 1. 페이지 설정
 st.set_page_config(page_title="농작업 경제성 분석기 Pro", layout="wide")
 st.title("🚜 농작업 경제성 및 시간 효율 분석 (1ha 기준)")
 st.markdown("### 📊 공정별 비용(원/ha) 및 소요시간(시간/ha) 비교 분석")
 
+# --- [리런 계측 (ONION_METRICS_PORT / ONION_METRICS_FILE 로 노출)] ---
+@st.cache_resource
+def get_metrics():
+    """서버 프로세스 공유 리런 히스토그램·세션 메모리 보고 + 메트릭 노출"""
+    profiles, sessions = ProfileRegistry(), SessionRegistry()
+    exporter = MetricsExporter("P_v5")
+    exporter.add_profile(profiles)
+    exporter.add_sessions(sessions)
+    return profiles, sessions, exporter.start_from_env()
+
+profile_registry, session_registry, _ = get_metrics()
+_ctx = get_script_run_ctx()
+session_id = _ctx.session_id if _ctx is not None else "-"
+if "_rerun_profiler" not in st.session_state:
+    st.session_state["_rerun_profiler"] = RerunProfiler(sink=profile_registry.sink(session_id))
+profiler = st.session_state["_rerun_profiler"]
+profiler.begin_run()
+
 # --- [설정: 고정 상수 및 공식 파라미터] ---
 RATIO_SALVAGE = 0.05   # 폐기가치율 5%
 RATIO_REPAIR = 0.06    # 연 수리비율 6%
@@ -43,22 +69,67 @@ st.sidebar.info(
 )
 # (시간당 인건비 표시는 사용자 요청으로 삭제함)
 
-# --- [데이터베이스(DB)] ---
-tractor_db = [
-    {"브랜드": "대동", "모델": "RX730VC5", "연료": "디젤", "연료소모량": 14.1, "구입가격": 60000000},
-    {"브랜드": "LS엠트론", "모델": "LL3001", "연료": "디젤", "연료소모량": 15.1, "구입가격": 58000000}
-]
-
-implement_db = [
-    {"종류": "휴립피복기", "브랜드": "불스", "모델": "BG-1200A", "구입가격": 11800000},
-    {"종류": "정식기", "브랜드": "죽암엠앤씨", "모델": "JOPR-4/8A", "구입가격": 49000000},
-    {"종류": "줄기절단기", "브랜드": "기본모델", "모델": "SC-100", "구입가격": 5000000},
-    {"종류": "굴취기", "브랜드": "신흥공업사", "모델": "SH-1400WN", "구입가격": 68000000},
-    {"종류": "수집기", "브랜드": "신흥공업사", "모델": "SH-T1400", "구입가격": 18150000}
-]
-
-tractor_options = ["선택 안 함"] + [f"[{m['브랜드']}] {m['모델']}" for m in tractor_db]
-implement_options = ["선택 안 함"] + [f"({m['종류']}) {m['브랜드']} {m['모델']}" for m in implement_db]
+# --- [데이터베이스(DB)] → equipment_catalog.json (onion_catalog: 서버 공유, 파일이 바뀌면 자동 반영) ---
+catalog = get_catalog()
+profiler.checkpoint("사이드바 입력")
+
+NO_SELECTION = "선택 안 함"
+PICKER_PAGE_SIZE = 20
+
+# --- [모델 선택기: 서버 쪽 검색 + 페이지] ---
+# 선택지 전체를 selectbox 로 보내지 않고, 카탈로그 접두어 인덱스로 검색한 한 페이지(최대 PICKER_PAGE_SIZE 개)만 보낸다.
+# 선택한 라벨은 st.session_state[key] 에 두므로 검색어·페이지를 바꿔도 유지된다.
+def _picker_search_changed(key: str):
+    st.session_state[f"{key}_page"] = 1
+
+def _picker_selected(key: str):
+    st.session_state[key] = st.session_state[f"{key}_pick"]
+
+def model_picker(table, label: str, key: str, page_size: int = PICKER_PAGE_SIZE) -> str:
+    """브랜드·모델·종류 검색 + 페이지 선택 → 선택한 장비 라벨 (없으면 NO_SELECTION)"""
+    selected = st.session_state.setdefault(key, NO_SELECTION)
+    if selected != NO_SELECTION and selected not in table:
+        selected = st.session_state[key] = NO_SELECTION  # 카탈로그에서 빠진 모델
+
+    kinds = table.kinds()
+    c_q, c_k = st.columns([3, 2]) if len(kinds) > 1 else (st.container(), None)
+    with c_q:
+        query = st.text_input(
+            f"{label} 검색", key=f"{key}_q", placeholder="브랜드·모델 앞글자",
+            on_change=_picker_search_changed, args=(key,),
+        )
+    kind = None
+    if c_k is not None:
+        with c_k:
+            kind = st.selectbox(
+                "종류", ["전체"] + kinds, key=f"{key}_kind",
+                on_change=_picker_search_changed, args=(key,),
+            )
+            kind = None if kind == "전체" else kind
+
+    rows = table.search(query, kind)
+    n_pages = max(1, math.ceil(len(rows) / page_size))
+    page = 1
+    if n_pages > 1:
+        page = min(st.session_state.get(f"{key}_page", 1), n_pages)
+        st.session_state[f"{key}_page"] = page
+        page = st.number_input(f"페이지 (총 {n_pages})", min_value=1, max_value=n_pages, step=1, key=f"{key}_page")
+    start = (page - 1) * page_size
+    page_labels = table.options(rows[start:start + page_size])
+
+    options = [NO_SELECTION]
+    if selected != NO_SELECTION and selected not in page_labels:
+        options.append(selected)  # 검색 결과 밖이어도 현재 선택은 보이게
+    options += page_labels
+    st.selectbox(
+        label, options, index=options.index(selected), key=f"{key}_pick",
+        on_change=_picker_selected, args=(key,),
+    )
+    if len(rows):
+        st.caption(f"검색 결과 {len(rows):,}개 중 {start + 1:,}–{start + len(page_labels):,}")
+    else:
+        st.caption("검색 결과가 없습니다.")
+    return st.session_state[key]
 
 # --- [1. 분석 대상 면적 설정] ---
 st.header("1. 분석 대상 면적 설정")
@@ -76,6 +147,7 @@ with col2:
         input_area = st.number_input("면적 입력", value=100.0)
         area_ha = input_area / 100
 st.info(f"📐 **환산 면적:** {area_ha:.4f} ha ({area_ha * 3025:,.0f} 평)")
+profiler.checkpoint("면적 입력")
 
 # --- [2. 공정별 설정] ---
 st.header("2. 공정별 작업 조건 설정")
@@ -100,11 +172,11 @@ for i, proc in enumerate(processes):
         # --- [A. 기계 작업 설정] ---
         with col_m1:
             st.markdown(f"#### 🚜 [{proc}] 기계 작업")
-            sel_tractor = st.selectbox(f"트랙터 ({proc})", tractor_options, key=f"tr_{proc}")
-            sel_implement = st.selectbox(f"작업기 ({proc})", implement_options, key=f"imp_{proc}")
+            sel_tractor = model_picker(catalog.tractors, f"트랙터 ({proc})", key=f"tr_{proc}")
+            sel_implement = model_picker(catalog.implements, f"작업기 ({proc})", key=f"imp_{proc}")
             
-            tr_info = next((m for m in tractor_db if f"[{m['브랜드']}] {m['모델']}" == sel_tractor), None)
-            imp_info = next((m for m in implement_db if f"({m['종류']}) {m['브랜드']} {m['모델']}" == sel_implement), None)
+            tr_info = catalog.tractors.get(sel_tractor)
+            imp_info = catalog.implements.get(sel_implement)
             
             imp_life = IMPLEMENT_LIFE_MAP.get(proc, 5)
             st.caption(f"ℹ️ 적용 내구연한 - 트랙터: {TRACTOR_LIFE_YEARS}년, 작업기: {imp_life}년")
@@ -149,6 +221,8 @@ for i, proc in enumerate(processes):
             "관행_인력": man_workers, "관행_능률": man_eff
         }
 
+profiler.checkpoint("공정 입력")
+
 # --- [3. 분석 로직 (비용 & 시간)] ---
 def calculate_hourly_fixed_cost(price, annual_hours, useful_life):
     """ 시간당 고정비 = 연간총고정비 / 연간가동시간 """
@@ -228,6 +302,7 @@ for proc, data in process_data.items():
     })
 
 df_res = pd.DataFrame(results)
+profiler.checkpoint("비용 계산")
 
 # --- [4. 그래프 시각화] ---
 col_g1, col_g2 = st.columns(2)
@@ -265,6 +340,8 @@ with col_g2:
     fig_time.update_layout(yaxis_title="시간 (Hour/ha)", legend_title_text='')
     st.plotly_chart(fig_time, use_container_width=True)
 
+profiler.checkpoint("그래프")
+
 # [요약 통계]
 st.markdown("---")
 col_s1, col_s2 = st.columns(2)
@@ -291,4 +368,8 @@ with col_s2:
     if diff_time > 0:
         st.success(f"👉 **{diff_time:.1f} 시간** 단축 ({total_man_time/total_mach_time:.1f}배 빠름)")
     else:
-        st.error(f"👉 기계가 더 오래 걸림")
\ No newline at end of file
+        st.error(f"👉 기계가 더 오래 걸림")
+
+profiler.checkpoint("요약")
+profiler.end_run()
+session_registry.sample(session_id, st.session_state)  # MEMORY_SAMPLE_SEC 초에 한 번만 다시 잰다
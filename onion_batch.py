@@ -0,0 +1,159 @@
+"""
+농가 포트폴리오 일괄 평가 (CSV/Parquet → Parquet)
+
+농가마다 면적·노임·유류비·공정별 기계화 수준이 다른 표를 읽어
+onion_engine 비용 모델로 청크 단위 일괄 평가하고, 농가 × 공정 결과를 Parquet 으로 쓴다.
+청크 하나씩 읽고 평가하고 바로 쓰므로 메모리 사용량은 입력 행 수와 무관하다.
+
+입력 열
+- farm_id: 농가 식별자
+- area, unit_type: 면적과 단위 (평 / ha / a)
+- labor_cost_per_day: 1일 노임 (원)
+- fuel_price: 면세유 가격 (원/L)
+- level_<공정>: 공정별 기계화 수준 (수준 인덱스 또는 라벨, 예: level_수확)
+- work_hours_per_day (선택, 기본 8), tractor_price (선택, 기본 50,000,000)
+
+출력 열 (농가 × 공정 한 행)
+- 농가, 공정, 세부수준, 면적(ha), ha당_비용(현재면적), ha당_고정비, ha당_유동비, ha당_시간, 총_시간
+
+사용 예
+    python onion_batch.py farms.csv -o results.parquet --chunk-size 20000
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from onion_catalog import MECH_LEVELS, PROCESSES
+from onion_engine import (
+    AREA_UNIT_TO_HA, TRACTOR_LIFE_YEARS,
+    calc_annual_fixed, level_table, gather_plans, plan_coefficients,
+)
+
+DEFAULT_CHUNK_SIZE = 20_000
+DEFAULT_WORK_HOURS_PER_DAY = 8
+DEFAULT_TRACTOR_PRICE = 50_000_000
+
+REQUIRED_COLUMNS = ["farm_id", "area", "unit_type", "labor_cost_per_day", "fuel_price"]
+
+
+def read_chunks(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """CSV 또는 Parquet 파일을 chunk_size 행씩 DataFrame 으로 읽는 제너레이터"""
+    if path.lower().endswith((".parquet", ".pq")):
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+def resolve_levels(chunk: pd.DataFrame, catalog: dict = MECH_LEVELS, processes=PROCESSES):
+    """level_<공정> 열(인덱스 또는 라벨) → (농가, 공정) 수준 인덱스 배열"""
+    out = np.empty((len(chunk), len(processes)), dtype=np.int64)
+    for p_idx, proc in enumerate(processes):
+        col = f"level_{proc}"
+        if col not in chunk:
+            raise ValueError(f"입력에 '{col}' 열이 없습니다.")
+        labels = {lv["label"]: i for i, lv in enumerate(catalog[proc])}
+        raw = chunk[col]
+        as_num = pd.to_numeric(raw, errors="coerce")
+        idx = as_num.where(as_num.notna(), raw.map(labels))
+        bad = idx.isna() | (idx < 0) | (idx >= len(catalog[proc]))
+        if bad.any():
+            farm = chunk["farm_id"][bad].iloc[0]
+            raise ValueError(f"농가 {farm}: '{col}' 값 '{raw[bad].iloc[0]}' 은(는) 알 수 없는 기계화 수준입니다.")
+        out[:, p_idx] = idx.to_numpy(dtype=np.int64)
+    return out
+
+
+def evaluate_chunk(chunk: pd.DataFrame, table: dict, catalog: dict = MECH_LEVELS, processes=PROCESSES) -> pd.DataFrame:
+    """농가 청크 하나를 (농가, 1, 공정) 배열로 한 번에 평가 → 농가 × 공정 결과"""
+    missing = [c for c in REQUIRED_COLUMNS if c not in chunk]
+    if missing:
+        raise ValueError(f"입력에 필수 열이 없습니다: {', '.join(missing)}")
+
+    n = len(chunk)
+    unit_factor = chunk["unit_type"].map(AREA_UNIT_TO_HA)
+    if unit_factor.isna().any():
+        raise ValueError(f"알 수 없는 면적 단위: {chunk['unit_type'][unit_factor.isna()].iloc[0]}")
+    area_ha = (chunk["area"].to_numpy(dtype=float) * unit_factor.to_numpy(dtype=float))
+
+    def column(name, default):
+        if name in chunk:
+            return chunk[name].fillna(default).to_numpy(dtype=float)
+        return np.full(n, float(default))
+
+    work_hours = column("work_hours_per_day", DEFAULT_WORK_HOURS_PER_DAY)
+    tractor_price = column("tractor_price", DEFAULT_TRACTOR_PRICE)
+
+    level_idx = resolve_levels(chunk, catalog, processes)
+    plans = {k: v[:, None, :] for k, v in gather_plans(table, level_idx).items()}  # (농가, 1, 공정)
+
+    per_farm = lambda x: np.asarray(x, dtype=float).reshape(n, 1, 1)
+    coef = plan_coefficients(
+        plans,
+        per_farm(area_ha),
+        per_farm(chunk["fuel_price"].to_numpy(dtype=float)),
+        per_farm(chunk["labor_cost_per_day"].to_numpy(dtype=float) / work_hours),
+        per_farm(calc_annual_fixed(tractor_price, TRACTOR_LIFE_YEARS)),
+    )
+    fixed = coef["fixed"][:, 0, :]
+    variable = coef["variable"][:, 0, :]
+    time = coef["time"][:, 0, :]
+
+    level_labels = [np.array([lv["label"] for lv in catalog[p]], dtype=object) for p in processes]
+    return pd.DataFrame({
+        "농가": np.repeat(chunk["farm_id"].to_numpy(), len(processes)),
+        "공정": np.tile(np.array(processes, dtype=object), n),
+        "세부수준": np.stack(
+            [level_labels[p][level_idx[:, p]] for p in range(len(processes))], axis=1
+        ).ravel(),
+        "면적(ha)": np.repeat(area_ha, len(processes)),
+        "ha당_비용(현재면적)": (fixed + variable).ravel(),
+        "ha당_고정비": fixed.ravel(),
+        "ha당_유동비": variable.ravel(),
+        "ha당_시간": time.ravel(),
+        "총_시간": (time * area_ha[:, None]).ravel(),
+    })
+
+
+def run(input_path: str, output_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+        catalog: dict = MECH_LEVELS, processes=PROCESSES, progress=None) -> int:
+    """
+    입력 파일 전체를 청크 단위로 평가해 Parquet 으로 기록, 처리한 농가 수를 반환
+    progress(n_done) 콜백으로 진행 상황을 받을 수 있다.
+    """
+    table = level_table(catalog, processes)
+    writer = None
+    n_done = 0
+    try:
+        for chunk in read_chunks(input_path, chunk_size):
+            result = pa.Table.from_pandas(evaluate_chunk(chunk, table, catalog, processes), preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(output_path, result.schema)
+            writer.write_table(result)
+            n_done += len(chunk)
+            if progress:
+                progress(n_done)
+    finally:
+        if writer is not None:
+            writer.close()
+    return n_done
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="농가 포트폴리오 일괄 경제성 평가 (CSV/Parquet → Parquet)")
+    parser.add_argument("input", help="농가 표 (CSV 또는 Parquet)")
+    parser.add_argument("-o", "--output", help="결과 Parquet 경로 (기본: <입력 이름>_results.parquet)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="한 번에 평가할 농가 수")
+    args = parser.parse_args(argv)
+
+    output = args.output or f"{os.path.splitext(args.input)[0]}_results.parquet"
+    n = run(args.input, output, args.chunk_size, progress=lambda k: print(f"\r{k:,} 농가 처리", end="", flush=True))
+    print(f"\n완료: {n:,} 농가 → {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+계획 평가 캐시 (내용 주소 기반, 크기 제한 LRU)
+
+입력값을 정규화한 뒤 해시한 키로 결과를 저장하므로, 같은 입력이면
+세션·리런이 달라도 같은 항목을 재사용한다.
+- 계획 단위: (level, custom_assets, eff_ha, workers, annual_hours, 가동시간 모드) → plan_record
+
+공정 탭 하나만 바뀌면 그 공정의 계획 레코드만 새로 만든다.
+안분표·계수 이후 단계는 세션별 비용 모델 그래프(onion_graph)가 입력이 바뀐 노드만 다시 계산한다.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from onion_engine import ROLES, plan_record, stack_records
+
+
+def _normalize(obj):
+    """해시용 정규화: 숫자는 float, 튜플은 리스트, NumPy 값은 파이썬 값으로"""
+    if isinstance(obj, dict):
+        return {str(k): _normalize(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_normalize(v) for v in obj]
+    if isinstance(obj, np.ndarray):
+        return _normalize(obj.tolist())
+    if isinstance(obj, (bool, np.bool_)):
+        return bool(obj)
+    if isinstance(obj, (int, float, np.integer, np.floating)):
+        return float(obj)
+    return obj
+
+
+def canonical_key(obj) -> str:
+    """정규화한 입력의 JSON(키 정렬) SHA-1 해시"""
+    payload = json.dumps(_normalize(obj), sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _freeze(value):
+    """캐시에 들어간 배열은 읽기 전용으로 (공유 항목이 호출부에서 바뀌지 않도록)"""
+    if isinstance(value, np.ndarray):
+        value.setflags(write=False)
+    elif isinstance(value, dict):
+        for v in value.values():
+            _freeze(v)
+    return value
+
+
+class LRUCache:
+    """스레드 안전한 크기 제한 LRU 캐시 (적중/미적중 횟수 집계)"""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+
+        value = _freeze(compute())
+
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+
+def plan_key(s: dict) -> str:
+    """render_plan_panel 반환값 하나의 캐시 키"""
+    return canonical_key({
+        "level": s["level"],
+        "custom_assets": s.get("custom_assets") or [],
+        "eff_ha": s["eff_ha"],
+        "workers": s["workers"],
+        "annual_hours": s["annual_hours"],
+        "annual_hours_mode": s.get("annual_hours_mode"),
+    })
+
+
+class PlanCache:
+    """계획 단위 캐시 (계획 묶음은 stack_records 로 쌓기만 한다)"""
+
+    def __init__(self, max_plans: int = 4096):
+        self.plans = LRUCache(max_plans)
+
+    def stack(self, process_data: dict, processes, roles=ROLES, keys=None) -> dict:
+        """stack_plans 와 같은 결과를 계획 단위 캐시 경유로 (keys: 미리 계산한 plan_key [역할][공정])"""
+        if keys is None:
+            keys = [[plan_key(process_data[p][r]) for p in processes] for r in roles]
+        records = [
+            [
+                self.plans.get_or_compute(keys[r_idx][p_idx], lambda s=process_data[p][r]: plan_record(s))
+                for p_idx, p in enumerate(processes)
+            ]
+            for r_idx, r in enumerate(roles)
+        ]
+        return stack_records(records)
+
+    def stats(self) -> dict:
+        return {"계획": self.plans.stats()}
@@ -0,0 +1,268 @@
+"""
+양파 농작업 장비·기계화 수준 카탈로그
+
+Onion_4.py 와 배치 도구(onion_batch 등), P_v5.py 가 함께 쓰는 장비 카탈로그.
+데이터는 외부 파일(equipment_catalog.json — 환경변수 ONION_CATALOG 로 경로 변경)에 두고
+서버 프로세스당 한 번만 읽어 모든 세션이 같은 객체를 공유한다.
+- 읽어 들인 카탈로그는 변경 불가(FrozenDict·튜플) — 한 세션이 고쳐서 다른 세션 값이 바뀌는 일이 없다
+- get_catalog() 는 호출마다 파일 mtime 만 확인하고, 바뀌었으면 다시 읽는다
+  (앱을 재시작하지 않고 가격표를 교체; 새 파일이 깨져 있으면 이전 카탈로그를 계속 쓴다)
+- 라벨 → 위치 인덱스를 읽을 때 한 번 만들어 둔다
+- 트랙터·작업기 목록은 열 단위 배열(EquipmentTable)로 저장 — 라벨 해시 인덱스(선택·가격 조회 O(1)),
+  종류별 행 인덱스(필터 O(1)), 정렬된 검색어 접두어 인덱스(검색 O(log n + 결과 수))
+
+파일 구성 (JSON)
+- processes: 분석 공정 순서
+- mech_levels: {공정: [기계화 수준, ...]}
+    assets: 고정비 계산 대상(가격/내구연한)
+    tractor_fuel_lph: 유류비(시간당) 계산용. 트랙터 없으면 0.
+    default_eff_ha, default_workers: 초기 입력값
+- tractors: [{브랜드, 모델, 연료, 연료소모량, 구입가격, (내구연한)}, ...]
+- implements: [{종류, 브랜드, 모델, 구입가격, (연료소모량, 내구연한)}, ...]
+
+기존 코드 호환: `from onion_catalog import MECH_LEVELS, PROCESSES` 는 가져올 때마다 현재 카탈로그 값을 준다.
+"""
+import bisect
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+
+CATALOG_PATH = os.environ.get(
+    "ONION_CATALOG", os.path.join(os.path.dirname(os.path.abspath(__file__)), "equipment_catalog.json")
+)
+LEVEL_FIELDS = ("label", "tractor_type", "tractor_fuel_lph", "assets", "default_eff_ha", "default_workers")
+EQUIPMENT_TEXT_COLUMNS = ("종류", "브랜드", "모델", "연료")
+EQUIPMENT_NUMERIC_COLUMNS = ("연료소모량", "구입가격", "내구연한")
+
+
+class FrozenDict(dict):
+    """변경 불가 dict — JSON 직렬화·피클·해시 키 계산은 일반 dict 처럼 된다"""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("카탈로그는 읽기 전용입니다. 값을 바꾸려면 복사본(dict(...))을 쓰세요.")
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+
+def freeze(obj):
+    """JSON 값 → 변경 불가 구조 (dict → FrozenDict, list → tuple)"""
+    if isinstance(obj, dict):
+        return FrozenDict({k: freeze(v) for k, v in obj.items()})
+    if isinstance(obj, (list, tuple)):
+        return tuple(freeze(v) for v in obj)
+    return obj
+
+
+def tractor_label(m: dict) -> str:
+    return f"[{m['브랜드']}] {m['모델']}"
+
+
+def implement_label(m: dict) -> str:
+    return f"({m['종류']}) {m['브랜드']} {m['모델']}"
+
+
+class EquipmentTable:
+    """
+    장비 목록 열 저장 (열마다 배열 하나, 읽기 전용) + 인덱스
+    - 라벨 → 행 (해시): record / get / prices
+    - 종류 → 행 배열 (해시): rows_of_kind, search(kind=...)
+    - 라벨·브랜드·모델 소문자 검색어 정렬 목록 (이분 탐색): search(prefix)
+    원본 행에 없던 열은 만들지 않고, 일부 행에만 없는 값은 None / NaN 으로 둔다.
+    """
+
+    def __init__(self, rows, label, kind: str = None):
+        rows = list(rows)
+        self.columns = {}
+        for col in EQUIPMENT_TEXT_COLUMNS:
+            default = kind if col == "종류" else None
+            if default is not None or any(col in r for r in rows):
+                self.columns[col] = np.array([r.get(col, default) for r in rows], dtype=object)
+        for col in EQUIPMENT_NUMERIC_COLUMNS:
+            if any(col in r for r in rows):
+                values = [r.get(col, np.nan) for r in rows]
+                integral = all(isinstance(v, int) for v in values)  # 가격처럼 모두 정수면 정수 열
+                self.columns[col] = np.array(values, dtype=np.int64 if integral else float)
+        self.labels = np.array([label(r) for r in rows], dtype=object)
+        for arr in (*self.columns.values(), self.labels):
+            arr.setflags(write=False)
+
+        self._by_label = {lb: i for i, lb in enumerate(self.labels)}
+        if len(self._by_label) != len(rows):
+            dup = next(lb for i, lb in enumerate(self.labels) if self._by_label[lb] != i)
+            raise ValueError(f"장비 라벨이 중복됩니다: {dup}")
+        kinds = self.columns.get("종류")
+        self._by_kind = {}
+        if kinds is not None:
+            for i, k in enumerate(kinds):
+                self._by_kind.setdefault(k, []).append(i)
+            self._by_kind = {k: np.array(v, dtype=np.int64) for k, v in self._by_kind.items()}
+
+        terms = sorted(
+            (str(t).lower(), i)
+            for i in range(len(rows))
+            for t in {self.labels[i], *(self.columns[c][i] for c in ("브랜드", "모델") if c in self.columns)}
+            if t
+        )
+        self._prefix_keys = [t for t, _ in terms]
+        self._prefix_rows = np.array([i for _, i in terms], dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def __contains__(self, label) -> bool:
+        return label in self._by_label
+
+    def position(self, label: str) -> int:
+        if label not in self._by_label:
+            raise KeyError(f"카탈로그에 없는 장비입니다: {label}")
+        return self._by_label[label]
+
+    def record(self, label: str) -> dict:
+        """라벨 → 원본 형식의 행 dict ({브랜드, 모델, ..., 구입가격})"""
+        i = self.position(label)
+        out = {}
+        for col, arr in self.columns.items():
+            v = arr[i]
+            if v is None or (isinstance(v, float) and np.isnan(v)):
+                continue
+            out[col] = v.item() if isinstance(v, np.generic) else v
+        return out
+
+    def get(self, label: str, default=None):
+        return self.record(label) if label in self._by_label else default
+
+    def column(self, name: str, rows=None) -> np.ndarray:
+        arr = self.columns[name]
+        return arr if rows is None else arr[rows]
+
+    def prices(self, labels) -> np.ndarray:
+        """라벨 목록 → 구입가격 배열 (라벨마다 해시 조회 한 번)"""
+        return self.columns["구입가격"][[self.position(lb) for lb in labels]]
+
+    def kinds(self) -> list:
+        return list(self._by_kind)
+
+    def rows_of_kind(self, kind: str) -> np.ndarray:
+        return self._by_kind.get(kind, np.empty(0, dtype=np.int64))
+
+    def search(self, prefix: str = "", kind: str = None) -> np.ndarray:
+        """라벨·브랜드·모델이 prefix 로 시작하는 행 (카탈로그 순서, kind 를 주면 그 종류만)"""
+        prefix = prefix.strip().lower()
+        if prefix:
+            lo = bisect.bisect_left(self._prefix_keys, prefix)
+            hi = bisect.bisect_left(self._prefix_keys, prefix + "\U0010ffff", lo)
+            rows = np.unique(self._prefix_rows[lo:hi])
+        else:
+            rows = np.arange(len(self))
+        if kind is not None:
+            rows = np.intersect1d(rows, self.rows_of_kind(kind), assume_unique=True)
+        return rows
+
+    def options(self, rows=None) -> list:
+        """selectbox 선택지용 라벨 목록"""
+        return self.labels.tolist() if rows is None else self.labels[rows].tolist()
+
+
+class Catalog:
+    """파일 하나에서 읽은 변경 불가 카탈로그 + 라벨 인덱스"""
+
+    def __init__(self, data: dict, path: str = None, mtime_ns: int = None, version: str = None):
+        processes = data.get("processes")
+        mech_levels = data.get("mech_levels")
+        if not processes or not isinstance(mech_levels, dict):
+            raise ValueError("카탈로그에 'processes' 와 'mech_levels' 가 있어야 합니다.")
+        for proc in processes:
+            if not mech_levels.get(proc):
+                raise ValueError(f"'{proc}' 공정의 기계화 수준이 카탈로그에 없습니다.")
+            for lv in mech_levels[proc]:
+                missing = [f for f in LEVEL_FIELDS if f not in lv]
+                if missing:
+                    raise ValueError(f"'{proc}' 공정 수준 '{lv.get('label')}' 에 항목이 없습니다: {', '.join(missing)}")
+
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.version = version
+        self.processes = tuple(processes)
+        self.mech_levels = freeze(mech_levels)
+        self.tractors = EquipmentTable(data.get("tractors", []), tractor_label, kind="트랙터")
+        self.implements = EquipmentTable(data.get("implements", []), implement_label)
+
+        self.level_index = FrozenDict({
+            p: FrozenDict({lv["label"]: i for i, lv in enumerate(levels)})
+            for p, levels in self.mech_levels.items()
+        })
+
+    @classmethod
+    def load(cls, path: str) -> "Catalog":
+        """파일을 읽어 카탈로그 생성 (version: 파일 내용 SHA-1 앞 12자리)"""
+        mtime_ns = os.stat(path).st_mtime_ns
+        with open(path, "rb") as f:
+            raw = f.read()
+        return cls(json.loads(raw.decode("utf-8")), path, mtime_ns, hashlib.sha1(raw).hexdigest()[:12])
+
+    def level(self, proc: str, label: str) -> dict:
+        return self.mech_levels[proc][self.level_index[proc][label]]
+
+
+# --- [서버 공유 캐시] ---
+_lock = threading.Lock()
+_loaded = {}   # 경로 → Catalog
+_errors = {}   # 경로 → (실패한 파일 mtime, 메시지) — 같은 파일을 매번 다시 파싱하지 않도록
+
+
+def get_catalog(path: str = None) -> Catalog:
+    """
+    서버 프로세스 공유 카탈로그 — 파일 mtime 이 바뀌었을 때만 다시 읽는다
+    처음 읽기에 실패하면 예외, 다시 읽기에 실패하면 이전 카탈로그를 돌려주고 catalog_error() 에 남긴다.
+    """
+    path = os.path.abspath(path or CATALOG_PATH)
+    current = _loaded.get(path)
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError as e:
+        if current is None:
+            raise
+        _errors[path] = (None, str(e))
+        return current
+    if current is not None and mtime_ns == current.mtime_ns:
+        # 잠시 사라졌던 파일이 그대로 돌아온 경우 — 지난 오류는 더 이상 유효하지 않다
+        _errors.pop(path, None)
+        return current
+    if current is not None and mtime_ns == _errors.get(path, (None,))[0]:
+        return current
+
+    with _lock:
+        current = _loaded.get(path)
+        if current is not None and current.mtime_ns == mtime_ns:
+            return current
+        try:
+            _loaded[path] = Catalog.load(path)
+            _errors.pop(path, None)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            if current is None:
+                raise
+            _errors[path] = (mtime_ns, f"{type(e).__name__}: {e}")
+            return current
+        return _loaded[path]
+
+
+def catalog_error(path: str = None):
+    """마지막 다시 읽기 실패 메시지 (없으면 None)"""
+    error = _errors.get(os.path.abspath(path or CATALOG_PATH))
+    return error[1] if error else None
+
+
+def __getattr__(name):
+    # 모듈 속성으로 현재 카탈로그 노출 (import 할 때마다 mtime 확인)
+    if name == "MECH_LEVELS":
+        return get_catalog().mech_levels
+    if name == "PROCESSES":
+        return list(get_catalog().processes)
+    raise AttributeError(f"module 'onion_catalog' has no attribute '{name}'")
@@ -0,0 +1,227 @@
+"""
+결과 큐브 저장소 (메모리 맵, 차원 라벨 포함)
+
+스윕·일괄 평가 결과를 공정 × 역할 × 면적 × 시나리오 4차원 배열로 디스크에 두고,
+필요한 조각만 메모리 맵으로 읽는다. 변수마다 .npy 파일 하나씩 저장한다.
+- cost: ha당 비용 (원/ha) = fixed + variable
+- fixed: ha당 고정비 (원/ha)
+- variable: ha당 유동비 (원/ha)
+- hours: ha당 소요시간 (h/ha)
+
+디렉터리 구성
+- cube.json: 차원 순서, 좌표(공정·역할·면적·시나리오 라벨), 시나리오 속성, 변수 목록, dtype
+- <변수>.npy: (공정, 역할, 면적, 시나리오) 배열
+
+조각 선택 예 (3ha 에서 전 시나리오의 도입안 공정별 비용)
+    cube = ResultsCube.open("sweep_out")
+    cube.sel("cost", role="도입안", area=3.0)        # (공정, 시나리오) 메모리 맵 뷰
+    cube.to_frame(area=3.0, process="수확")          # 긴 형식 DataFrame + 시나리오 속성 열
+"""
+import json
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+DIMS = ("process", "role", "area", "scenario")
+VARIABLES = ("cost", "fixed", "variable", "hours")
+VARIABLE_LABELS = {  # to_frame 열 이름 (결과 테이블과 같은 표기)
+    "cost": "ha당_비용",
+    "fixed": "ha당_고정비",
+    "variable": "ha당_유동비",
+    "hours": "ha당_시간",
+}
+DIM_LABELS = {"process": "공정", "role": "구분", "area": "면적(ha)", "scenario": "시나리오"}
+META_FILE = "cube.json"
+
+
+class ResultsCube:
+    """공정 × 역할 × 면적 × 시나리오 결과 큐브 (변수별 메모리 맵 배열)"""
+
+    def __init__(self, path: str, meta: dict, mode: str = "r"):
+        self.path = path
+        self.meta = meta
+        self.mode = mode
+        self.coords = {d: meta["coords"][d] for d in DIMS}
+        self.scenario_attrs = meta.get("scenario_attrs", {})
+        self.shape = tuple(len(self.coords[d]) for d in DIMS)
+        self._arrays = {}
+        self._lookup = {}  # 차원별 라벨 → 위치
+
+    # --- [생성·열기] ---
+    @classmethod
+    def create(cls, path: str, processes, roles, areas, scenarios, scenario_attrs: dict = None,
+               dtype=np.float64) -> "ResultsCube":
+        """
+        빈 큐브 생성 (값은 NaN) — 쓰기 가능 상태로 반환
+        scenario_attrs: {속성 이름: 시나리오 수 길이 목록} — 노임·유류비·조합 등 시나리오 설명
+        """
+        scenarios = [str(s) for s in scenarios]
+        scenario_attrs = {k: list(v) for k, v in (scenario_attrs or {}).items()}
+        for k, v in scenario_attrs.items():
+            if len(v) != len(scenarios):
+                raise ValueError(f"시나리오 속성 '{k}' 길이({len(v)})가 시나리오 수({len(scenarios)})와 다릅니다.")
+        meta = {
+            "dims": list(DIMS),
+            "coords": {
+                "process": list(processes),
+                "role": list(roles),
+                "area": [float(a) for a in areas],
+                "scenario": scenarios,
+            },
+            "scenario_attrs": scenario_attrs,
+            "variables": list(VARIABLES),
+            "dtype": np.dtype(dtype).str,
+        }
+        os.makedirs(path, exist_ok=True)
+        cube = cls(path, meta, mode="r+")
+        for var in VARIABLES:
+            arr = np.lib.format.open_memmap(cube._file(var), mode="w+", dtype=dtype, shape=cube.shape)
+            arr[...] = np.nan
+            arr.flush()
+            cube._arrays[var] = arr
+        # cube.json 은 배열을 다 만든 뒤 마지막에 쓴다 (있으면 완성된 큐브)
+        with open(os.path.join(path, META_FILE), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        return cube
+
+    @classmethod
+    def open(cls, path: str, mode: str = "r") -> "ResultsCube":
+        """기존 큐브 열기 (mode: "r" 읽기 전용, "r+" 쓰기 가능)"""
+        with open(os.path.join(path, META_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+        return cls(path, meta, mode=mode)
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        return os.path.exists(os.path.join(path, META_FILE))
+
+    def _file(self, var: str) -> str:
+        return os.path.join(self.path, f"{var}.npy")
+
+    def array(self, var: str) -> np.ndarray:
+        """변수 하나의 전체 메모리 맵 (필요할 때 열고 재사용)"""
+        if var not in VARIABLES:
+            raise KeyError(f"알 수 없는 변수: {var} (가능: {', '.join(VARIABLES)})")
+        if var not in self._arrays:
+            self._arrays[var] = np.load(self._file(var), mmap_mode=self.mode)
+        return self._arrays[var]
+
+    # --- [쓰기] ---
+    def write(self, values: dict, process=slice(None), role=slice(None), area=slice(None), scenario=slice(None)):
+        """values: {변수: 배열} 을 위치 인덱스(슬라이스) 블록에 기록"""
+        if self.mode == "r":
+            raise ValueError("읽기 전용으로 연 큐브입니다. mode='r+' 로 여세요.")
+        for var, block in values.items():
+            self.array(var)[process, role, area, scenario] = block
+
+    def flush(self):
+        for arr in self._arrays.values():
+            if isinstance(arr, np.memmap):
+                arr.flush()
+
+    # --- [선택] ---
+    def index(self, dim: str, label, nearest: bool = None) -> int:
+        """
+        좌표 라벨 → 위치 인덱스
+        면적은 연속값이므로 기본적으로 가장 가까운 격자점을 고른다 (nearest=False 면 정확히 일치해야 함).
+        """
+        coords = self.coords[dim]
+        if dim == "area":
+            nearest = True if nearest is None else nearest
+            values = np.asarray(coords, dtype=float)
+            i = int(np.argmin(np.abs(values - float(label))))
+            if nearest or np.isclose(values[i], float(label)):
+                return i
+        else:
+            lookup = self._lookup.get(dim)
+            if lookup is None:
+                lookup = self._lookup[dim] = {str(v): i for i, v in enumerate(coords)}
+            if str(label) in lookup:
+                return lookup[str(label)]
+        raise KeyError(f"'{dim}' 차원에 '{label}' 좌표가 없습니다.")
+
+    def _selector(self, dim: str, sel):
+        """None → 전체, 슬라이스 → 그대로(위치), 목록 → 인덱스 배열, 단일 라벨 → 정수(차원 제거)"""
+        if sel is None:
+            return slice(None)
+        if isinstance(sel, slice):
+            return sel
+        if isinstance(sel, (list, tuple, np.ndarray)):
+            return np.array([self.index(dim, s) for s in sel], dtype=np.int64)
+        return self.index(dim, sel)
+
+    def sel(self, var: str, process=None, role=None, area=None, scenario=None) -> np.ndarray:
+        """
+        라벨로 조각 선택 — 단일 라벨을 준 차원은 빠진다
+        슬라이스·단일 라벨만 쓰면 디스크를 읽지 않는 메모리 맵 뷰를 돌려준다.
+        """
+        out = self.array(var)
+        # 목록 선택(고급 인덱싱)은 축마다 따로 적용해야 조합이 곱집합이 된다
+        picks = [self._selector(d, s) for d, s in zip(DIMS, (process, role, area, scenario))]
+        basic = tuple(p if not isinstance(p, np.ndarray) else slice(None) for p in picks)
+        out = out[basic]
+        axis = 0
+        for p in picks:
+            if isinstance(p, np.ndarray):
+                out = np.take(out, p, axis=axis)
+            if not isinstance(p, (int, np.integer)):
+                axis += 1
+        return out
+
+    def _positions(self, dim: str, sel):
+        """남는 차원의 위치 인덱스 배열 (단일 라벨로 고정된 차원이면 None)"""
+        p = self._selector(dim, sel)
+        if isinstance(p, (int, np.integer)):
+            return None
+        return np.arange(len(self.coords[dim]))[p]
+
+    def sel_coords(self, process=None, role=None, area=None, scenario=None) -> dict:
+        """sel 과 같은 선택에서 남는 차원의 좌표"""
+        out = {}
+        for d, s in zip(DIMS, (process, role, area, scenario)):
+            pos = self._positions(d, s)
+            if pos is not None:
+                out[d] = np.asarray(self.coords[d], dtype=object)[pos].tolist()
+        return out
+
+    def to_frame(self, variables=VARIABLES, process=None, role=None, area=None, scenario=None) -> pd.DataFrame:
+        """선택한 조각을 긴 형식 DataFrame 으로 (차원 열 + 변수 열 + 시나리오 속성 열)"""
+        selection = dict(process=process, role=role, area=area, scenario=scenario)
+        positions = {d: self._positions(d, s) for d, s in selection.items()}
+        kept = [d for d in DIMS if positions[d] is not None]
+        grids = dict(zip(kept, np.meshgrid(*[positions[d] for d in kept], indexing="ij")))
+        n_rows = math.prod(len(positions[d]) for d in kept)
+
+        def flat_positions(d):
+            if d in grids:
+                return grids[d].ravel()
+            return np.full(n_rows, self._selector(d, selection[d]))
+
+        frame = {
+            DIM_LABELS[d]: np.asarray(self.coords[d], dtype=object)[flat_positions(d)]
+            for d in DIMS
+        }
+        for var in variables:
+            frame[VARIABLE_LABELS[var]] = np.asarray(self.sel(var, **selection)).ravel()
+        scen_pos = flat_positions("scenario")
+        for k, v in self.scenario_attrs.items():
+            frame[k] = np.asarray(v)[scen_pos]
+        return pd.DataFrame(frame)
+
+
+def write_coefficients(cube: ResultsCube, coef: dict, area_pos=slice(None), scenario_pos=slice(None)):
+    """
+    plan_coefficients 결과를 큐브 블록에 기록
+    coef 배열 모양: (면적, 시나리오, 역할, 공정) — 면적마다 그 면적을 현재 면적으로 평가한 값
+    """
+    def to_cube(x):
+        return np.moveaxis(np.asarray(x, dtype=float), (0, 1, 2, 3), (2, 3, 1, 0))
+
+    fixed = to_cube(coef["fixed"])
+    variable = to_cube(coef["variable"])
+    cube.write(
+        {"cost": fixed + variable, "fixed": fixed, "variable": variable, "hours": to_cube(coef["time"])},
+        area=area_pos, scenario=scenario_pos,
+    )
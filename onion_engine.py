@@ -0,0 +1,336 @@
+"""
+농작업 경제성 계산 엔진 (Streamlit 비의존)
+
+Onion_4.py 의 비용 모델(고정비·유동비·트랙터 안분)을 NumPy 배열 연산으로 옮긴 모듈.
+UI 없이 배치 작업·검증 스크립트에서 그대로 import 해서 사용한다.
+
+배열 규약
+- 계획(plan) 입력은 (..., 역할, 공정) 형태. 앞쪽 차원(...)은 시나리오 등 자유롭게 추가 가능
+- 가격·노임·면적 등 스칼라 입력도 같은 규칙으로 브로드캐스트된다
+- 면적 곡선은 마지막 축에 면적 격자(N)가 붙은 (..., 역할, 공정, N)
+"""
+import numpy as np
+
+# --- [설정: 고정 상수 및 공식 파라미터] ---
+RATIO_SALVAGE = 0.05   # 폐기가치율 5%
+RATIO_REPAIR = 0.06    # 연 수리비율 6%
+RATIO_INTEREST = 0.025 # 연 이자율 2.5%
+
+TRACTOR_TYPE = "트랙터"  # 공통 자산(사이드바 가격)으로 안분되는 트랙터 종류
+TRACTOR_LIFE_YEARS = 8   # 트랙터 공통 내구연한
+
+ROLES = ("도입안", "비교안")
+AREA_UNIT_TO_HA = {"평": 1 / 3025, "ha": 1.0, "a": 1 / 100}  # 면적 단위 → ha 환산 계수
+ANNUAL_HOURS_DIRECT = "직접 입력"  # 연간 가동시간 '직접 입력' 모드 라벨
+AREA_GRID_TOL = 0.002      # 적응형 면적 격자: 구간 중점의 선형 보간 상대 오차 허용치 (0.2%)
+AREA_GRID_INITIAL = 5      # 적응형 면적 격자: 처음 균등 분할 점 수
+
+# 계획 배열 필드 (stack_plans 반환 키)
+PLAN_FIELDS = (
+    "eff_ha",              # 작업 능률 (ha/h)
+    "workers",             # 투입 인력 (명)
+    "fuel_lph",            # 연료소모량 (L/h)
+    "asset_annual_fixed",  # 작업기 연간 고정비 합계 (원/년)
+    "annual_hours",        # 연간 가동시간 (h) — 직접 입력 모드에서만 사용
+    "annual_hours_direct", # 연간 가동시간 직접 입력 여부
+    "uses_tractor",        # 공통 트랙터 사용 여부
+)
+
+
+def calc_annual_fixed(price, life_years):
+    """
+    연간 고정비 = 수리비 + 이자 + 감가상각비 (원/년)
+    가격 또는 내구연한이 0 이하이면 0. 배열 입력 시 원소별로 계산한다.
+    """
+    price = np.asarray(price, dtype=float)
+    life = np.asarray(life_years, dtype=float)
+    valid = (price > 0) & (life > 0)
+    safe_life = np.where(valid, life, 1.0)
+    salvage = price * RATIO_SALVAGE
+    annual = price * RATIO_REPAIR + price * RATIO_INTEREST + (price - salvage) / safe_life
+    return np.where(valid, annual, 0.0)
+
+
+def default_plan(level: dict, area_ha: float) -> dict:
+    """기계화 수준 DB 항목 → 기본값(능률·인력·DB 가격, '현재 면적만') 계획"""
+    eff = float(level["default_eff_ha"])
+    return {
+        "level": level,
+        "eff_ha": eff,
+        "workers": int(level["default_workers"]),
+        "annual_hours": (area_ha / eff) if eff > 0 else 1.0,
+        "annual_hours_mode": "현재 면적만",
+        "custom_assets": [],
+    }
+
+
+def plan_record(s: dict) -> dict:
+    """
+    render_plan_panel 반환값(s) 하나를 엔진 입력용 스칼라 레코드로 변환
+    - custom_assets 가 있으면 사용자 가격, 없으면 DB 기본 자산을 사용
+    """
+    level = s["level"]
+    assets = s.get("custom_assets") or level.get("assets", [])
+    asset_annual_fixed = sum(
+        float(calc_annual_fixed(float(a["price"]), float(a["life_years"]))) for a in assets
+    )
+    return {
+        "eff_ha": float(s["eff_ha"]),
+        "workers": float(s["workers"]),
+        "fuel_lph": float(level.get("tractor_fuel_lph", 0.0)),
+        "asset_annual_fixed": asset_annual_fixed,
+        "annual_hours": float(s["annual_hours"]),
+        "annual_hours_direct": s.get("annual_hours_mode") == ANNUAL_HOURS_DIRECT,
+        "uses_tractor": level.get("tractor_type") == TRACTOR_TYPE,
+    }
+
+
+def stack_records(records) -> dict:
+    """plan_record 2차원 목록 [역할][공정] → PLAN_FIELDS 별 (역할, 공정) 배열"""
+    return {
+        k: np.array([[rec[k] for rec in row] for row in records])
+        for k in PLAN_FIELDS
+    }
+
+
+def stack_plans(process_data: dict, processes, roles=ROLES) -> dict:
+    """process_data[공정][역할] → PLAN_FIELDS 별 (역할, 공정) 배열"""
+    return stack_records([[plan_record(process_data[p][r]) for p in processes] for r in roles])
+
+
+def level_table(catalog: dict, processes) -> dict:
+    """
+    카탈로그 기본값 기준 공정별 수준 테이블 — PLAN_FIELDS 별 (공정, 최대 수준 수) 배열
+    연간 가동시간은 '현재 면적만' 모드(면적 / 능률)이고,
+    수준 수가 모자란 칸은 능률 0(비용 0)으로 채운다.
+    """
+    n_levels = max(len(catalog[p]) for p in processes)
+    empty = {k: 0.0 for k in PLAN_FIELDS}
+    empty.update(annual_hours_direct=False, uses_tractor=False)
+    records = [
+        [plan_record(default_plan(lv, 1.0)) for lv in catalog[p]]
+        + [empty] * (n_levels - len(catalog[p]))
+        for p in processes
+    ]
+    return stack_records(records)
+
+
+def gather_plans(table: dict, level_idx) -> dict:
+    """level_idx (..., 공정) 수준 인덱스 → PLAN_FIELDS 별 (..., 공정) 배열"""
+    level_idx = np.asarray(level_idx)
+    proc_idx = np.arange(level_idx.shape[-1])
+    return {k: v[proc_idx, level_idx] for k, v in table.items()}
+
+
+def tractor_allocation(plans: dict, area_ha) -> dict:
+    """
+    역할별 트랙터 안분표 — 리런당 한 번 계산해 plan_coefficients 에 넘긴다
+    공정 가동시간 = 면적 / 능률 이므로 안분 비율은 면적과 무관하다.
+    반환
+    - hours: 공정별 트랙터 가동시간 (h, area_ha 기준) — (..., 역할, 공정)
+    - total_hours: 역할별 트랙터 총 가동시간 (h) — (..., 역할, 1)
+    - share: 안분 비율 (1/능률 비율) — (..., 역할, 공정), 역할별 합계 1 또는 0
+    """
+    eff = np.asarray(plans["eff_ha"], dtype=float)
+    tractor_on = np.asarray(plans["uses_tractor"], dtype=bool) & (eff > 0)
+    inv_eff = np.where(tractor_on, 1.0 / np.where(eff > 0, eff, 1.0), 0.0)
+    inv_eff_sum = inv_eff.sum(axis=-1, keepdims=True)
+    has_total = inv_eff_sum > 0
+    area_ha = np.asarray(area_ha, dtype=float)
+    return {
+        "hours": area_ha * inv_eff,
+        "total_hours": area_ha * inv_eff_sum,
+        "share": np.where(has_total, inv_eff / np.where(has_total, inv_eff_sum, 1.0), 0.0),
+    }
+
+
+def hourly_variable_cost(plans: dict, fuel_price, unit_hourly_wage):
+    """시간당 유동비 (원/h) = 연료소모 × 유류비 + 인력 × 시간당 노임 — (..., 역할, 공정)"""
+    return (
+        np.asarray(plans["fuel_lph"], dtype=float) * fuel_price
+        + np.asarray(plans["workers"], dtype=float) * unit_hourly_wage
+    )
+
+
+def asset_hourly_fixed(plans: dict, area_ha):
+    """
+    작업기 시간당 고정비 (원/h) = 연간 고정비 / 연간 가동시간
+    연간 가동시간: 직접 입력이면 입력값, 아니면 area_ha / 능률
+    """
+    eff = np.asarray(plans["eff_ha"], dtype=float)
+    area_ha = np.asarray(area_ha, dtype=float)
+    has_eff = eff > 0
+    annual_hours = np.where(
+        plans["annual_hours_direct"],
+        plans["annual_hours"],
+        np.where(has_eff, area_ha / np.where(has_eff, eff, 1.0), 1.0),
+    )
+    return np.where(
+        annual_hours > 0,
+        plans["asset_annual_fixed"] / np.where(annual_hours > 0, annual_hours, 1.0),
+        0.0,
+    )
+
+
+def tractor_hourly_fixed(allocation: dict, tractor_annual_fixed):
+    """트랙터 시간당 고정비 (원/h) = (연간 고정비 × 안분 비율) / 이 공정 가동시간"""
+    hours = allocation["hours"]
+    has_hours = hours > 0
+    return np.where(
+        has_hours,
+        tractor_annual_fixed * allocation["share"] / np.where(has_hours, hours, 1.0),
+        0.0,
+    )
+
+
+def combine_coefficients(plans: dict, hourly_variable, hourly_fixed) -> dict:
+    """시간당 유동비·고정비 → ha당 계수 (plan_coefficients 반환 형식)"""
+    eff = np.asarray(plans["eff_ha"], dtype=float)
+    has_eff = eff > 0
+    safe_eff = np.where(has_eff, eff, 1.0)
+    return {
+        "hourly_variable": hourly_variable,
+        "hourly_fixed": hourly_fixed,
+        "variable": np.where(has_eff, hourly_variable / safe_eff, 0.0),
+        "fixed": np.where(has_eff, hourly_fixed / safe_eff, 0.0),
+        "time": np.where(has_eff, 1.0 / safe_eff, 0.0),
+    }
+
+
+def plan_coefficients(plans: dict, area_ha, fuel_price, unit_hourly_wage, tractor_annual_fixed,
+                      allocation: dict = None) -> dict:
+    """
+    면적 독립 계수 계산 (엑셀 로직과 동일)
+    - 연간 가동시간: 직접 입력이면 입력값, 아니면 area_ha / 능률
+    - 트랙터 고정비: 같은 역할 안에서 트랙터 사용 공정의 가동시간 비율로 안분
+      (allocation 을 넘기면 재사용, 없으면 tractor_allocation 으로 계산)
+    반환 (모두 (..., 역할, 공정))
+    - hourly_variable / hourly_fixed: 시간당 유동비·고정비 (원/h)
+    - variable: 유동비 (원/ha) — 면적 무관
+    - fixed: 고정비 계수 (원/ha, area_ha 기준) — 면적 A 에서의 고정비(원/ha) = fixed / A
+    - time: ha당 소요시간 (h/ha)
+    """
+    if allocation is None:
+        allocation = tractor_allocation(plans, area_ha)
+    hourly_fixed = asset_hourly_fixed(plans, area_ha) + tractor_hourly_fixed(allocation, tractor_annual_fixed)
+    return combine_coefficients(plans, hourly_variable_cost(plans, fuel_price, unit_hourly_wage), hourly_fixed)
+
+
+def unit_cost_curve(coef: dict, areas) -> dict:
+    """
+    면적 격자별 단위면적당 비용 (원/ha)
+    - 총비용(원) = 고정비 계수 + 유동비(원/ha) × 면적
+    - 단위비용(원/ha) = 총비용 / 면적
+    반환: total / fixed / variable, 각각 (..., 역할, 공정, N)
+    """
+    areas = np.asarray(areas, dtype=float)
+    fixed = coef["fixed"][..., None] / areas
+    variable = np.broadcast_to(coef["variable"][..., None], fixed.shape)
+    return {"total": fixed + variable, "fixed": fixed, "variable": variable}
+
+
+def evaluate(process_data: dict, processes, area_ha, areas, fuel_price, unit_hourly_wage,
+             tractor_price, tractor_life_years=TRACTOR_LIFE_YEARS, roles=ROLES) -> dict:
+    """
+    process_data 하나를 한 번에 평가하는 편의 함수
+    반환: plans, allocation(tractor_allocation), coef(plan_coefficients), curve(unit_cost_curve)
+    """
+    plans = stack_plans(process_data, processes, roles)
+    allocation = tractor_allocation(plans, area_ha)
+    coef = plan_coefficients(
+        plans, area_ha, fuel_price, unit_hourly_wage,
+        float(calc_annual_fixed(tractor_price, tractor_life_years)),
+        allocation=allocation,
+    )
+    return {
+        "plans": plans,
+        "allocation": allocation,
+        "coef": coef,
+        "curve": unit_cost_curve(coef, areas),
+    }
+
+
+def break_even_area(coef: dict, intro: int = 0, base: int = 1) -> dict:
+    """
+    두 계획(역할 축의 intro / base)의 단위비용 곡선이 만나는 면적 (ha) — 닫힌 해
+    c(A) = fixed / A + variable 이므로
+      A* = (fixed_intro - fixed_base) / (variable_base - variable_intro)
+    공정별은 각 공정 계수로, 전 공정 합산은 계수 합으로 계산한다.
+    반환 (per_process: (..., 공정), total: (...))
+    - area: 교차 면적 (A > 0 에서 교차가 없으면 NaN)
+    - intro_wins_above: 교차 면적보다 클 때 도입안이 더 저렴한지 (유동비가 더 낮은 쪽)
+    - intro_always / base_always: 교차 없이 전 면적에서 한쪽이 항상 저렴
+    """
+    def solve(f_i, v_i, f_b, v_b):
+        d_fixed = f_i - f_b
+        d_var = v_b - v_i
+        with np.errstate(divide="ignore", invalid="ignore"):
+            area = np.where(d_var != 0, d_fixed / np.where(d_var != 0, d_var, 1.0), np.nan)
+        crosses = np.isfinite(area) & (area > 0)
+        # 교차가 없으면 부호가 일정하므로 A = 1 에서 비교해 판정
+        diff_at_1 = d_fixed - d_var
+        return {
+            "area": np.where(crosses, area, np.nan),
+            "intro_wins_above": v_i < v_b,
+            "intro_always": ~crosses & (diff_at_1 < 0),
+            "base_always": ~crosses & (diff_at_1 > 0),
+        }
+
+    fixed = coef["fixed"]
+    variable = coef["variable"]
+    f_i, f_b = np.take(fixed, intro, axis=-2), np.take(fixed, base, axis=-2)
+    v_i, v_b = np.take(variable, intro, axis=-2), np.take(variable, base, axis=-2)
+    return {
+        "per_process": solve(f_i, v_i, f_b, v_b),
+        "total": solve(f_i.sum(axis=-1), v_i.sum(axis=-1), f_b.sum(axis=-1), v_b.sum(axis=-1)),
+    }
+
+
+def adaptive_area_grid(coef: dict, area_min, area_max, max_points: int, tol: float = AREA_GRID_TOL,
+                       intro: int = 0, base: int = 1) -> np.ndarray:
+    """
+    단위비용 곡선용 적응형 면적 격자 (오름차순, 양 끝 포함)
+    - 도입안·비교안 교차 면적(break_even_area: 공정별 + 합산)은 범위 안이면 격자에 그대로 넣는다 → 교차점이 정확히 찍힌다
+    - 모든 (역할, 공정) 곡선과 역할별 합산 곡선에서, 구간 중점 값과 양 끝 직선 보간값의
+      상대 오차가 tol 을 넘는 구간만 반씩 나눈다 (곡률이 큰 작은 면적 쪽은 촘촘, 평평한 꼬리는 성김)
+    - 점 수가 max_points 에 닿으면 오차가 큰 구간부터 나눈다
+    coef 는 (역할, 공정) 계수 (plan_coefficients 형식)
+    """
+    lo, hi = float(area_min), float(area_max)
+    if not hi > lo:
+        return np.array([lo])
+    max_points = max(int(max_points), 2)
+
+    def values(areas):
+        curve = unit_cost_curve(coef, areas)["total"]  # (역할, 공정, N)
+        return np.concatenate([curve.reshape(-1, len(areas)), curve.sum(axis=-2).reshape(-1, len(areas))])
+
+    be = break_even_area(coef, intro=intro, base=base)
+    crossings = np.append(np.ravel(be["per_process"]["area"]), np.ravel(be["total"]["area"]))
+    crossings = crossings[np.isfinite(crossings) & (crossings > lo) & (crossings < hi)]
+    start = np.linspace(lo, hi, min(AREA_GRID_INITIAL, max_points))
+    areas = np.unique(np.concatenate([start, crossings[: max(max_points - len(start), 0)]]))
+    curve = values(areas)
+
+    while len(areas) < max_points:
+        mid = (areas[:-1] + areas[1:]) / 2
+        at_mid = values(mid)
+        chord = (curve[:, :-1] + curve[:, 1:]) / 2
+        err = np.max(np.abs(at_mid - chord) / np.maximum(np.abs(at_mid), 1e-12), axis=0)
+        split = np.flatnonzero(err > tol)
+        if split.size == 0:
+            break
+        budget = max_points - len(areas)
+        if split.size > budget:
+            split = np.sort(split[np.argsort(err[split])[::-1][:budget]])
+        areas = np.insert(areas, split + 1, mid[split])
+        curve = np.insert(curve, split + 1, at_mid[:, split], axis=1)
+    return areas
+
+
+def area_grid(coef: dict, area_min, area_max, steps: int, adaptive: bool = False,
+              intro: int = 0, base: int = 1) -> np.ndarray:
+    """면적 격자 — 균등(steps 개) 또는 적응형(최대 steps 개, adaptive_area_grid)"""
+    if adaptive:
+        return adaptive_area_grid(coef, area_min, area_max, steps, intro=intro, base=base)
+    return np.linspace(area_min, area_max, steps)
@@ -0,0 +1,205 @@
+"""
+브라우저 면적 탐색 그래프 (Streamlit 비의존 — HTML 문자열을 만들어 components.html 로 띄운다)
+
+단위비용 곡선은 계획별 계수 두 개로 정해진다 (onion_engine.unit_cost_curve).
+    c(A) = fixed / A + variable      (fixed: 고정비 계수, variable: 유동비 원/ha)
+면적 범위·구간 수를 바꿀 때마다 서버 리런으로 곡선을 다시 뽑는 대신,
+(역할, 공정) 계수와 손익분기 면적만 한 번 보내고 브라우저(plotly.js)에서 곡선을 다시 샘플링한다.
+- 최소·최대 면적·구간 수 입력, 공정 선택(전 공정 합산 / 공정별), 로그 면적축
+- 확대·이동(드래그, 휠)하면 보이는 면적 구간을 같은 구간 수로 다시 샘플링
+- 손익분기점(서버에서 계산한 닫힌 해)과 현재 설정 면적은 보이는 구간 안에 있을 때 표시
+plotly.js 는 설치된 plotly 버전에 맞는 CDN 스크립트를 쓴다 (fig.to_html(include_plotlyjs="cdn") 과 같은 주소).
+CDN 에 닿지 않는 배포(오프라인·방화벽)에서는 inline_plotlyjs=True 로 설치된 plotly 패키지의
+plotly.js 번들(약 4.6MB)을 HTML 에 넣는다 — cdn_reachable() 로 서버에서 미리 확인할 수 있다.
+"""
+import functools
+import json
+import math
+import urllib.request
+
+import numpy as np
+from plotly.colors import qualitative
+from plotly.offline import get_plotlyjs, get_plotlyjs_version
+
+EXPLORER_AREA_LIMITS = (0.1, 500.0)   # 입력 가능한 면적 범위 (ha)
+EXPLORER_MAX_STEPS = 2000
+PLOTLYJS_CDN = f"https://cdn.plot.ly/plotly-{get_plotlyjs_version()}.min.js"
+CDN_TIMEOUT_SEC = 2.0
+
+
+def _finite_or_none(x):
+    x = float(x)
+    return x if math.isfinite(x) else None
+
+
+def explorer_payload(coef: dict, break_even: dict, processes, roles, area_ha, area_min_ha, area_max_ha,
+                     area_steps: int, intro: int = 0, base: int = 1) -> dict:
+    """
+    브라우저로 보낼 값 (JSON 직렬화 가능)
+    coef: plan_coefficients 형식 ((역할, 공정) fixed / variable), break_even: break_even_area 결과
+    """
+    return {
+        "processes": list(processes),
+        "roles": list(roles),
+        "colors": qualitative.Plotly[:len(roles)],  # 서버 그래프(px 기본 색)와 같은 역할 색
+        "fixed": np.asarray(coef["fixed"], dtype=float).tolist(),
+        "variable": np.asarray(coef["variable"], dtype=float).tolist(),
+        "break_even": {
+            "total": _finite_or_none(break_even["total"]["area"]),
+            "per_process": [_finite_or_none(a) for a in np.asarray(break_even["per_process"]["area"])],
+        },
+        "intro": int(intro),
+        "base": int(base),
+        "area_ha": float(area_ha),
+        "area_min": float(area_min_ha),
+        "area_max": float(area_max_ha),
+        "steps": int(area_steps),
+        "limits": list(EXPLORER_AREA_LIMITS),
+        "max_steps": EXPLORER_MAX_STEPS,
+    }
+
+
+def cdn_reachable(timeout: float = CDN_TIMEOUT_SEC) -> bool:
+    """서버에서 plotly.js CDN 에 닿는지 (HEAD 요청 한 번) — 오프라인 배포 판별용"""
+    try:
+        with urllib.request.urlopen(urllib.request.Request(PLOTLYJS_CDN, method="HEAD"), timeout=timeout):
+            return True
+    except (OSError, ValueError):
+        return False
+
+
+@functools.lru_cache(maxsize=1)
+def _plotlyjs_bundle() -> str:
+    """설치된 plotly 패키지의 plotly.js (한 번만 읽음)"""
+    return get_plotlyjs().replace("</script", "<\\/script")
+
+
+def explorer_html(payload: dict, height: int = 520, inline_plotlyjs: bool = False) -> str:
+    """payload 를 넣은 독립 HTML (iframe 용) — inline_plotlyjs 면 CDN 대신 plotly.js 번들을 HTML 안에"""
+    data = json.dumps(payload, ensure_ascii=False).replace("</", "<\\/")
+    script = f"<script>{_plotlyjs_bundle()}</script>" if inline_plotlyjs else f'<script src="{PLOTLYJS_CDN}"></script>'
+    return (
+        _TEMPLATE
+        .replace("__HEIGHT__", str(int(height) - 70))
+        .replace("__PAYLOAD__", data)
+        .replace("__PLOTLYJS__", script)  # 번들 안의 문자열이 다른 자리표시와 겹치지 않도록 마지막에
+    )
+
+
+_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8">
+__PLOTLYJS__
+<style>
+  body { margin: 0; font-family: "Source Sans Pro", sans-serif; font-size: 14px; color: #31333f; }
+  .bar { display: flex; flex-wrap: wrap; gap: 12px; align-items: center; padding: 4px 0 8px; }
+  .bar label { display: flex; gap: 4px; align-items: center; }
+  .bar input[type=number] { width: 80px; }
+  #info { color: #808495; }
+</style></head>
+<body>
+<div class="bar">
+  <label>대상 <select id="series"></select></label>
+  <label>최소 (ha) <input id="lo" type="number" step="0.5"></label>
+  <label>최대 (ha) <input id="hi" type="number" step="0.5"></label>
+  <label>구간 수 <input id="steps" type="number" step="10"></label>
+  <label><input id="log" type="checkbox"> 로그 면적축</label>
+  <span id="info"></span>
+</div>
+<div id="chart" style="height:__HEIGHT__px"></div>
+<script>
+const P = __PAYLOAD__;
+const el = (id) => document.getElementById(id);
+const clamp = (x, a, b) => Math.min(Math.max(x, a), b);
+const fmt = (x, d) => x.toLocaleString("ko-KR", {maximumFractionDigits: d});
+
+const series = el("series");
+series.add(new Option("전 공정 합산", "-1"));
+P.processes.forEach((p, i) => series.add(new Option(p, String(i))));
+el("lo").value = P.area_min; el("hi").value = P.area_max; el("steps").value = P.steps;
+el("lo").min = el("hi").min = P.limits[0]; el("lo").max = el("hi").max = P.limits[1];
+el("steps").min = 2; el("steps").max = P.max_steps;
+
+// 선택한 대상의 역할별 (고정비 계수, 유동비) — 합산은 공정 계수 합
+function coefficients(sel) {
+  const sum = (a) => a.reduce((s, x) => s + x, 0);
+  return P.roles.map((_, r) => sel < 0
+    ? [sum(P.fixed[r]), sum(P.variable[r])]
+    : [P.fixed[r][sel], P.variable[r][sel]]);
+}
+
+function grid(lo, hi, n, log) {
+  const xs = new Array(n);
+  for (let i = 0; i < n; i++) {
+    const t = n > 1 ? i / (n - 1) : 0;
+    xs[i] = log ? Math.exp(Math.log(lo) + t * (Math.log(hi) - Math.log(lo))) : lo + t * (hi - lo);
+  }
+  return xs;
+}
+
+// 현재 보이는 면적 구간 [lo, hi] 을 구간 수만큼 샘플링해 다시 그림
+function draw(lo, hi) {
+  const sel = Number(series.value);
+  const log = el("log").checked;
+  const n = clamp(Math.round(Number(el("steps").value) || P.steps), 2, P.max_steps);
+  lo = Math.max(lo, P.limits[0] / 10); hi = Math.max(hi, lo * 1.0001);
+  const xs = grid(lo, hi, n, log);
+  const coef = coefficients(sel);
+  const traces = P.roles.map((role, r) => ({
+    x: xs, y: xs.map((a) => coef[r][0] / a + coef[r][1]),
+    name: role, mode: n <= 50 ? "lines+markers" : "lines", type: "scatter",
+    line: {color: P.colors[r]}, marker: {size: 6},
+  }));
+  const be = sel < 0 ? P.break_even.total : P.break_even.per_process[sel];
+  let beText = "손익분기 없음";
+  if (be !== null) {
+    beText = `손익분기 ${fmt(be, 2)}ha`;
+    if (be >= lo && be <= hi) {
+      const [f, v] = coef[P.intro];
+      traces.push({x: [be], y: [f / be + v], mode: "markers", type: "scatter", name: beText,
+                   marker: {size: 12, symbol: "star", color: "crimson"}});
+    }
+  }
+  const shapes = [], annotations = [];
+  if (P.area_ha >= lo && P.area_ha <= hi) {
+    shapes.push({type: "line", xref: "x", yref: "paper", x0: P.area_ha, x1: P.area_ha, y0: 0, y1: 1,
+                 line: {dash: "dash", color: "gray"}});
+    annotations.push({xref: "x", yref: "paper", x: P.area_ha, y: 1, showarrow: false, xanchor: "left",
+                      yanchor: "bottom", text: `현재 설정 면적 (${fmt(P.area_ha, 2)}ha)`});
+  }
+  const xrange = log ? [Math.log10(lo), Math.log10(hi)] : [lo, hi];
+  const layout = {
+    margin: {t: 30, r: 10, b: 50, l: 70}, hovermode: "x unified", legend: {title: {text: ""}},
+    xaxis: {title: {text: "작업 면적 (ha)"}, type: log ? "log" : "linear", range: xrange},
+    yaxis: {title: {text: "비용 (원/ha)"}, autorange: true},
+    shapes: shapes, annotations: annotations,
+  };
+  Plotly.react("chart", traces, layout, {responsive: true, displaylogo: false});
+  el("info").textContent = `표본 ${n}개 · ${fmt(lo, 2)}–${fmt(hi, 2)}ha · ${beText}`;
+}
+
+function drawFromInputs() {
+  let lo = clamp(Number(el("lo").value) || P.area_min, P.limits[0], P.limits[1]);
+  let hi = clamp(Number(el("hi").value) || P.area_max, P.limits[0], P.limits[1]);
+  if (hi <= lo) hi = Math.min(lo + 0.5, P.limits[1]);
+  draw(lo, hi);
+}
+
+if (typeof Plotly === "undefined") {
+  el("chart").textContent = "plotly.js 를 불러오지 못했습니다 (CDN 접속 필요). 'plotly.js 내장' 을 켜거나 서버 그래프를 사용하세요.";
+  throw new Error("plotly.js unavailable");
+}
+["series", "lo", "hi", "steps", "log"].forEach((id) => el(id).addEventListener("change", drawFromInputs));
+drawFromInputs();
+
+// 확대·이동: 보이는 면적 구간만 다시 샘플링 (더블클릭 자동 범위 → 입력 범위로 복귀)
+el("chart").on("plotly_relayout", (ev) => {
+  if (ev["xaxis.autorange"]) { drawFromInputs(); return; }
+  let r0 = ev["xaxis.range[0]"], r1 = ev["xaxis.range[1]"];
+  if (r0 === undefined && ev["xaxis.range"]) [r0, r1] = ev["xaxis.range"];
+  if (r0 === undefined) return;
+  if (el("log").checked) { r0 = Math.pow(10, r0); r1 = Math.pow(10, r1); }
+  draw(Number(r0), Number(r1));
+});
+</script>
+</body></html>
+"""
@@ -0,0 +1,158 @@
+"""
+plotly 그래프 캐시 (Streamlit 비의존, 내용 주소 기반 LRU)
+
+분석 결과 그래프는 입력이 그대로여도 리런마다 px.line 등으로 새로 만들어
+그래프 생성(수십 ms)과 Figure → dict 변환을 반복한다.
+그래프를 만드는 함수(builder)와 그 입력 — DataFrame 내용 해시 + 레이아웃 옵션 — 으로 키를 만들어
+같은 입력이면 만들어 둔 Figure 를 그대로 돌려준다.
+- 키: builder 이름·코드 + 데이터프레임(값·인덱스·열 이름·dtype) 해시 + canonical_key(옵션)
+- 캐시한 Figure 는 to_dict() 결과를 한 번만 만들어 재사용 (st.plotly_chart 의 변환 생략)
+- builder 별 적중/미적중 횟수·생성 시간 집계 (디버그 패널용)
+
+사용 예
+    fig = figures.get(build_total_cost_figure, df_line, area_ha=3.0, show_markers=True)
+    st.plotly_chart(fig)
+캐시한 Figure 는 세션 간 공유되므로 꺼낸 뒤 update_layout 등으로 고치지 않는다
+(고칠 값은 옵션으로 넘겨 builder 안에서 적용).
+"""
+import hashlib
+import threading
+import time
+
+import pandas as pd
+import plotly.graph_objects as go
+
+from onion_cache import LRUCache, canonical_key
+
+
+class FrozenFigure(go.Figure):
+    """
+    to_dict() 결과를 처음 한 번만 만들고 이후에는 같은 dict 를 돌려주는 Figure (읽기 전용으로 취급)
+    update_layout·update_traces·add_trace, 속성 대입(fig.layout.title.text = ...) 등으로 고치면
+    memo 를 버려 다음 to_dict() 가 바뀐 내용을 반영한다
+    """
+
+    def __init__(self, fig: go.Figure):
+        # _validate=False 로 옮겨 담으면 트레이스 속성 대입이 알림 없이 바로 써져 memo 를 버릴 수 없다
+        super().__init__(fig)
+
+    def _forget(self):
+        self.__dict__.pop("_frozen_dict", None)
+
+    # 트레이스·레이아웃 속성 대입과 update_*/plotly_*/add_* 는 모두 아래 메서드 중 하나를 거친다
+    def _restyle_child(self, *args, **kwargs):
+        self._forget()
+        return super()._restyle_child(*args, **kwargs)
+
+    def _relayout_child(self, *args, **kwargs):
+        self._forget()
+        return super()._relayout_child(*args, **kwargs)
+
+    def _perform_plotly_restyle(self, *args, **kwargs):
+        self._forget()
+        return super()._perform_plotly_restyle(*args, **kwargs)
+
+    def _perform_plotly_relayout(self, *args, **kwargs):
+        self._forget()
+        return super()._perform_plotly_relayout(*args, **kwargs)
+
+    def _perform_plotly_update(self, *args, **kwargs):
+        self._forget()
+        return super()._perform_plotly_update(*args, **kwargs)
+
+    def add_traces(self, *args, **kwargs):
+        self._forget()
+        return super().add_traces(*args, **kwargs)
+
+    def __setattr__(self, prop, value):
+        if prop in ("data", "layout", "frames"):
+            self._forget()
+        super().__setattr__(prop, value)
+
+    def __reduce__(self):
+        # BaseFigure.__reduce__ 는 to_dict() 결과에 격자 정보를 써 넣는다 — 공유 memo 대신 일반 Figure 로 넘긴다
+        return (self.__class__, (go.Figure(self),))
+
+    def to_dict(self):
+        cached = self.__dict__.get("_frozen_dict")
+        if cached is None:
+            cached = self._frozen_dict = super().to_dict()
+        return cached
+
+
+def freeze_figure(fig: go.Figure) -> FrozenFigure:
+    """만든 Figure → FrozenFigure (원본 Figure 는 그대로 둔다)"""
+    if not isinstance(fig, go.Figure):
+        raise TypeError(f"plotly Figure 가 아닙니다: {type(fig).__name__}")
+    return fig if isinstance(fig, FrozenFigure) else FrozenFigure(fig)
+
+
+def frame_key(df: pd.DataFrame) -> str:
+    """DataFrame 내용 해시 — 값·인덱스 + 열 이름·dtype (열 이름이 바뀌어도 다른 키)"""
+    h = hashlib.sha1(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    h.update(repr([(str(c), str(t)) for c, t in df.dtypes.items()]).encode("utf-8"))
+    return h.hexdigest()
+
+
+def builder_key(builder) -> str:
+    """builder 이름 + 바이트코드·상수 — 코드를 고치면(개발 중 핫 리로드) 예전 그래프를 쓰지 않도록"""
+    code = builder.__code__
+    h = hashlib.sha1(code.co_code)
+    h.update(repr(code.co_consts).encode("utf-8"))
+    return f"{builder.__qualname__}:{h.hexdigest()[:12]}"
+
+
+class FigureCache:
+    """builder + 입력 해시 → FrozenFigure 캐시 (스레드 안전, builder 별 적중 집계)"""
+
+    def __init__(self, maxsize: int = 256):
+        self._cache = LRUCache(maxsize)
+        self._lock = threading.Lock()
+        self._stats = {}  # builder 이름 → {"hits", "misses", "build_ms"}
+
+    def key(self, builder, frames, options: dict) -> str:
+        return canonical_key([builder_key(builder), [frame_key(df) for df in frames], options])
+
+    def get(self, builder, *frames: pd.DataFrame, **options) -> FrozenFigure:
+        """builder(*frames, **options) 결과 — 같은 입력이면 캐시한 Figure"""
+        built = []
+
+        def build():
+            start = time.perf_counter()
+            fig = freeze_figure(builder(*frames, **options))
+            built.append((time.perf_counter() - start) * 1000.0)
+            return fig
+
+        fig = self._cache.get_or_compute(self.key(builder, frames, options), build)
+        with self._lock:
+            s = self._stats.setdefault(builder.__name__, {"hits": 0, "misses": 0, "build_ms": 0.0})
+            if built:
+                s["misses"] += 1
+                s["build_ms"] += built[0]
+            else:
+                s["hits"] += 1
+        return fig
+
+    def clear(self):
+        self._cache.clear()
+        with self._lock:
+            self._stats.clear()
+
+    def stats(self) -> list:
+        """builder 별 적중·미적중·적중률·누적 생성 시간"""
+        with self._lock:
+            items = [(name, dict(s)) for name, s in self._stats.items()]
+        return [
+            {
+                "그래프": name,
+                "적중": s["hits"],
+                "미적중": s["misses"],
+                "적중률": s["hits"] / (s["hits"] + s["misses"]),
+                "생성 누적 (ms)": s["build_ms"],
+            }
+            for name, s in items
+        ]
+
+    def summary(self) -> dict:
+        """전체 캐시 항목 수·최대·적중·미적중 (LRUCache.stats 형식)"""
+        return self._cache.stats()
@@ -0,0 +1,171 @@
+"""
+의존성 그래프 기반 증분 재계산 (Streamlit 비의존)
+
+입력과 파생값을 노드로 두고 의존 관계를 명시한다.
+- set(): 입력 지문(fingerprint)이 바뀐 입력의 하위 노드만 dirty 로 표시
+- get(): 요청한 노드에 필요한 dirty 노드만 의존 순서대로 다시 계산
+- 노드마다 최근·누적 계산 시간을 기록해 리런 시간이 어디에 쓰이는지 보여준다
+
+비용 모델 그래프 (build_cost_graph)
+    process_data ─→ plans ─┬─→ allocation ─→ tractor_hourly_fixed ─┐
+                           ├─→ asset_hourly_fixed ──────────────────┼─→ coef ─┬─→ curve
+    fuel_price, unit_hourly_wage ─→ hourly_variable ────────────────┘         └─→ break_even
+    tractor_price ─→ tractor_annual_fixed ─→ tractor_hourly_fixed
+    area_ha ─→ allocation, asset_hourly_fixed         area_grid, coef ─→ areas ─→ curve
+면세유 가격이 바뀌면 hourly_variable → coef → curve/break_even 만,
+트랙터 가격이 바뀌면 tractor_annual_fixed → tractor_hourly_fixed → coef 이하만 다시 계산한다
+(트랙터 안분 비율 자체는 가격과 무관하므로 allocation 은 그대로 재사용).
+면적 격자(areas)는 area_grid 설정({area_min, area_max, steps, adaptive})과 coef 로 만든다
+— 적응형이면 곡률·교차 면적에 맞춰 점을 배치 (onion_engine.adaptive_area_grid).
+"""
+import time
+from collections import defaultdict
+
+from onion_cache import canonical_key, plan_key
+from onion_engine import (
+    ROLES, TRACTOR_LIFE_YEARS,
+    calc_annual_fixed, stack_plans, tractor_allocation,
+    hourly_variable_cost, asset_hourly_fixed, tractor_hourly_fixed, combine_coefficients,
+    unit_cost_curve, break_even_area, area_grid,
+)
+
+
+class DependencyGraph:
+    """입력·파생 노드 DAG (dirty 표시 + 지연 재계산 + 노드별 계산 시간)"""
+
+    def __init__(self):
+        self._inputs = {}                   # 입력 이름 → 지문 함수
+        self._nodes = {}                    # 파생 노드 이름 → (함수, 의존 이름 목록)
+        self._children = defaultdict(list)  # 이름 → 직접 하위 노드
+        self._values = {}
+        self._fingerprints = {}
+        self._dirty = set()
+        self.timings = {}                   # 노드 → {"last_ms", "runs", "total_ms"}
+        self.recomputed = []                # 마지막 set() 이후 다시 계산한 노드 (계산 순서)
+
+    # --- [구성] ---
+    def add_input(self, name: str, fingerprint=canonical_key):
+        """입력 노드 — fingerprint(value) 가 같으면 바뀌지 않은 것으로 본다"""
+        self._inputs[name] = fingerprint
+
+    def add_node(self, name: str, func, deps):
+        """파생 노드 — func(*의존 노드 값) (의존 노드는 먼저 등록돼 있어야 함)"""
+        unknown = [d for d in deps if d not in self._inputs and d not in self._nodes]
+        if unknown:
+            raise KeyError(f"'{name}' 노드의 의존 노드가 없습니다: {', '.join(unknown)}")
+        self._nodes[name] = (func, list(deps))
+        for d in deps:
+            self._children[d].append(name)
+        self._dirty.add(name)
+        self.timings[name] = {"last_ms": 0.0, "runs": 0, "total_ms": 0.0}
+
+    # --- [입력·무효화] ---
+    def set(self, **values) -> list:
+        """입력 값 갱신 → 실제로 바뀐 입력 이름 목록 (하위 노드는 dirty 로 표시)"""
+        self.recomputed = []
+        changed = []
+        for name, value in values.items():
+            if name not in self._inputs:
+                raise KeyError(f"'{name}' 은(는) 입력 노드가 아닙니다.")
+            fp = self._inputs[name](value)
+            self._values[name] = value
+            if self._fingerprints.get(name) != fp:
+                self._fingerprints[name] = fp
+                changed.append(name)
+                self.invalidate(name)
+        return changed
+
+    def invalidate(self, name: str):
+        """name 의 모든 하위 노드를 dirty 로 표시"""
+        stack = list(self._children[name])
+        while stack:
+            node = stack.pop()
+            if node not in self._dirty:
+                self._dirty.add(node)
+                stack.extend(self._children[node])
+
+    def is_dirty(self, name: str) -> bool:
+        return name in self._dirty
+
+    # --- [계산] ---
+    def get(self, name: str):
+        """노드 값 — dirty 면 의존 노드부터 필요한 것만 다시 계산"""
+        if name in self._inputs:
+            if name not in self._values:
+                raise KeyError(f"입력 '{name}' 이(가) 아직 설정되지 않았습니다.")
+            return self._values[name]
+        if name not in self._dirty:
+            return self._values[name]
+
+        func, deps = self._nodes[name]
+        args = [self.get(d) for d in deps]
+        start = time.perf_counter()
+        self._values[name] = func(*args)
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+
+        t = self.timings[name]
+        t["last_ms"] = elapsed_ms
+        t["runs"] += 1
+        t["total_ms"] += elapsed_ms
+        self._dirty.discard(name)
+        self.recomputed.append(name)
+        return self._values[name]
+
+    def stats(self) -> list:
+        """노드별 계산 시간 (등록 순서) — 최근 재계산 여부, 최근·누적 시간, 계산 횟수"""
+        return [
+            {
+                "노드": name,
+                "의존": ", ".join(deps),
+                "이번 재계산": name in self.recomputed,
+                "최근 (ms)": self.timings[name]["last_ms"],
+                "계산 횟수": self.timings[name]["runs"],
+                "누적 (ms)": self.timings[name]["total_ms"],
+            }
+            for name, (_, deps) in self._nodes.items()
+        ]
+
+
+def build_cost_graph(processes, roles=ROLES, plan_cache=None, intro: int = 0, base: int = 1) -> DependencyGraph:
+    """
+    onion_engine 비용 모델 그래프
+    입력: process_data, area_ha, fuel_price, unit_hourly_wage, tractor_price,
+          area_grid ({area_min, area_max, steps, adaptive} — onion_engine.area_grid 인자)
+    노드: plans, tractor_annual_fixed, allocation, hourly_variable, asset_hourly_fixed,
+          tractor_hourly_fixed, coef (plan_coefficients 형식), areas, curve, break_even
+    plan_cache(onion_cache.PlanCache) 를 넘기면 계획 레코드를 계획 단위 캐시에서 꺼낸다.
+    """
+    processes = list(processes)
+    roles = tuple(roles)
+    g = DependencyGraph()
+
+    # process_data 는 계획별 캐시 키로 비교 (레벨 DB 항목 전체를 매번 직렬화하지 않도록)
+    g.add_input("process_data", lambda pd_: canonical_key([[plan_key(pd_[p][r]) for p in processes] for r in roles]))
+    g.add_input("area_ha")
+    g.add_input("fuel_price")
+    g.add_input("unit_hourly_wage")
+    g.add_input("tractor_price")
+    g.add_input("area_grid")
+
+    if plan_cache is not None:
+        g.add_node("plans", lambda pd_: plan_cache.stack(pd_, processes, roles), ["process_data"])
+    else:
+        g.add_node("plans", lambda pd_: stack_plans(pd_, processes, roles), ["process_data"])
+    g.add_node(
+        "tractor_annual_fixed",
+        lambda price: float(calc_annual_fixed(price, TRACTOR_LIFE_YEARS)),
+        ["tractor_price"],
+    )
+    g.add_node("allocation", tractor_allocation, ["plans", "area_ha"])
+    g.add_node("hourly_variable", hourly_variable_cost, ["plans", "fuel_price", "unit_hourly_wage"])
+    g.add_node("asset_hourly_fixed", asset_hourly_fixed, ["plans", "area_ha"])
+    g.add_node("tractor_hourly_fixed", tractor_hourly_fixed, ["allocation", "tractor_annual_fixed"])
+    g.add_node(
+        "coef",
+        lambda plans, hv, asset, tractor: combine_coefficients(plans, hv, asset + tractor),
+        ["plans", "hourly_variable", "asset_hourly_fixed", "tractor_hourly_fixed"],
+    )
+    g.add_node("areas", lambda spec, coef: area_grid(coef, intro=intro, base=base, **spec), ["area_grid", "coef"])
+    g.add_node("curve", unit_cost_curve, ["coef", "areas"])
+    g.add_node("break_even", lambda coef: break_even_area(coef, intro=intro, base=base), ["coef"])
+    return g
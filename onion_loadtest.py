@@ -0,0 +1,488 @@
+"""
+동시 세션 부하 시험 (헤드리스 Streamlit 서버 + 웹소켓 가상 사용자)
+
+앱 스크립트 하나를 `streamlit run` 헤드리스 서버로 띄우고, 가상 사용자 여러 명이
+브라우저와 같은 웹소켓 프로토콜(BackMsg rerun_script / ForwardMsg)로 접속해 실제 조작 순서를 보낸다.
+서버 한 대가 동시 사용자 몇 명을 감당하는지 — 처리량·지연 백분위수·메모리 증가 — 를 잰다.
+외부 서비스 없이 로컬에서만 돈다 (서버 프로세스는 시험마다 새로 띄움).
+- 조작 한 번 = 사용자 동작 하나 — 위젯 값 변경을 차례로 보내고 각 리런이 끝날 때까지 기다린 시간의 합
+  (리런은 on_change 콜백의 fragment 리런까지 포함). 처리량·지연은 조작 단위, 리런 수는 따로 센다.
+  fragment 안 위젯은 브라우저처럼 그 fragment 만 다시 실행하도록 보낸다
+- 조작 종류 (위젯은 라벨로 찾으므로 앱 버전이 달라도 같은 시나리오를 쓴다 — 없는 조작은 건너뜀)
+    수준 전환: "<역할> 기계화 수준" selectbox 를 다른 수준으로
+    능률 편집: "작업 능률 (ha/h)" 를 ±20% 안에서 바꿈
+    면적 범위 이동: "최소 면적 (ha)" → "최대 면적 (ha)" 차례로 (리런 두 번), 가끔 "면적 구간 수" 도
+- 가상 사용자마다 시드(seed + 번호)가 정해져 있어 같은 시드면 버전이 달라도 같은 조작 순서
+- 메모리: 서버 프로세스 상주 메모리(RSS, 리눅스 /proc) 를 주기적으로 재서 시작·최대·종료·세션당 증가
+  (시작 = 워밍업 접속 한 번이 끝난 뒤 — 모듈 import 등 한 번만 드는 메모리는 세션당 증가에서 뺌)
+- 앱이 onion_metrics 를 쓰면 서버 쪽 리런 p95·캐시 적중률도 함께 가져온다 (ONION_METRICS_PORT 자동 지정)
+시험 클라이언트도 같은 기계에서 돌므로 CPU 를 조금 나눠 쓴다 (메시지 파싱 정도).
+
+사용 예
+    python onion_loadtest.py Onion_4.py --sessions 20 --actions 30
+    python onion_loadtest.py Onion_3_5.py Onion_4.py --sessions 10        # 버전 비교 (같은 시드 → 같은 조작 순서)
+    python onion_loadtest.py Onion_4.py -o lt_new.json --baseline lt_old.json   # 저장해 둔 이전 결과와 비교
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import numpy as np
+import pandas as pd
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+from onion_metrics import METRICS_PORT_ENV
+
+LOADTEST_SESSIONS = 10
+LOADTEST_ACTIONS = 20        # 가상 사용자 한 명의 조작 수 (첫 접속 제외)
+THINK_SEC = 1.0              # 조작 사이 평균 대기 (지수분포, 0 이면 쉬지 않고 연속)
+RAMP_SEC = 5.0               # 가상 사용자 접속을 이 시간에 고르게 나눠 시작
+ACTION_TIMEOUT_SEC = 120.0
+SERVER_START_TIMEOUT_SEC = 60.0
+MEMORY_SAMPLE_SEC = 0.5
+LATENCY_QUANTILES = (50, 90, 95, 99)
+
+FIRST_LOAD = "첫 접속"
+LEVEL_LABEL = "기계화 수준"
+EFF_LABEL = "작업 능률 (ha/h)"
+AREA_MIN_LABEL = "최소 면적 (ha)"
+AREA_MAX_LABEL = "최대 면적 (ha)"
+AREA_STEPS_LABEL = "면적 구간 수"
+INPUT_KINDS = ("selectbox", "number_input", "slider", "radio", "checkbox")
+
+_EARLY_FOR_RERUN = ForwardMsg.ScriptFinishedStatus.Value("FINISHED_EARLY_FOR_RERUN")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+# --- [서버] ---
+class AppServer:
+    """헤드리스 `streamlit run` 서버 프로세스 (with 블록 동안 실행)"""
+
+    def __init__(self, script: str, port: int = None, metrics_port: int = None, log_path: str = None):
+        self.script = os.path.abspath(script)
+        self.port = port or free_port()
+        self.metrics_port = metrics_port
+        self.log_path = log_path
+        self.proc = None
+
+    @property
+    def url(self) -> str:
+        return f"ws://127.0.0.1:{self.port}/_stcore/stream"
+
+    def start(self, timeout: float = SERVER_START_TIMEOUT_SEC):
+        env = dict(os.environ)
+        if self.metrics_port:
+            env[METRICS_PORT_ENV] = str(self.metrics_port)
+        cmd = [
+            sys.executable, "-m", "streamlit", "run", self.script,
+            "--server.headless", "true", "--server.port", str(self.port),
+            "--server.fileWatcherType", "none", "--browser.gatherUsageStats", "false",
+        ]
+        log = open(self.log_path or os.devnull, "w", encoding="utf-8")
+        # 앱이 같은 폴더의 onion_* 모듈·카탈로그를 상대 경로로 쓰므로 스크립트 폴더에서 실행
+        self.proc = subprocess.Popen(cmd, cwd=os.path.dirname(self.script), env=env, stdout=log, stderr=log)
+        log.close()
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.proc.poll() is not None:
+                raise RuntimeError(f"서버가 시작하지 못했습니다 ({self.script}, 종료 코드 {self.proc.returncode})")
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{self.port}/_stcore/health", timeout=1).close()
+                return self
+            except OSError:
+                time.sleep(0.2)
+        self.stop()
+        raise RuntimeError(f"서버가 {timeout:g}초 안에 응답하지 않습니다 ({self.script})")
+
+    def stop(self):
+        if self.proc is not None and self.proc.poll() is None:
+            self.proc.terminate()
+            try:
+                self.proc.wait(10)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+                self.proc.wait()
+
+    def rss_bytes(self):
+        """서버 프로세스 현재 상주 메모리 (리눅스 외에는 None)"""
+        try:
+            with open(f"/proc/{self.proc.pid}/status", encoding="ascii") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            return None
+        return None
+
+    def scrape_metrics(self) -> dict:
+        """onion_metrics 엔드포인트의 서버 쪽 리런 p50·p95, 캐시 적중률 (노출하지 않는 앱이면 빈 dict)"""
+        if not self.metrics_port:
+            return {}
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{self.metrics_port}/metrics", timeout=5) as r:
+                text = r.read().decode("utf-8")
+        except OSError:
+            return {}
+        out = {}
+        for name, labels, value in re.findall(r"^(\w+)\{([^}]*)\} (\S+)$", text, flags=re.M):
+            labels = dict(re.findall(r'(\w+)="([^"]*)"', labels))
+            if name == "onion_rerun_duration_recent_milliseconds" and labels.get("run") == "전체":
+                out[f"서버 리런 p{float(labels['quantile']) * 100:g} (ms)"] = float(value)
+            elif name == "onion_cache_hit_ratio":
+                out[f"캐시 적중률: {labels['cache']}"] = float(value)
+        return out
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+# --- [가상 사용자] ---
+def _widget_state(state, kind: str, value):
+    if kind in ("selectbox", "radio"):
+        state.string_value = value
+    elif kind == "number_input":
+        state.double_value = float(value)
+    elif kind == "slider":
+        state.double_array_value.data[:] = [float(v) for v in value]
+    elif kind == "checkbox":
+        state.bool_value = bool(value)
+    else:
+        raise ValueError(f"지원하지 않는 위젯: {kind}")
+
+
+class SimSession:
+    """가상 사용자 하나 — 웹소켓으로 리런을 보내고 화면의 위젯 목록·보낸 값을 브라우저처럼 유지"""
+
+    def __init__(self, url: str, timeout: float = ACTION_TIMEOUT_SEC):
+        self.url = url
+        self.timeout = timeout
+        self.widgets = {}   # 위젯 id → {"kind", "label", "fragment", "proto"}
+        self.values = {}    # 위젯 id → 보낸 값 (리런마다 전부 다시 보냄)
+        self.exceptions = 0  # 화면에 그려진 예외 수
+        self._ws = None
+
+    async def open(self) -> float:
+        self._ws = await websockets.connect(
+            self.url, subprotocols=["streamlit"], max_size=None, open_timeout=self.timeout
+        )
+        return await self.rerun()
+
+    async def close(self):
+        if self._ws is not None:
+            await self._ws.close()
+
+    # --- 화면 상태 ---
+    def find(self, kind: str, match) -> list:
+        """라벨이 match(label) 인 위젯 id 목록 (화면에 있는 것만)"""
+        return [wid for wid, w in self.widgets.items() if w["kind"] == kind and match(w["label"])]
+
+    def value(self, wid: str):
+        """위젯 현재 값 — 보낸 값이 있으면 그 값, 아니면 서버가 그린 값"""
+        if wid in self.values:
+            return self.values[wid]
+        w = self.widgets[wid]
+        proto = w["proto"]
+        if w["kind"] in ("selectbox", "radio"):
+            return proto.raw_value if proto.set_value else proto.options[proto.default]
+        if w["kind"] == "slider":
+            return list(proto.value if proto.set_value else proto.default)
+        return proto.value if proto.set_value else proto.default
+
+    def _update_widgets(self, seen: dict, fragments: set, full_run: bool):
+        """이번 리런에 다시 그린 범위(전체 또는 fragment)에서 사라진 위젯은 버림 (보낸 값도)"""
+        if full_run:
+            self.widgets = seen
+        else:
+            self.widgets = {wid: w for wid, w in self.widgets.items() if w["fragment"] not in fragments}
+            self.widgets.update(seen)
+        self.values = {wid: v for wid, v in self.values.items() if wid in self.widgets}
+
+    # --- 리런 ---
+    async def rerun(self, changes: dict = None) -> float:
+        """위젯 값 변경 {id: 값} 을 보내고 마지막 리런이 끝날 때까지 걸린 시간 (ms)"""
+        changes = changes or {}
+        self.values.update(changes)
+        msg = BackMsg()
+        client_state = msg.rerun_script
+        client_state.SetInParent()  # 바꾼 값이 없어도 rerun_script 메시지로
+        for wid, value in self.values.items():
+            state = client_state.widget_states.widgets.add()
+            state.id = wid
+            _widget_state(state, self.widgets[wid]["kind"], value)
+        fragment_ids = {self.widgets[wid]["fragment"] for wid in changes}
+        if len(fragment_ids) == 1 and "" not in fragment_ids:
+            client_state.fragment_id = fragment_ids.pop()  # fragment 안 위젯 → 그 fragment 만
+        start = time.perf_counter()
+        await self._ws.send(msg.SerializeToString())
+        await asyncio.wait_for(self._until_finished(), self.timeout)
+        return (time.perf_counter() - start) * 1000.0
+
+    async def _until_finished(self):
+        seen, fragments = {}, set()
+        while True:
+            msg = ForwardMsg()
+            msg.ParseFromString(await self._ws.recv())
+            kind = msg.WhichOneof("type")
+            if kind == "delta":
+                delta = msg.delta
+                fragments.add(delta.fragment_id)
+                if delta.WhichOneof("type") != "new_element":
+                    continue
+                element = delta.new_element
+                el_kind = element.WhichOneof("type")
+                if el_kind == "exception":
+                    self.exceptions += 1
+                elif el_kind in INPUT_KINDS:
+                    proto = getattr(element, el_kind)
+                    seen[proto.id] = {"kind": el_kind, "label": proto.label, "fragment": delta.fragment_id, "proto": proto}
+            elif kind == "script_finished":
+                if msg.script_finished == _EARLY_FOR_RERUN:
+                    continue  # on_change 콜백의 st.rerun — 이어지는 리런까지 기다림
+                self._update_widgets(seen, fragments, full_run="" in fragments)
+                return
+
+
+# --- [시나리오] ---
+def switch_level(session: SimSession, rng: random.Random):
+    """기계화 수준 selectbox 하나를 다른 수준으로"""
+    candidates = [wid for wid in session.find("selectbox", lambda label: label.endswith(LEVEL_LABEL))
+                  if len(session.widgets[wid]["proto"].options) > 1]
+    if not candidates:
+        return None
+    wid = rng.choice(candidates)
+    current = session.value(wid)
+    return [{wid: rng.choice([o for o in session.widgets[wid]["proto"].options if o != current])}]
+
+
+def edit_efficiency(session: SimSession, rng: random.Random):
+    """작업 능률 하나를 ±20% 안에서"""
+    candidates = session.find("number_input", lambda label: label == EFF_LABEL)
+    if not candidates:
+        return None
+    wid = rng.choice(candidates)
+    proto = session.widgets[wid]["proto"]
+    value = round(float(session.value(wid)) * rng.uniform(0.8, 1.2), 4)
+    return [{wid: max(value, proto.min) if proto.has_min else value}]
+
+
+def move_area_range(session: SimSession, rng: random.Random):
+    """최소 → 최대 면적 차례로 (리런 두 번), 세 번에 한 번은 구간 수도"""
+    lo_ids = session.find("number_input", lambda label: label == AREA_MIN_LABEL)
+    hi_ids = session.find("number_input", lambda label: label == AREA_MAX_LABEL)
+    if not lo_ids or not hi_ids:
+        return None
+    lo = round(rng.uniform(0.5, 20.0), 1)
+    steps = [{lo_ids[0]: lo}, {hi_ids[0]: round(lo + rng.uniform(2.0, 50.0), 1)}]
+    steps_ids = session.find("slider", lambda label: label == AREA_STEPS_LABEL)
+    if steps_ids and rng.random() < 1 / 3:
+        steps.append({steps_ids[0]: [float(rng.choice([10, 50, 200, 1000]))]})
+    return steps
+
+
+SCENARIO = {
+    "수준 전환": switch_level,
+    "능률 편집": edit_efficiency,
+    "면적 범위 이동": move_area_range,
+}
+
+
+async def _user(url, index, seed, actions, think_sec, delay, timeout, mix, record):
+    """가상 사용자 하나: 첫 접속 후 actions 번 조작 (조작이 없는 화면이면 나머지 건너뜀)"""
+    rng = random.Random(seed + index)
+    await asyncio.sleep(delay)
+    session = SimSession(url, timeout)
+    try:
+        record(FIRST_LOAD, await session.open(), 1)
+        names, weights = list(mix), list(mix.values())
+        for _ in range(actions):
+            if think_sec > 0:
+                await asyncio.sleep(rng.expovariate(1.0 / think_sec))
+            order = rng.choices(names, weights)[:1] + rng.sample(names, len(names))  # 고른 조작이 안 되면 다른 조작
+            for name in order:
+                steps = SCENARIO[name](session, rng)
+                if steps:
+                    break
+            else:
+                record("적용 가능한 조작 없음", None)
+                break
+            total_ms = 0.0
+            for changes in steps:
+                total_ms += await session.rerun(changes)
+            record(name, total_ms, len(steps))
+    except (asyncio.TimeoutError, websockets.ConnectionClosed, OSError) as e:
+        record("오류: " + type(e).__name__, None)
+    finally:
+        record("화면 예외", session.exceptions)
+        await session.close()
+
+
+async def _warm_up(url, timeout):
+    """시험 전 접속 한 번 — 앱 모듈 import·서버 공유 캐시 생성은 시작 메모리(기준선)에 넣고 지연 통계에서는 뺀다"""
+    session = SimSession(url, timeout)
+    try:
+        await session.open()
+    finally:
+        await session.close()
+
+
+# --- [실행] ---
+def run_loadtest(script: str, sessions: int = LOADTEST_SESSIONS, actions: int = LOADTEST_ACTIONS,
+                 think_sec: float = THINK_SEC, ramp_sec: float = RAMP_SEC, seed: int = 0,
+                 timeout: float = ACTION_TIMEOUT_SEC, mix: dict = None, log_path: str = None) -> dict:
+    """앱 스크립트 하나에 대한 부하 시험 — 결과 dict (JSON 저장 가능)"""
+    mix = mix or {name: 1.0 for name in SCENARIO}
+    samples, notes = [], {}   # samples: (조작, 지연 ms, 리런 수)
+
+    def record(name, value, reruns=0):
+        if name in SCENARIO or name == FIRST_LOAD:
+            samples.append((name, value, reruns))
+        else:
+            notes[name] = notes.get(name, 0) + (value if name == "화면 예외" else 1)
+
+    with AppServer(script, metrics_port=free_port(), log_path=log_path) as server:
+        asyncio.run(_warm_up(server.url, timeout))
+        rss = [server.rss_bytes()]
+
+        async def sample_memory(stop):
+            while not stop.is_set():
+                rss.append(server.rss_bytes())
+                try:
+                    await asyncio.wait_for(stop.wait(), MEMORY_SAMPLE_SEC)
+                except asyncio.TimeoutError:
+                    pass
+
+        async def main():
+            stop = asyncio.Event()
+            sampler = asyncio.create_task(sample_memory(stop))
+            await asyncio.gather(*[
+                _user(server.url, i, seed, actions, think_sec, ramp_sec * i / max(sessions, 1), timeout, mix, record)
+                for i in range(sessions)
+            ])
+            rss.append(server.rss_bytes())
+            stop.set()
+            await sampler
+
+        start = time.perf_counter()
+        asyncio.run(main())
+        wall_sec = time.perf_counter() - start
+        server_metrics = server.scrape_metrics()
+
+    latency = {}
+    for name in [FIRST_LOAD, *SCENARIO, "전체"]:
+        picked = [(v, k) for n, v, k in samples if name in ("전체", n)]
+        if picked:
+            ms = np.array([v for v, _ in picked], dtype=float)
+            latency[name] = {"횟수": len(ms), "리런": sum(k for _, k in picked),
+                             "평균": float(ms.mean()), "최대": float(ms.max()),
+                             **{f"p{q}": float(np.percentile(ms, q)) for q in LATENCY_QUANTILES}}
+    reruns = sum(k for _, _, k in samples)
+    rss = [r for r in rss if r is not None]
+    mb = lambda b: b / 2 ** 20
+    memory = {}
+    if rss:
+        memory = {"시작": mb(rss[0]), "최대": mb(max(rss)), "종료": mb(rss[-1]),
+                  "세션당 증가": mb(rss[-1] - rss[0]) / max(sessions, 1)}
+    return {
+        "app": os.path.basename(script),
+        "sessions": sessions, "actions": actions, "think_sec": think_sec, "ramp_sec": ramp_sec, "seed": seed,
+        "wall_sec": wall_sec,
+        "reruns": reruns,
+        "throughput": len(samples) / wall_sec if wall_sec else 0.0,  # 끝난 조작(첫 접속 포함) 수 / 시험 시간
+        "rerun_throughput": reruns / wall_sec if wall_sec else 0.0,
+        "latency_ms": latency,
+        "memory_mb": memory,
+        "notes": notes,
+        "server": server_metrics,
+    }
+
+
+def summary_table(results: list) -> pd.DataFrame:
+    """결과 여러 개(앱 버전별) → 한 행씩 비교표"""
+    rows = []
+    for r in results:
+        total = r["latency_ms"].get("전체", {})
+        rows.append({
+            "앱": r["app"],
+            "세션": r["sessions"],
+            "조작 수": total.get("횟수", 0),
+            "리런 수": r.get("reruns", float("nan")),  # 이전 형식 결과에는 없음
+            "처리량 (조작/초)": r["throughput"],
+            "리런 처리량 (회/초)": r.get("rerun_throughput", float("nan")),
+            **{f"p{q} (ms)": total.get(f"p{q}", float("nan")) for q in LATENCY_QUANTILES},
+            "최대 (ms)": total.get("최대", float("nan")),
+            "오류": sum(n for k, n in r["notes"].items() if k.startswith("오류")),
+            "화면 예외": r["notes"].get("화면 예외", 0),
+            **{f"RSS {k} (MB)": v for k, v in r["memory_mb"].items()},
+            **r.get("server", {}),
+        })
+    return pd.DataFrame(rows).set_index("앱")
+
+
+def action_table(result: dict) -> pd.DataFrame:
+    """조작 종류별 횟수·리런 수·지연 (ms, 조작 하나의 리런 합계)"""
+    return pd.DataFrame(result["latency_ms"]).T
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Streamlit 앱 동시 세션 부하 시험 (여러 스크립트를 주면 버전 비교)")
+    parser.add_argument("scripts", nargs="+", help="앱 스크립트 (예: Onion_4.py) — 차례로 새 서버에서 시험")
+    parser.add_argument("--sessions", type=int, default=LOADTEST_SESSIONS, help="동시 가상 사용자 수")
+    parser.add_argument("--actions", type=int, default=LOADTEST_ACTIONS, help="사용자 한 명의 조작 수 (첫 접속 제외)")
+    parser.add_argument("--think", type=float, default=THINK_SEC, help="조작 사이 평균 대기 (초, 0 이면 연속)")
+    parser.add_argument("--ramp", type=float, default=RAMP_SEC, help="사용자 접속을 나눠 시작하는 시간 (초)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=ACTION_TIMEOUT_SEC, help="조작 하나의 제한 시간 (초)")
+    parser.add_argument("--mix", help='조작 비율 (예: "수준 전환=2,능률 편집=2,면적 범위 이동=1")')
+    parser.add_argument("-o", "--output", help="결과 JSON 저장 경로")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON (-o 로 저장한 파일)")
+    parser.add_argument("--server-log", help="서버 로그 파일 (기본: 버림)")
+    args = parser.parse_args(argv)
+
+    mix = None
+    if args.mix:
+        mix = {k.strip(): float(v) for k, v in (item.split("=") for item in args.mix.split(","))}
+        unknown = set(mix) - set(SCENARIO)
+        if unknown:
+            parser.error(f"알 수 없는 조작: {', '.join(sorted(unknown))} (가능: {', '.join(SCENARIO)})")
+
+    results = []
+    for script in args.scripts:
+        print(f"{script}: 가상 사용자 {args.sessions}명 × 조작 {args.actions}회 …", flush=True)
+        result = run_loadtest(script, args.sessions, args.actions, args.think, args.ramp, args.seed,
+                              args.timeout, mix, args.server_log)
+        print(action_table(result).round(1).to_string(), "\n")
+        results.append(result)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=1)
+
+    table = summary_table(results)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = summary_table(json.load(f))
+        baseline.index = [f"{app} (기준)" for app in baseline.index]
+        table = pd.concat([baseline, table])
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        print(table.round(2).T.to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""
+로컬 메트릭 노출 (Streamlit 비의존)
+
+Onion_4.py · P_v5.py 서버 프로세스의 리런 지연·활성 세션·캐시 적중률·세션 메모리를
+Prometheus 텍스트 형식 스크레이프 엔드포인트 또는 회전 JSON Lines 파일로 내보낸다.
+값은 이미 모으고 있는 객체에서 읽기만 한다 (노출 때문에 리런 경로에 일이 늘지 않음).
+- onion_profile.ProfileRegistry: 리런·구간별 히스토그램, 최근 리런한 세션 수
+- onion_session.SessionRegistry: 세션별 메모리 보고
+- LRUCache.stats() 형식 dict 를 돌려주는 함수: 캐시 항목 수·적중·미적중
+
+환경변수로 켠다 (앱마다 다른 포트를 쓸 것 — 같은 프로세스에서 다시 만들면 엔드포인트를 이어받는다)
+- ONION_METRICS_PORT: 127.0.0.1:<포트>/metrics 에서 노출 (ONION_METRICS_HOST 로 주소 변경)
+- ONION_METRICS_FILE: ONION_METRICS_INTERVAL 초(기본 15)마다 스냅숏 한 줄씩 기록, 10MB 넘으면 회전(5개 보관)
+
+메트릭 (모두 app 라벨)
+    onion_rerun_duration_milliseconds{run}          히스토그램 — 리런 전체 (fragment 단독 리런은 fragment 이름)
+    onion_section_duration_milliseconds{section}    히스토그램 — 구간별 (리런당 합계)
+    onion_rerun_duration_recent_milliseconds{run, quantile}   최근 리런 창의 p50·p95
+    onion_active_sessions                           최근 ACTIVE_SESSION_SEC 초 안에 리런한 세션 수
+    onion_session_memory_kilobytes / onion_session_memory_max_kilobytes   보고된 세션 메모리 합계·최대
+    onion_cache_entries / onion_cache_hits_total / onion_cache_misses_total / onion_cache_hit_ratio {cache}
+    onion_process_max_rss_bytes                     프로세스 최대 상주 메모리
+"""
+import json
+import logging
+import logging.handlers
+import math
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from onion_profile import RUN_PREFIX
+
+METRICS_PORT_ENV = "ONION_METRICS_PORT"
+METRICS_HOST_ENV = "ONION_METRICS_HOST"
+METRICS_FILE_ENV = "ONION_METRICS_FILE"
+METRICS_INTERVAL_ENV = "ONION_METRICS_INTERVAL"
+METRICS_INTERVAL_SEC = 15
+METRICS_FILE_MAX_BYTES = 10 * 1024 * 1024
+METRICS_FILE_BACKUPS = 5
+ACTIVE_SESSION_SEC = 5 * 60
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class MetricFamily:
+    """메트릭 하나 (이름·종류·설명 + 표본 목록 [(접미사, 라벨, 값)])"""
+
+    def __init__(self, name: str, kind: str, help_text: str):
+        self.name = name
+        self.kind = kind
+        self.help = help_text
+        self.samples = []
+
+    def add(self, labels: dict, value, suffix: str = ""):
+        self.samples.append((suffix, labels, value))
+        return self
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value) -> str:
+    value = float(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(int(value)) if value.is_integer() and abs(value) < 2 ** 53 else repr(value)
+
+
+def render_text(families) -> str:
+    """Prometheus 텍스트 노출 형식"""
+    lines = []
+    for fam in families:
+        lines.append(f"# HELP {fam.name} {fam.help}")
+        lines.append(f"# TYPE {fam.name} {fam.kind}")
+        for suffix, labels, value in fam.samples:
+            label_text = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+            lines.append(f"{fam.name}{suffix}{{{label_text}}} {_number(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def max_rss_bytes():
+    """프로세스 최대 상주 메모리 (bytes, 지원하지 않는 플랫폼이면 None)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024  # 리눅스는 KB 단위
+
+
+# 포트 → 그 포트를 지금 노출하는 exporter (같은 프로세스에서 exporter 를 다시 만들면 엔드포인트를 넘겨받는다)
+_served = {}
+_served_lock = threading.Lock()
+
+
+class MetricsExporter:
+    """수집 함수 목록 → 메트릭 (엔드포인트·파일 노출)"""
+
+    def __init__(self, app: str):
+        self.app = app
+        self.address = None   # 노출 중인 (host, port)
+        self.file_path = None
+        self.error = None     # 시작 실패 메시지
+        self._collectors = []
+        self._stop = threading.Event()
+
+    # --- [수집원] ---
+    def register(self, collector):
+        """collector() → MetricFamily 목록"""
+        self._collectors.append(collector)
+
+    def add_profile(self, registry, active_sec: float = ACTIVE_SESSION_SEC):
+        """리런·구간 히스토그램 + 최근 리런한 세션 수 (onion_profile.ProfileRegistry)"""
+        def collect():
+            runs = MetricFamily("onion_rerun_duration_milliseconds", "histogram", "스크립트 리런 소요시간 (ms)")
+            sections = MetricFamily("onion_section_duration_milliseconds", "histogram", "리런 구간별 소요시간 (리런당 합계, ms)")
+            recent = MetricFamily("onion_rerun_duration_recent_milliseconds", "gauge", "최근 리런 창의 소요시간 백분위수 (ms)")
+            for h in registry.snapshot():
+                if h["name"].startswith(RUN_PREFIX):
+                    fam, labels = runs, {"run": h["name"][len(RUN_PREFIX):]}
+                    recent.add({**labels, "quantile": "0.5"}, h["p50"])
+                    recent.add({**labels, "quantile": "0.95"}, h["p95"])
+                else:
+                    fam, labels = sections, {"section": h["name"]}
+                for le, n in zip([*h["buckets"], math.inf], h["cumulative"]):
+                    fam.add({**labels, "le": _number(le)}, n, "_bucket")
+                fam.add(labels, h["sum"], "_sum")
+                fam.add(labels, h["count"], "_count")
+            active = MetricFamily("onion_active_sessions", "gauge", f"최근 {active_sec:g}초 안에 리런한 세션 수")
+            active.add({}, registry.active_sessions(active_sec))
+            return [runs, sections, recent, active]
+        self.register(collect)
+
+    def add_sessions(self, registry):
+        """세션 메모리 합계·최대 (onion_session.SessionRegistry)"""
+        def collect():
+            table = registry.table()
+            memory = table["메모리(KB)"]
+            return [
+                MetricFamily("onion_session_memory_kilobytes", "gauge", "보고된 세션 상태 메모리 합계 (KB, 추정)")
+                .add({}, float(memory.sum())),
+                MetricFamily("onion_session_memory_max_kilobytes", "gauge", "세션 상태 메모리 최대 (KB, 추정)")
+                .add({}, float(memory.max()) if len(memory) else 0.0),
+                MetricFamily("onion_reporting_sessions", "gauge", "메모리를 보고한 세션 수 (보고 후 ttl 안)")
+                .add({}, len(table)),
+            ]
+        self.register(collect)
+
+    def add_caches(self, caches: dict):
+        """{캐시 이름: LRUCache.stats() 형식 dict 를 돌려주는 함수}"""
+        def collect():
+            fams = {
+                "entries": MetricFamily("onion_cache_entries", "gauge", "캐시 항목 수"),
+                "hits": MetricFamily("onion_cache_hits_total", "counter", "캐시 적중 횟수"),
+                "misses": MetricFamily("onion_cache_misses_total", "counter", "캐시 미적중 횟수"),
+                "ratio": MetricFamily("onion_cache_hit_ratio", "gauge", "캐시 적중률 (누적)"),
+            }
+            for name, stats_fn in caches.items():
+                s = stats_fn()
+                labels = {"cache": name}
+                fams["entries"].add(labels, s["size"])
+                fams["hits"].add(labels, s["hits"])
+                fams["misses"].add(labels, s["misses"])
+                fams["ratio"].add(labels, s["hit_ratio"])
+            return list(fams.values())
+        self.register(collect)
+
+    def collect(self) -> list:
+        families = [fam for collector in self._collectors for fam in collector()]
+        rss = max_rss_bytes()
+        if rss is not None:
+            families.append(
+                MetricFamily("onion_process_max_rss_bytes", "gauge", "프로세스 최대 상주 메모리 (bytes)").add({}, rss)
+            )
+        for fam in families:
+            fam.samples = [(sfx, {"app": self.app, **labels}, v) for sfx, labels, v in fam.samples]
+        return families
+
+    def render(self) -> str:
+        return render_text(self.collect())
+
+    def snapshot(self) -> dict:
+        """파일 기록용 — {ts, app, metrics: {이름+접미사: [[라벨, 값], ...]}}"""
+        metrics = {}
+        for fam in self.collect():
+            for suffix, labels, value in fam.samples:
+                value = float(value)
+                metrics.setdefault(fam.name + suffix, []).append([labels, value if math.isfinite(value) else None])
+        return {"ts": time.time(), "app": self.app, "metrics": metrics}
+
+    # --- [노출] ---
+    def serve(self, port: int, host: str = "127.0.0.1") -> bool:
+        """http://host:port/metrics 노출 (데몬 스레드) — 이미 이 프로세스가 노출 중인 포트면 이어받음"""
+        key = (host, int(port))
+        with _served_lock:
+            if key in _served:
+                _served[key] = self
+                self.address = key
+                return True
+            try:
+                server = ThreadingHTTPServer(key, _handler_for(key))
+            except OSError as e:
+                self.error = f"메트릭 엔드포인트를 열 수 없습니다 ({host}:{port}): {e}"
+                return False
+            server.daemon_threads = True
+            _served[key] = self
+        threading.Thread(target=server.serve_forever, name=f"onion-metrics-{port}", daemon=True).start()
+        self.address = key
+        return True
+
+    def write_periodically(self, path: str, interval_sec: float = METRICS_INTERVAL_SEC,
+                           max_bytes: int = METRICS_FILE_MAX_BYTES, backups: int = METRICS_FILE_BACKUPS):
+        """interval_sec 마다 snapshot() 한 줄 기록 (크기 회전, 데몬 스레드 — stop() 으로 멈춤)"""
+        handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self.file_path = path
+
+        def loop():
+            while not self._stop.wait(interval_sec):
+                try:
+                    # 로거를 거치지 않고 핸들러에 바로 (앱의 logging 설정·disable 과 무관하게 기록)
+                    line = json.dumps(self.snapshot(), ensure_ascii=False)
+                    handler.handle(logging.makeLogRecord({"msg": line, "levelno": logging.INFO}))
+                except Exception as e:  # 수집 중 오류로 기록 스레드가 죽지 않도록
+                    self.error = f"메트릭 파일 기록 실패: {type(e).__name__}: {e}"
+            handler.close()
+
+        threading.Thread(target=loop, name=f"onion-metrics-file-{self.app}", daemon=True).start()
+
+    def stop(self):
+        """파일 기록 중지 (엔드포인트는 프로세스가 끝날 때까지 유지)"""
+        self._stop.set()
+
+    def start_from_env(self, environ=None):
+        """ONION_METRICS_PORT / ONION_METRICS_FILE 이 있으면 노출 시작"""
+        environ = os.environ if environ is None else environ
+        port = environ.get(METRICS_PORT_ENV)
+        if port:
+            self.serve(int(port), environ.get(METRICS_HOST_ENV, "127.0.0.1"))
+        path = environ.get(METRICS_FILE_ENV)
+        if path:
+            self.write_periodically(path, float(environ.get(METRICS_INTERVAL_ENV, METRICS_INTERVAL_SEC)))
+        return self
+
+
+def _handler_for(key):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = _served[key].render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):  # 스크레이프마다 stderr 에 찍지 않음
+            pass
+
+    return MetricsHandler
@@ -0,0 +1,173 @@
+"""
+기계화 수준 조합 최적화 (Streamlit 비의존)
+
+공정마다 기계화 수준을 하나씩 고른 조합 중
+- 현재 면적 기준 ha당 비용이 최소인 조합
+- 비용(원/ha) vs 소요시간(h/ha) 파레토 집합
+을 찾는다.
+
+트랙터 결합: 트랙터 고정비는 트랙터 사용 공정들의 가동시간 비율로 안분되고
+안분 비율의 합은 1 이므로, 조합 전체의 트랙터 고정비(원/ha)는
+'트랙터를 쓰는 공정이 하나라도 있으면 연간 고정비 / area_ha, 없으면 0' 이 된다.
+따라서 조합 비용 = Σ 공정별 비용(트랙터 제외) + (트랙터 사용 여부) × 연간 고정비 / area_ha.
+
+- 조합 수가 brute_force_limit 이하: 전 조합을 한 번의 브로드캐스트로 전수 평가
+- 그보다 크면: 공정 순서대로 파레토 전선을 합쳐 나가는 분해 탐색
+  (트랙터 미사용/사용 두 상태를 따로 유지하고 매 단계 지배되는 조합을 제거)
+"""
+import math
+
+import numpy as np
+
+from onion_engine import default_plan, plan_record, stack_records, plan_coefficients
+
+BRUTE_FORCE_LIMIT = 200_000  # 이 조합 수까지는 전수 탐색
+
+
+def level_records(catalog: dict, processes, area_ha: float, overrides: dict = None) -> list:
+    """
+    공정별 기계화 수준 레코드 목록 [공정][수준]
+    overrides: {(공정, 수준 인덱스): render_plan_panel 반환값} — 사용자가 수정한 값으로 대체
+    """
+    overrides = overrides or {}
+    out = []
+    for proc in processes:
+        recs = []
+        for l_idx, level in enumerate(catalog[proc]):
+            s = overrides.get((proc, l_idx)) or default_plan(level, area_ha)
+            recs.append(plan_record(s))
+        out.append(recs)
+    return out
+
+
+def level_costs(records: list, area_ha, fuel_price, unit_hourly_wage) -> list:
+    """
+    공정별 수준 비용 벡터 (트랙터 고정비 제외)
+    반환: [{"cost": (L,), "time": (L,), "tractor": (L,) bool}, ...] — 공정 순서
+    """
+    flat = [rec for recs in records for rec in recs]
+    plans = stack_records([flat])
+    tractor = plans["uses_tractor"][0] & (plans["eff_ha"][0] > 0)
+    plans["uses_tractor"] = np.zeros_like(plans["uses_tractor"])
+    coef = plan_coefficients(plans, area_ha, fuel_price, unit_hourly_wage, 0.0)
+    cost = (coef["fixed"] + coef["variable"])[0]
+    time = coef["time"][0]
+
+    out, start = [], 0
+    for recs in records:
+        stop = start + len(recs)
+        out.append({"cost": cost[start:stop], "time": time[start:stop], "tractor": tractor[start:stop]})
+        start = stop
+    return out
+
+
+def pareto_mask(cost, time):
+    """비용·시간 모두 최소화 기준 비지배 점 마스크 (동일 점은 하나만 남김)"""
+    cost = np.asarray(cost, dtype=float)
+    time = np.asarray(time, dtype=float)
+    order = np.lexsort((time, cost))
+    sorted_time = time[order]
+    prev_min = np.minimum.accumulate(np.concatenate(([np.inf], sorted_time[:-1])))
+    keep_sorted = sorted_time < prev_min
+    mask = np.zeros(cost.shape, dtype=bool)
+    mask[order[keep_sorted]] = True
+    return mask
+
+
+def _brute_force(costs: list, tractor_cost: float) -> dict:
+    """전 조합을 (L1, L2, ..., Lp) 격자로 브로드캐스트해 평가"""
+    n = len(costs)
+    shape = tuple(len(c["cost"]) for c in costs)
+    total_cost = np.zeros(shape)
+    total_time = np.zeros(shape)
+    any_tractor = np.zeros(shape, dtype=bool)
+    for p, c in enumerate(costs):
+        axis_shape = [1] * n
+        axis_shape[p] = -1
+        total_cost = total_cost + c["cost"].reshape(axis_shape)
+        total_time = total_time + c["time"].reshape(axis_shape)
+        any_tractor = any_tractor | c["tractor"].reshape(axis_shape)
+    total_cost = (total_cost + np.where(any_tractor, tractor_cost, 0.0)).ravel()
+    total_time = total_time.ravel()
+
+    mask = pareto_mask(total_cost, total_time)
+    flat_idx = np.flatnonzero(mask)
+    levels = np.stack(np.unravel_index(flat_idx, shape), axis=-1)
+    return {"levels": levels, "cost": total_cost[flat_idx], "time": total_time[flat_idx]}
+
+
+def _merge(front: dict, c: dict, sel) -> dict:
+    """파레토 전선 × 공정 수준(sel 마스크) 의 모든 부분 조합 (가지치기는 _union_prune)"""
+    idx = np.flatnonzero(sel)
+    if front is None or len(idx) == 0:
+        return None
+    n_front = len(front["cost"])
+    cost = (front["cost"][:, None] + c["cost"][idx][None, :]).ravel()
+    time = (front["time"][:, None] + c["time"][idx][None, :]).ravel()
+    levels = np.concatenate(
+        [np.repeat(front["levels"], len(idx), axis=0), np.tile(idx, n_front)[:, None]], axis=1
+    )
+    return {"levels": levels, "cost": cost, "time": time}
+
+
+def _union_prune(*fronts) -> dict:
+    fronts = [f for f in fronts if f is not None]
+    if not fronts:
+        return None
+    merged = {k: np.concatenate([f[k] for f in fronts]) for k in ("levels", "cost", "time")}
+    mask = pareto_mask(merged["cost"], merged["time"])
+    return {k: v[mask] for k, v in merged.items()}
+
+
+def _decomposed(costs: list, tractor_cost: float) -> dict:
+    """
+    공정별 파레토 전선 병합 (분해 탐색)
+    - front0: 아직 트랙터를 쓰지 않은 부분 조합
+    - front1: 트랙터를 한 번 이상 쓴 부분 조합
+    트랙터 고정비는 조합 전체에 한 번만 붙으므로 마지막에 front1 에만 더한다.
+    """
+    empty = {"levels": np.zeros((1, 0), dtype=int), "cost": np.zeros(1), "time": np.zeros(1)}
+    front0, front1 = empty, None
+    for c in costs:
+        no_tractor = ~c["tractor"]
+        new0 = _union_prune(_merge(front0, c, no_tractor))
+        new1 = _union_prune(
+            _merge(front1, c, np.ones_like(no_tractor)),
+            _merge(front0, c, c["tractor"]),
+        )
+        front0, front1 = new0, new1
+    if front1 is not None:
+        front1 = dict(front1, cost=front1["cost"] + tractor_cost)
+    return _union_prune(front0, front1)
+
+
+def optimize_mix(records: list, area_ha, fuel_price, unit_hourly_wage, tractor_annual_fixed,
+                 brute_force_limit: int = BRUTE_FORCE_LIMIT) -> dict:
+    """
+    records: level_records 반환값 [공정][수준]
+    반환
+    - method: "전수 탐색" 또는 "분해 탐색", n_combinations: 전체 조합 수
+    - pareto: levels (n, 공정) 수준 인덱스, cost (원/ha), time (h/ha) — 비용 오름차순
+    - best: 최소 비용 조합 (levels, cost, time)
+    """
+    costs = level_costs(records, area_ha, fuel_price, unit_hourly_wage)
+    tractor_cost = tractor_annual_fixed / area_ha if area_ha > 0 else 0.0
+    n_combinations = math.prod(len(c["cost"]) for c in costs)
+
+    if n_combinations <= brute_force_limit:
+        method, front = "전수 탐색", _brute_force(costs, tractor_cost)
+    else:
+        method, front = "분해 탐색", _decomposed(costs, tractor_cost)
+
+    order = np.lexsort((front["time"], front["cost"]))
+    pareto = {k: v[order] for k, v in front.items()}
+    return {
+        "method": method,
+        "n_combinations": n_combinations,
+        "pareto": pareto,
+        "best": {
+            "levels": tuple(int(i) for i in pareto["levels"][0]),
+            "cost": float(pareto["cost"][0]),
+            "time": float(pareto["time"][0]),
+        },
+    }
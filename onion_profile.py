@@ -0,0 +1,284 @@
+"""
+리런 구간별 소요시간 프로파일러 (Streamlit 비의존)
+
+스크립트 리런 하나를 이름 붙인 구간으로 나눠 시간을 재고, 구간별 히스토그램을 세션·서버 단위로 쌓는다.
+- RerunProfiler (세션당 하나): begin_run() ~ end_run() 사이에 section() / checkpoint() 로 구간 시간 기록
+    section("이름"): with 블록 시간 — 안쪽 구간은 "바깥/안쪽" 경로 이름, 같은 구간을 여러 번 지나면 리런 안에서 합산
+    checkpoint("이름"): 들여쓰기 없이 쓰는 구간 — 같은 깊이의 직전 checkpoint·구간 종료(또는 바깥 구간 시작)부터 지금까지
+    run("이름", standalone=True): fragment 만 다시 실행될 때 그 fragment 를 리런 하나로 기록
+  리런이 끝나면 구간별 (리런당 합계) 시간을 히스토그램에 넣고 sink(리런 이름, 전체 ms, {구간: ms}) 를 부른다.
+- ProfileRegistry (서버 프로세스당 하나, 스레드 안전): 모든 세션의 리런을 모은 히스토그램
+  + log_path 를 주면 리런마다 JSON 한 줄씩 덧붙인다 (환경변수 ONION_PROFILE_LOG)
+    파일 쓰기는 백그라운드 스레드 하나가 열어 둔 파일 핸들로 — 리런 스레드는 큐에 넣기만 한다
+  + 최근 리런한 세션 수, 히스토그램 스냅숏 (onion_metrics 가 읽어 노출)
+- Histogram: 고정 버킷(ms) 누적 개수·합계 + 최근 window 개 표본 (p50/p95, 최근 분포)
+
+리런 전체 시간은 "리런: <이름>" 구간으로 기록한다 (전체 스크립트는 "리런: 전체").
+"""
+import bisect
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+LATENCY_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+PROFILE_WINDOW = 500   # 백분위수·최근 분포 계산에 쓰는 최근 표본 수
+PROFILE_LOG_ENV = "ONION_PROFILE_LOG"
+RUN_PREFIX = "리런: "
+
+
+class Histogram:
+    """ms 히스토그램 — 누적 버킷 개수·합계·최대 + 최근 표본 창 (잠금은 소유자가)"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS, window: int = PROFILE_WINDOW):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # 마지막 칸: 가장 큰 버킷 초과
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, ms: float):
+        self.counts[bisect.bisect_left(self.buckets, ms)] += 1
+        self.count += 1
+        self.sum += ms
+        self.max = max(self.max, ms)
+        self.recent.append(ms)
+
+    def percentile(self, q: float) -> float:
+        """최근 표본 창의 q 백분위수 (표본이 없으면 NaN)"""
+        return float(np.percentile(self.recent, q)) if self.recent else float("nan")
+
+    def cumulative(self) -> list:
+        """버킷 상한(le)별 누적 개수 — 마지막은 전체 (+Inf)"""
+        return np.cumsum(self.counts).tolist()
+
+    def recent_counts(self) -> list:
+        """최근 표본 창의 버킷별 개수 (누적 아님)"""
+        idx = np.searchsorted(self.buckets, np.asarray(self.recent, dtype=float), side="left")
+        return np.bincount(idx, minlength=len(self.buckets) + 1).tolist()
+
+    def summary(self) -> dict:
+        return {
+            "횟수": self.count,
+            "평균 (ms)": self.sum / self.count if self.count else float("nan"),
+            "p50 (ms)": self.percentile(50),
+            "p95 (ms)": self.percentile(95),
+            "최대 (ms)": self.max,
+        }
+
+
+def bucket_labels(buckets=LATENCY_BUCKETS_MS) -> list:
+    """버킷 구간 라벨 ("≤1", "≤2.5", ..., ">10000")"""
+    return [f"≤{b:g}" for b in buckets] + [f">{buckets[-1]:g}"]
+
+
+def histogram_table(histograms: dict) -> pd.DataFrame:
+    """{구간: Histogram} → 구간별 횟수·평균·p50·p95·최대 (리런 전체 먼저, 나머지는 이름순)"""
+    names = sorted(histograms, key=lambda n: (not n.startswith(RUN_PREFIX), n))
+    rows = [{"구간": n, **histograms[n].summary()} for n in names]
+    return pd.DataFrame(rows, columns=["구간", "횟수", "평균 (ms)", "p50 (ms)", "p95 (ms)", "최대 (ms)"])
+
+
+class RerunProfiler:
+    """세션 하나의 리런 구간 시간 (스크립트 스레드에서만 사용)"""
+
+    def __init__(self, sink=None, window: int = PROFILE_WINDOW):
+        self.sink = sink
+        self.window = window
+        self.histograms = {}
+        self.last_run = None   # {"run", "total_ms", "sections": {구간: ms}}
+        self._open = None
+        self._stack = []    # 열린 구간 이름
+        self._marks = [0.0]  # 깊이별 checkpoint 기준 시각 (0: 최상위)
+
+    def _observe(self, name: str, ms: float):
+        hist = self.histograms.get(name)
+        if hist is None:
+            hist = self.histograms[name] = Histogram(window=self.window)
+        hist.observe(ms)
+
+    # --- [리런] ---
+    def begin_run(self, name: str = "전체"):
+        """리런 시작 — 끝나지 않은 이전 리런(중간에 st.rerun·예외로 끊김)은 버린다"""
+        now = time.perf_counter()
+        self._open = {"run": name, "start": now, "sections": {}}
+        self._stack = []
+        self._marks = [now]
+
+    def end_run(self) -> dict:
+        """리런 종료 — 구간별 합계를 히스토그램·sink 로 보내고 결과 반환 (열린 리런이 없으면 None)"""
+        if self._open is None:
+            return None
+        run, self._open = self._open, None
+        total_ms = (time.perf_counter() - run["start"]) * 1000.0
+        self._observe(RUN_PREFIX + run["run"], total_ms)
+        for name, ms in run["sections"].items():
+            self._observe(name, ms)
+        self.last_run = {"run": run["run"], "total_ms": total_ms, "sections": dict(run["sections"])}
+        if self.sink is not None:
+            self.sink(run["run"], total_ms, run["sections"])
+        return self.last_run
+
+    @contextmanager
+    def run(self, name: str, standalone: bool = False):
+        """
+        fragment 본문용 — standalone(fragment 만 다시 실행) 이고 바깥 구간이 없으면 리런 하나로,
+        아니면(전체 리런 안) 구간 하나로 기록
+        """
+        if standalone and not self._stack:
+            self.begin_run(name)
+            try:
+                with self.section(name):
+                    yield
+            finally:
+                self.end_run()
+        else:
+            with self.section(name):
+                yield
+
+    # --- [구간] ---
+    def _add(self, path: str, ms: float):
+        """열린 리런이 있으면 리런 안 합계에, 없으면 바로 히스토그램에"""
+        if self._open is not None:
+            sections = self._open["sections"]
+            sections[path] = sections.get(path, 0.0) + ms
+        else:
+            self._observe(path, ms)
+
+    @contextmanager
+    def section(self, name: str):
+        path = "/".join([*self._stack, name])
+        start = time.perf_counter()
+        self._stack.append(name)
+        self._marks.append(start)
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            self._stack.pop()
+            self._marks.pop()
+            self._marks[-1] = now
+            self._add(path, (now - start) * 1000.0)
+
+    def checkpoint(self, name: str):
+        """같은 깊이의 직전 기준 시각(checkpoint·구간 종료·바깥 구간 시작)부터 지금까지를 구간 name 에 더함"""
+        now = time.perf_counter()
+        self._add("/".join([*self._stack, name]), (now - self._marks[-1]) * 1000.0)
+        self._marks[-1] = now
+
+    # --- [보고] ---
+    def table(self) -> pd.DataFrame:
+        return histogram_table(self.histograms)
+
+    def last_run_table(self) -> pd.DataFrame:
+        """마지막 리런의 구간별 시간 (전체 대비 비율, 안쪽 구간은 바깥 구간에 포함)"""
+        if self.last_run is None:
+            return pd.DataFrame(columns=["구간", "시간 (ms)", "비율"])
+        total = self.last_run["total_ms"]
+        rows = [{"구간": n, "시간 (ms)": ms, "비율": ms / total if total else 0.0}
+                for n, ms in self.last_run["sections"].items()]
+        return pd.DataFrame(rows, columns=["구간", "시간 (ms)", "비율"])
+
+
+class ProfileRegistry:
+    """서버 프로세스 전체 리런 구간 히스토그램 (스레드 안전) + 선택적 JSON Lines 로그"""
+
+    def __init__(self, window: int = PROFILE_WINDOW, log_path: str = None):
+        self.window = window
+        self.log_path = log_path if log_path is not None else os.environ.get(PROFILE_LOG_ENV)
+        self.histograms = {}
+        self._last_seen = {}  # 세션 → 마지막 리런 종료 시각
+        self._lock = threading.Lock()
+        self._log_queue = queue.Queue()
+        self._log_thread = None
+
+    def observe_run(self, session_id: str, run: str, total_ms: float, sections: dict):
+        now = time.time()
+        with self._lock:
+            self._last_seen[session_id] = now
+            for name, ms in [(RUN_PREFIX + run, total_ms), *sections.items()]:
+                hist = self.histograms.get(name)
+                if hist is None:
+                    hist = self.histograms[name] = Histogram(window=self.window)
+                hist.observe(ms)
+            if self.log_path and self._log_thread is None:
+                self._log_thread = threading.Thread(target=self._write_log, name="profile-log", daemon=True)
+                self._log_thread.start()
+        if self.log_path:
+            self._log_queue.put({
+                "ts": now,
+                "session": session_id,
+                "run": run,
+                "total_ms": round(total_ms, 3),
+                "sections": {k: round(v, 3) for k, v in sections.items()},
+            })
+
+    def _write_log(self):
+        """로그 쓰기 스레드 — 파일을 한 번 열어 두고, 쌓인 기록을 모아 쓴 뒤 flush"""
+        f = None
+        while True:
+            records = [self._log_queue.get()]
+            while True:
+                try:
+                    records.append(self._log_queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                if f is None:
+                    f = open(self.log_path, "a", encoding="utf-8")
+                f.writelines(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+                f.flush()
+            except OSError:
+                f = None  # 이번 묶음은 버리고 다음 기록 때 다시 연다 (디스크 오류로 리런이 막히지 않도록)
+            finally:
+                for _ in records:
+                    self._log_queue.task_done()
+
+    def flush_log(self):
+        """큐에 쌓인 리런 기록이 파일에 쓰일 때까지 대기 (테스트·종료용)"""
+        if self._log_thread is not None:
+            self._log_queue.join()
+
+    def sink(self, session_id: str):
+        """세션 하나의 RerunProfiler 에 넘길 sink"""
+        return lambda run, total_ms, sections: self.observe_run(session_id, run, total_ms, sections)
+
+    def table(self) -> pd.DataFrame:
+        with self._lock:
+            return histogram_table(self.histograms)
+
+    def active_sessions(self, within_sec: float) -> int:
+        """최근 within_sec 초 안에 리런한 세션 수 (오래된 세션은 정리)"""
+        now = time.time()
+        with self._lock:
+            for sid in [s for s, t in self._last_seen.items() if now - t > within_sec]:
+                del self._last_seen[sid]
+            return len(self._last_seen)
+
+    def snapshot(self) -> list:
+        """구간별 히스토그램 복사본 — [{name, buckets, cumulative, sum, count, p50, p95}] (메트릭 노출용)"""
+        with self._lock:
+            return [
+                {
+                    "name": name,
+                    "buckets": hist.buckets,
+                    "cumulative": hist.cumulative(),
+                    "sum": hist.sum,
+                    "count": hist.count,
+                    "p50": hist.percentile(50),
+                    "p95": hist.percentile(95),
+                }
+                for name, hist in self.histograms.items()
+            ]
+
+    def recent_counts(self, name: str) -> list:
+        with self._lock:
+            hist = self.histograms.get(name)
+            return hist.recent_counts() if hist is not None else [0] * (len(LATENCY_BUCKETS_MS) + 1)
@@ -0,0 +1,242 @@
+"""
+세션 상태 관리 (Streamlit 비의존 — st.session_state 같은 매핑을 받아 동작)
+
+공정 패널 위젯 키에는 기계화 수준 인덱스가 들어간다.
+    asset_price_<역할>_<공정>_<수준>_<작업기>, eff_/work_/opt_/anu_<역할>_<공정>_<수준>
+수준을 바꾸면 이전 수준의 키는 더 이상 그려지지 않는 고아 키가 된다.
+Streamlit 은 그려지지 않은 위젯 상태를 리런 끝에 지워 버리므로, 그대로 두면
+사용자가 고친 값(예: 이전 수준의 작업 능률)이 사라지고 되돌아가면 DB 기본값으로 돌아간다.
+
+LevelStateManager
+- evict(): 현재 수준이 아닌 수준 키를 세션에서 지우고, 기본값과 다른 값만
+  (역할, 공정, 수준) 단위의 작은 보관소(overrides)에 옮겨 둔다
+- initial(): 위젯을 만들 때 보관소에 값이 있으면 그 값을 초기값으로 돌려준다
+- store(): 위젯 밖(표 일괄 입력, 숨긴 탭)에서 정한 값을 보관소에 기록
+- orphaned(): 현재 선택된 수준과 맞지 않는 수준 키 목록 (점검용)
+- reset(): 공정 하나의 수준 키·보관값 전체 삭제 (카탈로그의 수준 목록이 바뀌었을 때)
+
+세션 메모리
+- session_memory(): 세션 상태 키별 추정 크기 (배열은 nbytes, 컨테이너·객체는 재귀 합산)
+- SessionRegistry: 서버 프로세스 안 세션별 메모리 보고 (마지막 보고 후 ttl 이 지나면 제외)
+  sample(): 세션 상태 전체를 도는 session_memory() 는 리런마다 부르기엔 비싸므로
+  세션마다 interval 초에 한 번만 다시 재고, 그 사이에는 마지막 측정 결과를 돌려준다
+"""
+import re
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from onion_engine import ROLES
+
+LEVEL_FIELDS = ("asset_price", "eff", "work", "opt", "anu")
+OVERRIDES_KEY = "_level_overrides"
+SESSION_TTL_SEC = 30 * 60
+MEMORY_SAMPLE_SEC = 30.0  # 세션 메모리 다시 재는 최소 간격 (초)
+
+
+def level_key(field: str, role: str, proc: str, level_idx: int, a_idx: int = None) -> str:
+    """수준 인덱스가 들어간 위젯 키 (asset_price 는 작업기 인덱스까지)"""
+    key = f"{field}_{role}_{proc}_{int(level_idx)}"
+    return key if a_idx is None else f"{key}_{int(a_idx)}"
+
+
+class LevelStateManager:
+    """수준별 위젯 키 정리 + 사용자 수정값 보관소"""
+
+    def __init__(self, state, processes, roles=ROLES):
+        self.state = state
+        alt = lambda xs: "|".join(re.escape(x) for x in xs)
+        self._pattern = re.compile(
+            rf"^({alt(LEVEL_FIELDS)})_({alt(roles)})_({alt(processes)})_(\d+)(?:_(\d+))?$"
+        )
+        if OVERRIDES_KEY not in state:
+            state[OVERRIDES_KEY] = {}
+
+    @property
+    def overrides(self) -> dict:
+        """{"역할|공정|수준": {위젯 키: 값}} — 기본값과 다른 값만"""
+        return self.state[OVERRIDES_KEY]
+
+    def parse(self, key: str):
+        """위젯 키 → (필드, 역할, 공정, 수준, 작업기 인덱스 또는 None), 수준 키가 아니면 None"""
+        m = self._pattern.match(key) if isinstance(key, str) else None
+        if m is None:
+            return None
+        field, role, proc, level, a_idx = m.groups()
+        if (field == "asset_price") != (a_idx is not None):
+            return None
+        return field, role, proc, int(level), None if a_idx is None else int(a_idx)
+
+    def level_keys(self, role: str = None, proc: str = None) -> dict:
+        """세션에 있는 수준 키 → 파싱 결과 (역할·공정으로 거르기)"""
+        out = {}
+        for key in list(self.state.keys()):
+            parsed = self.parse(key)
+            if parsed and (role is None or parsed[1] == role) and (proc is None or parsed[2] == proc):
+                out[key] = parsed
+        return out
+
+    @staticmethod
+    def _slot(role: str, proc: str, level_idx: int) -> str:
+        return f"{role}|{proc}|{int(level_idx)}"
+
+    # --- [정리] ---
+    def evict(self, role: str, proc: str, current_level: int, defaults) -> int:
+        """
+        (역할, 공정) 의 현재 수준이 아닌 수준 키를 세션에서 지움 → 지운 키 수
+        defaults(level_idx) → {위젯 키: 기본값}; 기본값과 다른 값만 보관소에 남기고,
+        기본값으로 되돌린 키는 보관소에서도 뺀다.
+        """
+        evicted = 0
+        for key, (_, _, _, level, _) in self.level_keys(role, proc).items():
+            if level == int(current_level):
+                continue
+            slot = self._slot(role, proc, level)
+            stored = self.overrides.get(slot, {})
+            value = self.state[key]
+            if value != defaults(level).get(key):
+                stored[key] = value
+            else:
+                stored.pop(key, None)
+            if stored:
+                self.overrides[slot] = stored
+            else:
+                self.overrides.pop(slot, None)
+            del self.state[key]
+            evicted += 1
+        return evicted
+
+    def store(self, role: str, proc: str, level_idx: int, values: dict, defaults: dict):
+        """
+        위젯 밖(표 일괄 입력, 숨긴 탭 등)에서 정한 값을 보관소에 기록 — 그 수준 위젯을 다음에 만들 때 초기값이 된다
+        values: {위젯 키: 값} (values 에 없는 키의 보관값은 그대로); 세션에 남아 있는 같은 키는 지워서 보관값이 쓰이게 한다.
+        """
+        slot = self._slot(role, proc, level_idx)
+        stored = {**self.overrides.get(slot, {}), **values}
+        stored = {k: v for k, v in stored.items() if v != defaults.get(k)}
+        for key in values:
+            if key in self.state:
+                del self.state[key]
+        if stored:
+            self.overrides[slot] = stored
+        else:
+            self.overrides.pop(slot, None)
+
+    def reset(self, proc: str) -> int:
+        """
+        공정 하나의 수준 키·보관값을 모두 지움 (카탈로그가 바뀌어 수준 인덱스가 다른 수준을 가리킬 때) → 지운 키 수
+        보관소는 슬롯 이름으로 거르므로 카탈로그에서 빠진 공정도 지울 수 있다.
+        """
+        keys = list(self.level_keys(proc=proc))
+        for key in keys:
+            del self.state[key]
+        for slot in [s for s in self.overrides if s.split("|")[1] == proc]:
+            del self.overrides[slot]
+        return len(keys)
+
+    def initial(self, key: str, default):
+        """위젯 초기값 — 보관해 둔 사용자 수정값이 있으면 그 값, 없으면 default"""
+        parsed = self.parse(key)
+        if parsed is None:
+            return default
+        _, role, proc, level, _ = parsed
+        return self.overrides.get(self._slot(role, proc, level), {}).get(key, default)
+
+    def orphaned(self, level_state_key=lambda role, proc: f"lvl_{role}_{proc}") -> list:
+        """현재 선택된 수준(level_state_key 의 세션 값)과 다른 수준 키 목록"""
+        out = []
+        for key, (_, role, proc, level, _) in self.level_keys().items():
+            current = self.state.get(level_state_key(role, proc))
+            if current is not None and int(current) != level:
+                out.append(key)
+        return out
+
+    def stats(self) -> dict:
+        return {
+            "수준 키": len(self.level_keys()),
+            "고아 키": len(self.orphaned()),
+            "보관 수준": len(self.overrides),
+            "보관 값": sum(len(v) for v in self.overrides.values()),
+        }
+
+
+# --- [세션 메모리] ---
+def deep_sizeof(obj, seen: set = None) -> int:
+    """객체 추정 크기 (bytes) — 배열·DataFrame 은 데이터 크기, 컨테이너·객체는 재귀 합산 (같은 객체는 한 번만)"""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, np.ndarray):
+        return sys.getsizeof(obj) + (obj.nbytes if obj.base is None else 0)
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return int(np.sum(obj.memory_usage(deep=True)))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(x, seen) for x in obj)
+    elif hasattr(obj, "__dict__") and not isinstance(obj, type):
+        size += deep_sizeof(vars(obj), seen)
+    return size
+
+
+def session_memory(state) -> pd.DataFrame:
+    """세션 상태 키별 추정 크기 (큰 순) — 열: 키, 종류, 크기(KB)"""
+    rows = []
+    for key in list(state.keys()):
+        value = state[key]
+        rows.append({"키": str(key), "종류": type(value).__name__, "크기(KB)": deep_sizeof(value) / 1024})
+    df = pd.DataFrame(rows, columns=["키", "종류", "크기(KB)"])
+    return df.sort_values("크기(KB)", ascending=False, ignore_index=True)
+
+
+class SessionRegistry:
+    """서버 프로세스 안 세션별 메모리 보고 (스레드 안전, ttl 동안 보고가 없는 세션은 제외)"""
+
+    def __init__(self, ttl_sec: float = SESSION_TTL_SEC):
+        self.ttl_sec = ttl_sec
+        self._lock = threading.Lock()
+        self._sessions = {}
+
+    def report(self, session_id: str, memory: pd.DataFrame):
+        now = time.time()
+        with self._lock:
+            self._sessions[session_id] = {
+                "키 수": len(memory),
+                "메모리(KB)": float(memory["크기(KB)"].sum()),
+                "표": memory,
+                "측정": now,
+                "최근 보고": now,
+            }
+
+    def sample(self, session_id: str, state, interval_sec: float = MEMORY_SAMPLE_SEC) -> pd.DataFrame:
+        """
+        세션 메모리 측정·보고 — 마지막 측정 후 interval_sec 이 지나지 않았으면 다시 재지 않고
+        그때의 표를 돌려준다 (세션은 활성으로 유지)
+        """
+        now = time.time()
+        with self._lock:
+            last = self._sessions.get(session_id)
+            if last is not None and now - last["측정"] < interval_sec:
+                last["최근 보고"] = now
+                return last["표"]
+        memory = session_memory(state)
+        self.report(session_id, memory)
+        return memory
+
+    def table(self) -> pd.DataFrame:
+        """활성 세션별 키 수·메모리 (만료된 세션은 정리)"""
+        now = time.time()
+        with self._lock:
+            for sid in [s for s, r in self._sessions.items() if now - r["최근 보고"] > self.ttl_sec]:
+                del self._sessions[sid]
+            rows = [
+                {"세션": sid[:8], "키 수": r["키 수"], "메모리(KB)": r["메모리(KB)"],
+                 "경과(초)": now - r["측정"]}
+                for sid, r in self._sessions.items()
+            ]
+        return pd.DataFrame(rows, columns=["세션", "키 수", "메모리(KB)", "경과(초)"])
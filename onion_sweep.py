@@ -0,0 +1,263 @@
+"""
+지역 단위 매개변수 스윕 (멀티코어, 중단 후 재개)
+
+면적 × 1일 노임 × 면세유 가격 × 트랙터 가격 × 기계화 수준 조합 격자 전체를
+도입안 단일 역할로(각 면적을 현재 면적으로 보고) 평가해 디스크의 결과 큐브 하나에 모은다.
+- 시나리오 = 조합 × 노임 × 유류비 × 트랙터가격 (이 순서의 곱집합을 한 줄로 편 것)
+- 격자는 (시나리오, 면적) 블록 단위 샤드로 나눠 프로세스 풀에서 병렬 평가
+- 각 샤드는 onion_engine 의 plan_coefficients 로 (면적, 시나리오, 역할, 공정)
+  배열을 한 번에 계산하고, 결과를 onion_cube 결과 큐브의 자기 블록에 직접 쓴다
+- 완료된 샤드는 done.npy 에 표시하므로 중단 후 같은 스펙으로 다시 실행하면
+  남은 샤드만 계산한다 (스펙이 바뀌었으면 오류)
+
+출력 디렉터리
+- cube.json, cost/fixed/variable/hours.npy: 결과 큐브 (onion_cube.ResultsCube)
+  시나리오 속성: 조합(공정 순서 수준 인덱스, "-" 연결), 1일 노임, 면세유 가격, 트랙터 가격
+- meta.json: 스펙 해시, 샤드 목록
+- done.npy: 샤드별 완료 여부
+
+스펙 (JSON)
+- areas_ha, wages_per_day, fuel_prices, tractor_prices:
+  값 목록 또는 {"start": a, "stop": b, "num": n} (등간격)
+- mixes: "all"(전 조합) 또는 공정 순서의 수준 목록 목록 (인덱스 또는 라벨)
+- work_hours_per_day (선택, 기본 8)
+
+사용 예
+    python onion_sweep.py sweep.json -o sweep_out --workers 8
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from onion_cache import canonical_key
+from onion_catalog import MECH_LEVELS, PROCESSES
+from onion_cube import ResultsCube, write_coefficients
+from onion_engine import TRACTOR_LIFE_YEARS, calc_annual_fixed, level_table, gather_plans, plan_coefficients
+
+DEFAULT_SHARD_CELLS = 50_000  # 샤드 하나의 (시나리오 × 면적) 칸 수 상한 (× 공정 수 만큼 배열을 만든다)
+DEFAULT_WORK_HOURS_PER_DAY = 8
+GRID_AXES = ("areas_ha", "wages_per_day", "fuel_prices", "tractor_prices")
+
+
+def axis_values(value) -> list:
+    """축 지정(값 목록 또는 start/stop/num) → 값 목록"""
+    if isinstance(value, dict):
+        return np.linspace(value["start"], value["stop"], int(value["num"])).tolist()
+    return [float(v) for v in np.atleast_1d(value)]
+
+
+def resolve_mixes(mixes, catalog: dict = MECH_LEVELS, processes=PROCESSES) -> list:
+    """조합 지정("all" 또는 인덱스/라벨 목록) → 수준 인덱스 튜플 목록"""
+    if mixes == "all":
+        return [tuple(m) for m in itertools.product(*(range(len(catalog[p])) for p in processes))]
+    out = []
+    for mix in mixes:
+        if len(mix) != len(processes):
+            raise ValueError(f"조합 {mix}: 공정 수({len(processes)})와 길이가 다릅니다.")
+        row = []
+        for proc, lv in zip(processes, mix):
+            labels = [x["label"] for x in catalog[proc]]
+            if isinstance(lv, str):
+                if lv not in labels:
+                    raise ValueError(f"'{proc}' 공정에 '{lv}' 수준이 없습니다.")
+                lv = labels.index(lv)
+            if not 0 <= int(lv) < len(labels):
+                raise ValueError(f"'{proc}' 공정 수준 인덱스 {lv} 가 범위를 벗어났습니다.")
+            row.append(int(lv))
+        out.append(tuple(row))
+    return out
+
+
+def build_grid(spec: dict, catalog: dict = MECH_LEVELS, processes=PROCESSES) -> dict:
+    """스펙 → 축 값 (mixes + GRID_AXES) 과 작업시간"""
+    grid = {"mixes": resolve_mixes(spec.get("mixes", "all"), catalog, processes)}
+    for name in GRID_AXES:
+        grid[name] = axis_values(spec[name])
+    grid["work_hours_per_day"] = float(spec.get("work_hours_per_day", DEFAULT_WORK_HOURS_PER_DAY))
+    return grid
+
+
+def scenario_shape(grid: dict) -> tuple:
+    """시나리오 축을 이루는 (조합, 노임, 유류비, 트랙터가격) 개수"""
+    return (len(grid["mixes"]),) + tuple(len(grid[name]) for name in GRID_AXES[1:])
+
+
+def scenario_attrs(grid: dict) -> dict:
+    """시나리오 번호 순서의 속성 목록 (결과 큐브의 scenario_attrs)"""
+    idx = np.unravel_index(np.arange(math.prod(scenario_shape(grid))), scenario_shape(grid))
+    mixes = ["-".join(str(i) for i in m) for m in grid["mixes"]]
+    return {
+        "조합": [mixes[i] for i in idx[0]],
+        "1일 노임": np.asarray(grid["wages_per_day"])[idx[1]].tolist(),
+        "면세유 가격": np.asarray(grid["fuel_prices"])[idx[2]].tolist(),
+        "트랙터 가격": np.asarray(grid["tractor_prices"])[idx[3]].tolist(),
+    }
+
+
+def make_shards(n_scenarios: int, n_areas: int, shard_cells: int = DEFAULT_SHARD_CELLS) -> list:
+    """(시나리오, 면적) 블록 분할 — [(s0, s1, a0, a1), ...]"""
+    area_block = max(1, min(n_areas, shard_cells))
+    scen_block = max(1, shard_cells // area_block)
+    return [
+        (s0, min(s0 + scen_block, n_scenarios), a0, min(a0 + area_block, n_areas))
+        for s0 in range(0, n_scenarios, scen_block)
+        for a0 in range(0, n_areas, area_block)
+    ]
+
+
+def evaluate_block(table: dict, grid: dict, s0: int, s1: int, a0: int, a1: int) -> dict:
+    """
+    샤드 하나 평가 → plan_coefficients 결과, 각 (면적, 시나리오, 역할=1, 공정)
+    면적마다 그 면적을 현재 면적(연간 가동시간 = 면적 / 능률)으로 본 값이다.
+    """
+    m, w, f, t = np.unravel_index(np.arange(s0, s1), scenario_shape(grid))
+    level_idx = np.asarray(grid["mixes"], dtype=np.int64)[m]
+    plans = {k: v[None, :, None, :] for k, v in gather_plans(table, level_idx).items()}
+
+    def per_scenario(values, pick):
+        return np.asarray(values, dtype=float)[pick].reshape(1, -1, 1, 1)
+
+    return plan_coefficients(
+        plans,
+        np.asarray(grid["areas_ha"][a0:a1], dtype=float).reshape(-1, 1, 1, 1),
+        per_scenario(grid["fuel_prices"], f),
+        per_scenario(grid["wages_per_day"], w) / grid["work_hours_per_day"],
+        per_scenario(calc_annual_fixed(grid["tractor_prices"], TRACTOR_LIFE_YEARS), t),
+    )
+
+
+# --- [워커] ---
+_WORKER = {}
+
+
+def _init_worker(out_dir: str, grid: dict, catalog: dict, processes):
+    _WORKER["grid"] = grid
+    _WORKER["table"] = level_table(catalog, processes)
+    _WORKER["cube"] = ResultsCube.open(out_dir, mode="r+")
+
+
+def _run_shard(i: int, shard: tuple) -> int:
+    """샤드 결과를 큐브의 자기 블록에 쓰고 디스크에 반영한 뒤 샤드 번호 반환"""
+    s0, s1, a0, a1 = shard
+    cube = _WORKER["cube"]
+    coef = evaluate_block(_WORKER["table"], _WORKER["grid"], s0, s1, a0, a1)
+    write_coefficients(cube, coef, area_pos=slice(a0, a1), scenario_pos=slice(s0, s1))
+    cube.flush()
+    return i
+
+
+# --- [실행] ---
+def _save_done(path: str, done: np.ndarray):
+    """완료 표시 저장 — 임시 파일에 쓴 뒤 바꿔치기해서, 쓰는 도중 중단되어도 이전 파일이 남는다"""
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:  # 경로로 넘기면 np.save 가 확장자 .npy 를 덧붙인다
+        np.save(f, done)
+    os.replace(tmp, path)
+
+
+def prepare(out_dir: str, spec: dict, catalog: dict = MECH_LEVELS, processes=PROCESSES,
+            shard_cells: int = DEFAULT_SHARD_CELLS) -> dict:
+    """
+    출력 디렉터리 준비 — 처음이면 결과 큐브·완료 표시를 만들고, 있으면 스펙이 같은지 확인
+    반환: meta (grid, shards, key)
+    """
+    grid = build_grid(spec, catalog, processes)
+    n_scenarios = math.prod(scenario_shape(grid))
+    shards = make_shards(n_scenarios, len(grid["areas_ha"]), shard_cells)
+    key = canonical_key({"grid": grid, "shards": shards, "processes": list(processes),
+                         "catalog": {p: catalog[p] for p in processes}})
+    meta = {"key": key, "processes": list(processes), "grid": grid, "shards": shards}
+    meta_path = os.path.join(out_dir, "meta.json")
+
+    if os.path.exists(meta_path):
+        with open(meta_path, encoding="utf-8") as f:
+            old = json.load(f)
+        if old["key"] != key:
+            raise ValueError(f"{out_dir} 에 다른 스펙의 스윕 결과가 있습니다. 다른 출력 디렉터리를 지정하세요.")
+        return meta
+
+    ResultsCube.create(
+        out_dir, processes, ["도입안"], grid["areas_ha"],
+        scenarios=range(n_scenarios), scenario_attrs=scenario_attrs(grid),
+    ).flush()
+    _save_done(os.path.join(out_dir, "done.npy"), np.zeros(len(shards), dtype=bool))
+
+    # meta.json 은 마지막에 써서, 준비 도중 중단되면 다음 실행이 처음부터 다시 준비하도록 한다
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    return meta
+
+
+def run(spec: dict, out_dir: str, workers: int = None, catalog: dict = MECH_LEVELS, processes=PROCESSES,
+        shard_cells: int = DEFAULT_SHARD_CELLS, progress=None) -> dict:
+    """
+    스윕 실행 (이미 완료된 샤드는 건너뜀)
+    progress(완료 샤드 수, 전체 샤드 수, 경과 초) 콜백으로 진행 상황을 받을 수 있다.
+    반환: shape (결과 큐브), n_shards, n_skipped, n_cells, seconds
+    """
+    meta = prepare(out_dir, spec, catalog, processes, shard_cells)
+    shards = [tuple(s) for s in meta["shards"]]
+    done_path = os.path.join(out_dir, "done.npy")
+    done = np.load(done_path)
+    todo = [i for i in range(len(shards)) if not done[i]]
+    n_skipped = len(shards) - len(todo)
+
+    start = time.perf_counter()
+    if progress:
+        progress(n_skipped, len(shards), 0.0)
+    if todo:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(out_dir, meta["grid"], catalog, processes),
+        ) as pool:
+            futures = [pool.submit(_run_shard, i, shards[i]) for i in todo]
+            for fut in as_completed(futures):
+                done[fut.result()] = True
+                _save_done(done_path, done)
+                if progress:
+                    progress(int(done.sum()), len(shards), time.perf_counter() - start)
+
+    shape = ResultsCube.open(out_dir).shape
+    return {
+        "shape": shape,
+        "n_shards": len(shards),
+        "n_skipped": n_skipped,
+        "n_cells": math.prod(shape),
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def load(out_dir: str) -> ResultsCube:
+    """스윕 결과 큐브 열기 (읽기 전용 메모리 맵)"""
+    return ResultsCube.open(out_dir)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="면적 × 노임 × 유류비 × 트랙터가격 × 기계화 조합 스윕")
+    parser.add_argument("spec", help="스윕 스펙 JSON 파일")
+    parser.add_argument("-o", "--output", help="출력 디렉터리 (기본: <스펙 이름>_sweep)")
+    parser.add_argument("--workers", type=int, default=None, help="프로세스 수 (기본: CPU 수)")
+    parser.add_argument("--shard-cells", type=int, default=DEFAULT_SHARD_CELLS, help="샤드 하나의 격자 칸 수 상한")
+    args = parser.parse_args(argv)
+
+    with open(args.spec, encoding="utf-8") as f:
+        spec = json.load(f)
+    out_dir = args.output or f"{os.path.splitext(args.spec)[0]}_sweep"
+
+    def report(n_done, n_total, elapsed):
+        print(f"\r샤드 {n_done:,}/{n_total:,} ({n_done / n_total:.0%}) · {elapsed:,.1f}초", end="", flush=True)
+
+    summary = run(spec, out_dir, args.workers, shard_cells=args.shard_cells, progress=report)
+    print(f"\n완료: {summary['n_cells']:,} 칸 {summary['shape']} → {out_dir}"
+          f" (재개 시 건너뛴 샤드 {summary['n_skipped']:,})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,397 @@
+"""
+불확실성(민감도) 분석 — 몬테카를로 (Streamlit 비의존)
+
+1일 노임·면세유 가격·기계 가격·각 계획의 작업 능률을 분포에서 뽑아
+onion_engine 비용 모델을 배치 단위 배열 연산으로 평가한다.
+- 분포는 (0, 1) 균등 난수 → 역누적분포(inverse CDF) 변환으로 만든다
+- 균등 난수는 의사난수("random") 또는 스크램블 Halton 준난수("halton") 중 선택
+- 한 배치(batch_size)씩 (배치, 역할, 공정) 배열로 한 번에 계산
+- 결과: 면적별 단위비용 백분위 밴드, 도입안이 더 저렴할 확률
+- simulate: 전체 표본을 보관해 정확한 백분위 계산
+- simulate_stream: 분위수 스케치로 메모리 일정, 배치마다 중간 결과를 내보냄
+
+분포 지정(spec)
+- {"kind": "fixed", "value": v}
+- {"kind": "uniform", "low": a, "high": b}
+- {"kind": "triangular", "low": a, "mode": m, "high": b}
+- {"kind": "normal", "mean": m, "std": s, "low": l}   (l 미만을 잘라낸 절단정규, low 기본 0)
+능률(eff_factor)과 기계 가격(price_factor)은 입력값에 곱하는 배율 분포로 지정한다
+(예: 삼각분포 0.8 / 1.0 / 1.2). 기계 가격 배율은 작업기·트랙터 가격 전체에 공통으로 적용되며
+연간 고정비는 가격에 비례하므로 고정비에 그대로 곱한다. 지정하지 않으면 1 로 고정.
+배율 정규분포는 FACTOR_FLOOR 이상으로 절단한다 — 배율 0 은 능률 0(그 공정 비용 0, 트랙터 몫은
+다른 공정으로)이 되어 하위 밴드와 도입안 유리 확률을 왜곡하므로, 0 에 쌓지 않고 하한 위에서 다시 뽑는 셈.
+1일 노임·면세유 가격 정규분포도 같은 이유로 평균의 FACTOR_FLOOR 배 이상으로 절단한다 (음수 노임·유가 방지).
+"""
+import math
+
+import numpy as np
+
+from onion_engine import plan_coefficients
+
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+DEFAULT_BATCH_SIZE = 20_000
+SAMPLERS = ("random", "halton")
+N_FIXED_DIMS = 3  # 1일 노임, 면세유 가격, 기계 가격 배율
+FACTOR_FLOOR = 0.05  # 배율·금액 정규분포 하한 (입력값의 5%)
+CONVERGENCE_REPS = 16         # 수렴도 비교: 표본 수마다 독립 반복 횟수
+CONVERGENCE_CONFIDENCE = 0.95  # 수렴도 비교: 표준오차 신뢰구간 수준
+
+
+def _norm_cdf(x: float) -> float:
+    return 0.5 * (1.0 + math.erf(x / math.sqrt(2.0)))
+
+
+def _norm_ppf(u):
+    """표준정규 역누적분포 (Acklam 유리함수 근사, 상대오차 ~1e-9)"""
+    a = (-3.969683028665376e+01, 2.209460984245205e+02, -2.759285104469687e+02,
+         1.383577518672690e+02, -3.066479806614716e+01, 2.506628277459239e+00)
+    b = (-5.447609879822406e+01, 1.615858368580409e+02, -1.556989798598866e+02,
+         6.680131188771972e+01, -1.328068155288572e+01)
+    c = (-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e+00,
+         -2.549732539343734e+00, 4.374664141464968e+00, 2.938163982698783e+00)
+    d = (7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e+00,
+         3.754408661907416e+00)
+    u = np.clip(np.asarray(u, dtype=float), 1e-12, 1 - 1e-12)
+    q = np.where(u < 0.5, u, 1.0 - u)  # 꼬리 쪽 확률
+
+    # 꼬리 구간
+    t = np.sqrt(-2.0 * np.log(q))
+    tail = (((((c[0] * t + c[1]) * t + c[2]) * t + c[3]) * t + c[4]) * t + c[5]) / \
+           ((((d[0] * t + d[1]) * t + d[2]) * t + d[3]) * t + 1.0)
+    tail = np.where(u < 0.5, tail, -tail)
+
+    # 중앙 구간
+    r = u - 0.5
+    r2 = r * r
+    central = (((((a[0] * r2 + a[1]) * r2 + a[2]) * r2 + a[3]) * r2 + a[4]) * r2 + a[5]) * r / \
+              (((((b[0] * r2 + b[1]) * r2 + b[2]) * r2 + b[3]) * r2 + b[4]) * r2 + 1.0)
+
+    return np.where(q < 0.02425, tail, central)
+
+
+def _chi2_ppf(p: float, k: int) -> float:
+    """자유도 k 카이제곱 분위수 (Wilson–Hilferty 근사)"""
+    z = float(_norm_ppf(p))
+    return k * (1.0 - 2.0 / (9.0 * k) + z * math.sqrt(2.0 / (9.0 * k))) ** 3
+
+
+def transform(u, spec: dict):
+    """(0, 1) 균등 난수 u → spec 분포 표본"""
+    kind = spec["kind"]
+    if kind == "fixed":
+        return np.full(np.shape(u), float(spec["value"]))
+    if kind == "uniform":
+        return spec["low"] + (spec["high"] - spec["low"]) * u
+    if kind == "triangular":
+        low, mode, high = float(spec["low"]), float(spec["mode"]), float(spec["high"])
+        if high <= low:
+            return np.full(np.shape(u), mode)
+        cut = (mode - low) / (high - low)
+        left = low + np.sqrt(u * (high - low) * (mode - low))
+        right = high - np.sqrt((1.0 - u) * (high - low) * (high - mode))
+        return np.where(u < cut, left, right)
+    if kind == "normal":
+        mean, std, low = float(spec["mean"]), float(spec["std"]), float(spec.get("low", 0.0))
+        if std <= 0:
+            return np.full(np.shape(u), max(mean, low))
+        # [low, ∞) 절단정규: u 를 (Φ(a), 1) 로 옮겨 역누적분포 (a = 표준화한 하한)
+        p_low = _norm_cdf((low - mean) / std)
+        return np.maximum(mean + std * _norm_ppf(p_low + (1.0 - p_low) * np.asarray(u, dtype=float)), low)
+    raise ValueError(f"알 수 없는 분포 종류: {kind}")
+
+
+def _first_primes(k: int) -> list:
+    primes, cand = [], 2
+    while len(primes) < k:
+        if all(cand % p for p in primes if p * p <= cand):
+            primes.append(cand)
+        cand += 1
+    return primes
+
+
+class RandomSampler:
+    """의사난수 (n, dim) 균등 난수"""
+
+    def __init__(self, dim: int, seed: int = 0):
+        self.dim = dim
+        self.rng = np.random.default_rng(seed)
+
+    def __call__(self, n: int):
+        return self.rng.random((n, self.dim))
+
+
+class HaltonSampler:
+    """
+    스크램블 Halton 준난수 (저불일치 수열)
+    - 차원 j 는 j 번째 소수를 밑으로 한 근역(radical inverse)
+    - 자릿수 무작위 치환(0 고정) + 무작위 이동(mod 1) 으로 무작위화 → 시드별 독립 반복 가능
+    호출할 때마다 수열의 다음 n 개 점을 돌려주므로 배치로 나눠 뽑아도 같은 수열이 된다.
+    """
+
+    def __init__(self, dim: int, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        self.dim = dim
+        self.bases = _first_primes(dim)
+        self.perms = [np.concatenate(([0], rng.permutation(np.arange(1, b)))) for b in self.bases]
+        self.shift = rng.random(dim)
+        self.index = 1  # 0 번 점(원점)은 건너뜀
+
+    def __call__(self, n: int):
+        idx0 = np.arange(self.index, self.index + n, dtype=np.int64)
+        self.index += n
+        out = np.empty((n, self.dim))
+        for j, (b, perm) in enumerate(zip(self.bases, self.perms)):
+            idx = idx0.copy()
+            value = np.zeros(n)
+            scale = 1.0 / b
+            while idx.any():
+                value += perm[idx % b] * scale
+                idx //= b
+                scale /= b
+            out[:, j] = value
+        return (out + self.shift) % 1.0
+
+
+def make_sampler(sampler: str, dim: int, seed: int = 0):
+    """sampler: "random" (의사난수) 또는 "halton" (준난수), seed: 정수 또는 np.random.SeedSequence"""
+    if sampler == "random":
+        return RandomSampler(dim, seed)
+    if sampler == "halton":
+        return HaltonSampler(dim, seed)
+    raise ValueError(f"알 수 없는 표본 추출 방식: {sampler}")
+
+
+def factor_spec(spec: dict) -> dict:
+    """배율 분포 spec — 정규분포는 FACTOR_FLOOR 이상으로 절단"""
+    if spec["kind"] == "normal":
+        return dict(spec, low=max(float(spec.get("low", 0.0)), FACTOR_FLOOR))
+    return spec
+
+
+def amount_spec(spec: dict) -> dict:
+    """금액(1일 노임·면세유 가격) 분포 spec — 정규분포는 평균의 FACTOR_FLOOR 배 이상으로 절단"""
+    if spec["kind"] == "normal":
+        return dict(spec, low=max(float(spec.get("low", 0.0)), FACTOR_FLOOR * abs(float(spec["mean"]))))
+    return spec
+
+
+def sample_inputs(u, specs: dict, plan_shape) -> dict:
+    """
+    균등 난수 u (배치, 3 + 역할×공정) → 입력 표본
+    열 순서: [1일 노임, 면세유 가격, 기계 가격 배율, 능률 배율(역할×공정)...]
+    반환: labor_cost_per_day, fuel_price, price_factor (배치, 1, 1), eff_factor (배치, 역할, 공정)
+    """
+    n = u.shape[0]
+    price_spec = factor_spec(specs.get("price_factor", {"kind": "fixed", "value": 1.0}))
+    return {
+        "labor_cost_per_day": transform(u[:, 0], amount_spec(specs["labor_cost_per_day"])).reshape(n, 1, 1),
+        "fuel_price": transform(u[:, 1], amount_spec(specs["fuel_price"])).reshape(n, 1, 1),
+        "price_factor": transform(u[:, 2], price_spec).reshape(n, 1, 1),
+        "eff_factor": transform(u[:, N_FIXED_DIMS:], factor_spec(specs["eff_factor"])).reshape((n,) + tuple(plan_shape)),
+    }
+
+
+def evaluate_draws(plans: dict, draws: dict, area_ha, areas, work_hours_per_day, tractor_annual_fixed) -> dict:
+    """
+    입력 표본 한 배치를 비용 모델로 평가
+    반환
+    - curve: 전 공정 합산 단위비용 (배치, 역할, N)
+    - current: 현재 설정 면적 기준 ha당 비용 합계 (배치, 역할) — 결과 테이블과 같은 기준
+    """
+    sampled = dict(
+        plans,
+        eff_ha=plans["eff_ha"] * draws["eff_factor"],
+        asset_annual_fixed=plans["asset_annual_fixed"] * draws["price_factor"],
+    )
+    coef = plan_coefficients(
+        sampled,
+        area_ha,
+        draws["fuel_price"],
+        draws["labor_cost_per_day"] / work_hours_per_day,
+        tractor_annual_fixed * draws["price_factor"],
+    )
+    fixed = coef["fixed"].sum(axis=-1)       # (배치, 역할)
+    variable = coef["variable"].sum(axis=-1)
+    areas = np.asarray(areas, dtype=float)
+    return {
+        "curve": fixed[..., None] / areas + variable[..., None],
+        "current": fixed + variable,
+    }
+
+
+def iter_batches(plans: dict, specs: dict, area_ha, areas, work_hours_per_day, tractor_annual_fixed,
+                 n_draws: int, batch_size: int = DEFAULT_BATCH_SIZE, seed: int = 0, sampler: str = "random"):
+    """
+    n_draws 개 표본을 batch_size 씩 나눠 평가하는 제너레이터
+    sampler: "random" (의사난수) / "halton" (준난수) — 배치가 나뉘어도 하나의 수열을 이어서 사용
+    """
+    plan_shape = np.shape(plans["eff_ha"])
+    uniforms = make_sampler(sampler, N_FIXED_DIMS + int(np.prod(plan_shape)), seed)
+    done = 0
+    while done < n_draws:
+        n = min(batch_size, n_draws - done)
+        u = uniforms(n)
+        draws = sample_inputs(u, specs, plan_shape)
+        yield evaluate_draws(plans, draws, area_ha, areas, work_hours_per_day, tractor_annual_fixed)
+        done += n
+
+
+def simulate(plans: dict, specs: dict, area_ha, areas, work_hours_per_day, tractor_annual_fixed,
+             n_draws: int, intro: int = 0, base: int = 1, percentiles=DEFAULT_PERCENTILES,
+             batch_size: int = DEFAULT_BATCH_SIZE, seed: int = 0, sampler: str = "random") -> dict:
+    """
+    몬테카를로 실행
+    반환
+    - bands: 면적별 단위비용 백분위 (백분위, 역할, N)
+    - mean: 면적별 평균 단위비용 (역할, N)
+    - prob_intro_cheaper: 면적별 도입안이 더 저렴할 확률 (N,)
+    - prob_intro_cheaper_current: 현재 설정 면적 기준 확률
+    - current_bands: 현재 설정 면적 기준 ha당 비용 백분위 (백분위, 역할)
+    """
+    curves, currents = [], []
+    for out in iter_batches(plans, specs, area_ha, areas, work_hours_per_day, tractor_annual_fixed,
+                            n_draws, batch_size, seed, sampler):
+        curves.append(out["curve"].astype(np.float32))
+        currents.append(out["current"])
+    curve = np.concatenate(curves)
+    current = np.concatenate(currents)
+
+    return {
+        "n_draws": n_draws,
+        "areas": np.asarray(areas, dtype=float),
+        "percentiles": tuple(percentiles),
+        "bands": np.percentile(curve, percentiles, axis=0),
+        "mean": curve.mean(axis=0, dtype=np.float64),
+        "prob_intro_cheaper": (curve[:, intro, :] < curve[:, base, :]).mean(axis=0),
+        "prob_intro_cheaper_current": float((current[:, intro] < current[:, base]).mean()),
+        "current_bands": np.percentile(current, percentiles, axis=0),
+    }
+
+
+class QuantileSketch:
+    """
+    여러 스트림을 동시에 다루는 분위수 스케치 (DDSketch 방식 로그 구간 히스토그램)
+    - shape: 스트림 배열 형태 (예: (역할, 면적))
+    - relative_accuracy: 분위수 상대오차 한계 (0.005 → ±0.5%)
+    - [min_value, max_value] 구간 밖 값은 양 끝 구간에 넣고, min_value 미만은 0 으로 취급
+    메모리는 스트림 수 × 구간 수로 고정이며 표본 수와 무관하다.
+    """
+
+    def __init__(self, shape, relative_accuracy: float = 0.005, min_value: float = 1.0, max_value: float = 1e13):
+        self.shape = tuple(shape)
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self._offset = math.ceil(math.log(min_value) / self._log_gamma)
+        self.n_bins = math.ceil(math.log(max_value) / self._log_gamma) - self._offset + 1
+        self.min_value = min_value
+        self.n_streams = int(np.prod(self.shape, dtype=int))
+        # 0 번 구간 = min_value 미만(0 취급), 1 번부터 로그 구간
+        self.counts = np.zeros((self.n_streams, self.n_bins + 1), dtype=np.int64)
+        self.count = 0
+
+    def update(self, values):
+        """values: (배치, *shape)"""
+        v = np.asarray(values, dtype=float).reshape(-1, self.n_streams)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            keys = np.ceil(np.log(np.maximum(v, self.min_value)) / self._log_gamma) - self._offset + 1
+        keys = np.where(v < self.min_value, 0, np.clip(keys, 1, self.n_bins)).astype(np.int64)
+        flat = keys + (np.arange(self.n_streams) * (self.n_bins + 1))[None, :]
+        self.counts += np.bincount(flat.ravel(), minlength=self.counts.size).reshape(self.counts.shape)
+        self.count += v.shape[0]
+
+    def merge(self, other: "QuantileSketch"):
+        """같은 설정의 스케치 합치기 (병렬 실행 결과 병합용)"""
+        self.counts += other.counts
+        self.count += other.count
+
+    def quantile(self, q):
+        """q: 0~1 (스칼라 또는 목록) → (len(q), *shape)"""
+        q = np.atleast_1d(np.asarray(q, dtype=float))
+        cum = self.counts.cumsum(axis=-1)
+        rank = q[:, None, None] * (self.count - 1)
+        idx = (cum[None, :, :] <= rank).sum(axis=-1)
+        idx = np.minimum(idx, self.n_bins)
+        key = idx - 1 + self._offset
+        value = np.where(idx == 0, 0.0, 2.0 * self.gamma ** key / (self.gamma + 1.0))
+        return value.reshape((len(q),) + self.shape)
+
+
+def simulate_stream(plans: dict, specs: dict, area_ha, areas, work_hours_per_day, tractor_annual_fixed,
+                    n_draws: int, intro: int = 0, base: int = 1, percentiles=DEFAULT_PERCENTILES,
+                    batch_size: int = DEFAULT_BATCH_SIZE, seed: int = 0, sampler: str = "random",
+                    relative_accuracy: float = 0.005):
+    """
+    스트리밍 몬테카를로 — 배치마다 중간 결과를 yield 하는 제너레이터
+    표본은 분위수 스케치와 합계·횟수에만 누적하므로 메모리가 n_draws 와 무관하다.
+    각 yield 의 키는 simulate 반환값과 같다 (n_draws 는 그때까지 처리한 표본 수).
+    """
+    areas = np.asarray(areas, dtype=float)
+    n_roles = np.shape(plans["eff_ha"])[-2]
+    curve_sketch = QuantileSketch((n_roles, len(areas)), relative_accuracy)
+    current_sketch = QuantileSketch((n_roles,), relative_accuracy)
+    curve_sum = np.zeros((n_roles, len(areas)))
+    cheaper = np.zeros(len(areas), dtype=np.int64)
+    cheaper_current = 0
+    q = np.asarray(percentiles, dtype=float) / 100.0
+
+    for out in iter_batches(plans, specs, area_ha, areas, work_hours_per_day, tractor_annual_fixed,
+                            n_draws, batch_size, seed, sampler):
+        curve_sketch.update(out["curve"])
+        current_sketch.update(out["current"])
+        curve_sum += out["curve"].sum(axis=0)
+        cheaper += (out["curve"][:, intro, :] < out["curve"][:, base, :]).sum(axis=0)
+        cheaper_current += int((out["current"][:, intro] < out["current"][:, base]).sum())
+
+        n = curve_sketch.count
+        yield {
+            "n_draws": n,
+            "areas": areas,
+            "percentiles": tuple(percentiles),
+            "bands": curve_sketch.quantile(q),
+            "mean": curve_sum / n,
+            "prob_intro_cheaper": cheaper / n,
+            "prob_intro_cheaper_current": cheaper_current / n,
+            "current_bands": current_sketch.quantile(q),
+        }
+
+
+def convergence_study(plans: dict, specs: dict, area_ha, work_hours_per_day, tractor_annual_fixed,
+                      sample_sizes=(1_024, 4_096, 16_384, 65_536), n_reps: int = CONVERGENCE_REPS,
+                      samplers=SAMPLERS, intro: int = 0, base: int = 1, seed: int = 0, progress=None) -> list:
+    """
+    표본 추출 방식별 수렴도 비교
+    표본 수마다 n_reps 번 독립 반복해, 현재 설정 면적 기준
+    '도입안 − 비교안' 평균 ha당 비용 차이 추정값의 반복 간 표준편차(표준오차)를 구한다.
+    반복의 시드는 (seed, 반복, 표본 수) 에서 파생하므로 표본 수가 달라도 같은 난수를 나눠 쓰지 않는다
+    (나눠 쓰면 표본 수별 오차가 서로 상관된다). 반복 수가 적으면 표준오차 자체도 흔들리므로
+    카이제곱 분포로 구한 CONVERGENCE_CONFIDENCE 신뢰구간(std_error_low ~ std_error_high)을 함께 낸다.
+    progress(완료 칸 수, 전체 칸 수, 방금 끝난 행) 콜백으로 (방식, 표본 수) 칸마다 진행 상황을 받을 수 있다.
+    반환: [{"sampler", "n_draws", "estimate", "std_error", "std_error_low", "std_error_high"}, ...]
+    """
+    n_cells = len(samplers) * len(sample_sizes)
+    alpha = 1.0 - CONVERGENCE_CONFIDENCE
+    dof = n_reps - 1
+    ci_low = math.sqrt(dof / _chi2_ppf(1.0 - alpha / 2.0, dof))
+    ci_high = math.sqrt(dof / _chi2_ppf(alpha / 2.0, dof))
+    rows = []
+    for sampler in samplers:
+        for n in sample_sizes:
+            estimates = []
+            for rep in range(n_reps):
+                diff_sum = 0.0
+                for out in iter_batches(plans, specs, area_ha, [area_ha], work_hours_per_day, tractor_annual_fixed,
+                                        n, seed=np.random.SeedSequence([seed, rep, n]), sampler=sampler):
+                    diff_sum += float((out["current"][:, intro] - out["current"][:, base]).sum())
+                estimates.append(diff_sum / n)
+            std_error = float(np.std(estimates, ddof=1))
+            rows.append({
+                "sampler": sampler,
+                "n_draws": n,
+                "estimate": float(np.mean(estimates)),
+                "std_error": std_error,
+                "std_error_low": std_error * ci_low,
+                "std_error_high": std_error * ci_high,
+            })
+            if progress:
+                progress(len(rows), n_cells, rows[-1])
+    return rows
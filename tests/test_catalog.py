@@ -0,0 +1,20 @@
+import os
+import shutil
+
+from onion_catalog import CATALOG_PATH, catalog_error, get_catalog
+
+
+def test_error_cleared_when_file_returns_unchanged(tmp_path):
+    """잠시 사라졌다가 같은 mtime 으로 돌아온 파일이면 지난 오류를 지운다"""
+    path = str(tmp_path / "catalog.json")
+    shutil.copy2(CATALOG_PATH, path)
+    catalog = get_catalog(path)
+
+    hidden = path + ".bak"
+    os.rename(path, hidden)
+    assert get_catalog(path) is catalog
+    assert catalog_error(path) is not None
+
+    os.rename(hidden, path)  # rename 은 mtime 을 바꾸지 않는다
+    assert get_catalog(path) is catalog
+    assert catalog_error(path) is None
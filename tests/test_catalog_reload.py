@@ -0,0 +1,84 @@
+import json
+import os
+import shutil
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+import onion_catalog
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Onion_4.py")
+PROC = "정식"
+
+
+@pytest.fixture
+def catalog_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "catalog.json")
+    shutil.copy2(onion_catalog.CATALOG_PATH, path)
+    monkeypatch.setattr(onion_catalog, "CATALOG_PATH", path)
+    return path
+
+
+def edit_catalog(path: str, edit):
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    edit(data["mech_levels"][PROC])
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))  # 같은 초 안의 수정도 다시 읽도록
+
+
+def start_app() -> AppTest:
+    at = AppTest.from_file(APP, default_timeout=120)
+    at.run()
+    assert not at.exception
+    return at
+
+
+def test_hidden_tab_level_beyond_shortened_list(catalog_path):
+    """숨긴 탭에 보관한 수준 인덱스가 줄어든 수준 목록 밖이면 기본 수준으로"""
+    at = start_app()
+    at.selectbox(key=f"lvl_도입안_{PROC}").set_value(3).run()
+    at.run()  # 콜백의 fragment 리런 뒤 전체 화면
+    at.checkbox(key="lazy_tabs").check().run()
+    assert not at.exception
+
+    edit_catalog(catalog_path, lambda levels: levels.__delitem__(slice(2, None)))
+    at.run()
+    assert not at.exception
+    assert at.session_state["_parked_levels"].get(f"도입안|{PROC}", 0) == 0
+
+    at.checkbox(key="lazy_tabs").uncheck().run()  # 탭 전환 콜백(보관) 경로
+    assert not at.exception
+    assert at.selectbox(key=f"lvl_도입안_{PROC}").value == 0
+
+
+def test_table_row_with_renamed_level(catalog_path):
+    """표에 저장된 행의 수준 라벨이 카탈로그에서 바뀌면 그 행은 기본값으로 되돌리고 알린다"""
+    at = start_app()
+    at.radio(key="input_mode").set_value("표로 한 번에 입력").run()
+    rows = at.session_state["plan_table"]
+    pos = next(i for i, r in enumerate(rows) if r["공정"] == PROC and r["구분"] == "도입안")
+    level = onion_catalog.get_catalog(catalog_path).mech_levels[PROC][3]
+    prices = {f"작업기{i + 1} 가격 (원)": int(a["price"]) for i, a in enumerate(level["assets"])}
+    at.session_state["plan_table"] = [
+        dict(r, **{"기계화 수준": level["label"]}, **prices) if i == pos else r for i, r in enumerate(rows)
+    ]
+    at.run()
+    assert not at.exception
+
+    def rename(levels):
+        levels[3]["label"] += " (개정)"
+    edit_catalog(catalog_path, rename)
+    at.run()
+    assert not at.exception
+    assert at.session_state["plan_table"][pos]["기계화 수준"] == levels_label(catalog_path, 0)
+    assert any("카탈로그" in w.value for w in at.warning)
+
+    at.radio(key="input_mode").set_value("공정별 입력").run()  # 표 → 위젯 전환 콜백
+    assert not at.exception
+
+
+def levels_label(path: str, idx: int) -> str:
+    return onion_catalog.get_catalog(path).mech_levels[PROC][idx]["label"]
@@ -0,0 +1,130 @@
+"""onion_engine 이 원래 Onion_4.py 화면 계산식(결과 표·면적별 단위비용)과 같은 값을 내는지"""
+import numpy as np
+import pytest
+
+from onion_catalog import get_catalog
+from onion_engine import ROLES, default_plan, evaluate, plan_coefficients, stack_plans, tractor_allocation
+
+FUEL_PRICE = 1_158.0
+UNIT_HOURLY_WAGE = 153_294.0 / 8.0
+TRACTOR_PRICE = 50_000_000.0
+TRACTOR_LIFE_YEARS = 8
+AREAS = (0.5, 3.0, 20.0)
+
+
+# --- [기준 계산식 (원래 Onion_4.py 본문 그대로, 스칼라)] ---
+def calculate_hourly_fixed_cost(price, annual_hours, useful_life):
+    if price <= 0 or annual_hours <= 0 or useful_life <= 0:
+        return 0.0
+    salvage_value = price * 0.05
+    return (price * 0.06 + price * 0.025 + (price - salvage_value) / useful_life) / annual_hours
+
+
+def calc_annual_fixed(price, life_years):
+    return price * 0.06 + price * 0.025 + (price - price * 0.05) / life_years
+
+
+def baseline_results(process_data, area_ha):
+    """결과 표: (공정, 역할) → (시간당 유동비, 시간당 고정비, ha당 비용, ha당 시간)"""
+    tractor_annual_fixed = calc_annual_fixed(TRACTOR_PRICE, TRACTOR_LIFE_YEARS)
+    tractor_total_hours = {}
+    for role in ROLES:
+        total_h = 0.0
+        for pdata in process_data.values():
+            s = pdata[role]
+            if s["level"].get("tractor_type") == "트랙터":
+                eff = float(s["eff_ha"])
+                total_h += (area_ha / eff) if eff > 0 else 0.0
+        tractor_total_hours[role] = total_h
+
+    out = {}
+    for proc, pdata in process_data.items():
+        for role in ROLES:
+            s = pdata[role]
+            level = s["level"]
+            eff = float(s["eff_ha"])
+            hourly_variable = float(level.get("tractor_fuel_lph", 0.0)) * FUEL_PRICE + float(s["workers"]) * UNIT_HOURLY_WAGE
+            hourly_fixed = 0.0
+            for asset in s.get("custom_assets") or level.get("assets", []):
+                hourly_fixed += calculate_hourly_fixed_cost(float(asset["price"]), float(s["annual_hours"]),
+                                                            float(asset["life_years"]))
+            if level.get("tractor_type") and eff > 0:
+                this_proc_hours = area_ha / eff
+                total_t_hours = tractor_total_hours[role]
+                if total_t_hours > 0:
+                    hourly_fixed += tractor_annual_fixed * (this_proc_hours / total_t_hours) / this_proc_hours
+            hourly_total = hourly_variable + hourly_fixed
+            cost = hourly_total / eff if eff > 0 else 0.0
+            out[proc, role] = (hourly_variable, hourly_fixed, cost, 1.0 / eff if eff > 0 else 0.0)
+    return out
+
+
+def baseline_unit_cost(process_data, area_ha, proc, role, target_area_ha):
+    """면적별 단위비용 (원래 cost_per_ha_for_area)"""
+    s = process_data[proc][role]
+    eff = float(s["eff_ha"])
+    if eff <= 0:
+        return 0.0
+    fixed_per_ha = 0.0
+    for asset in s.get("custom_assets") or s["level"].get("assets", []):
+        annual_fixed = calc_annual_fixed(float(asset["price"]), float(asset["life_years"]))
+        annual_hours = float(s["annual_hours"])
+        fixed_per_ha += (annual_fixed / annual_hours if annual_hours > 0 else 0) / eff
+    if s["level"].get("tractor_type"):
+        total_t_hours = sum(
+            area_ha / float(d[role]["eff_ha"]) for d in process_data.values()
+            if d[role]["level"].get("tractor_type") == s["level"]["tractor_type"] and float(d[role]["eff_ha"]) > 0
+        )
+        if total_t_hours > 0:
+            this_proc_hours = area_ha / eff
+            fixed_per_ha += calc_annual_fixed(TRACTOR_PRICE, TRACTOR_LIFE_YEARS) * (this_proc_hours / total_t_hours) / this_proc_hours / eff
+    variable_per_ha = (float(s["level"].get("tractor_fuel_lph", 0.0)) * FUEL_PRICE + float(s["workers"]) * UNIT_HOURLY_WAGE) / eff
+    return (fixed_per_ha + variable_per_ha * target_area_ha) / target_area_ha
+
+
+# --- [비교] ---
+def default_process_data(area_ha):
+    """도입안 = 가장 기계화된 수준, 비교안 = 첫 수준 (DB 기본값)"""
+    catalog = get_catalog()
+    return {
+        p: {"도입안": default_plan(levels[-1], area_ha), "비교안": default_plan(levels[0], area_ha)}
+        for p, levels in catalog.mech_levels.items()
+    }
+
+
+@pytest.mark.parametrize("area_ha", AREAS)
+def test_coefficients_match_baseline_results_table(area_ha):
+    process_data = default_process_data(area_ha)
+    processes = list(process_data)
+    plans = stack_plans(process_data, processes)
+    coef = plan_coefficients(plans, area_ha, FUEL_PRICE, UNIT_HOURLY_WAGE,
+                             calc_annual_fixed(TRACTOR_PRICE, TRACTOR_LIFE_YEARS))
+    expected = baseline_results(process_data, area_ha)
+    for (proc, role), (hourly_variable, hourly_fixed, cost, time) in expected.items():
+        idx = ROLES.index(role), processes.index(proc)
+        assert coef["hourly_variable"][idx] == pytest.approx(hourly_variable, rel=1e-12)
+        assert coef["hourly_fixed"][idx] == pytest.approx(hourly_fixed, rel=1e-12)
+        assert coef["fixed"][idx] + coef["variable"][idx] == pytest.approx(cost, rel=1e-12)
+        assert coef["time"][idx] == pytest.approx(time, rel=1e-12)
+
+
+@pytest.mark.parametrize("area_ha", AREAS)
+def test_unit_cost_curve_matches_baseline(area_ha):
+    process_data = default_process_data(area_ha)
+    processes = list(process_data)
+    targets = np.array([0.3, area_ha, 7.5, 50.0])
+    result = evaluate(process_data, processes, area_ha, targets, FUEL_PRICE, UNIT_HOURLY_WAGE,
+                      TRACTOR_PRICE, TRACTOR_LIFE_YEARS)
+    for p_idx, proc in enumerate(processes):
+        for r_idx, role in enumerate(ROLES):
+            expected = [baseline_unit_cost(process_data, area_ha, proc, role, a) for a in targets]
+            np.testing.assert_allclose(result["curve"]["total"][r_idx, p_idx], expected, rtol=1e-12)
+
+
+def test_tractor_allocation_shares_sum_to_one():
+    process_data = default_process_data(3.0)
+    plans = stack_plans(process_data, list(process_data))
+    allocation = tractor_allocation(plans, 3.0)
+    uses = plans["uses_tractor"] & (plans["eff_ha"] > 0)
+    np.testing.assert_allclose(allocation["share"].sum(axis=-1), np.where(uses.any(axis=-1), 1.0, 0.0))
+    np.testing.assert_allclose(allocation["total_hours"][..., 0], allocation["hours"].sum(axis=-1))
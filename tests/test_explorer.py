@@ -0,0 +1,24 @@
+import numpy as np
+
+from onion_explorer import PLOTLYJS_CDN, explorer_html, explorer_payload
+
+
+def payload():
+    coef = {"fixed": np.array([[3.0e6, 1.0e6]]), "variable": np.array([[2.0e5, 4.0e5]])}
+    break_even = {"total": {"area": np.float64(10.0)}, "per_process": {"area": np.array([10.0])}}
+    return explorer_payload(coef, break_even, ["정식"], ["도입안", "비교안"], 3.0, 1.0, 20.0, 50)
+
+
+def test_cdn_script_by_default():
+    html = explorer_html(payload())
+    assert f'<script src="{PLOTLYJS_CDN}"></script>' in html
+    assert "__PLOTLYJS__" not in html
+
+
+def test_inline_bundle_works_without_cdn():
+    """오프라인 배포용 — CDN 주소 없이 설치된 plotly.js 번들과 값이 HTML 안에"""
+    html = explorer_html(payload(), inline_plotlyjs=True)
+    assert PLOTLYJS_CDN not in html
+    assert len(html) > 1_000_000 and "Plotly" in html
+    assert '"processes": ["정식"]' in html
+    assert html.count("</script>") == 2  # 번들 하나 + 탐색 스크립트 하나 (번들이 script 를 일찍 닫지 않음)
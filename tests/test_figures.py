@@ -0,0 +1,61 @@
+import pickle
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from onion_figures import FigureCache, FrozenFigure, freeze_figure
+
+
+def build_line(df: pd.DataFrame, title: str = ""):
+    return px.line(df, x="면적", y="비용", title=title)
+
+
+def frame():
+    return pd.DataFrame({"면적": [1.0, 2.0, 3.0], "비용": [3.0, 2.0, 1.0]})
+
+
+def test_freeze_keeps_builder_figure_untouched():
+    fig = build_line(frame())
+    frozen = freeze_figure(fig)
+    assert type(fig) is go.Figure and isinstance(frozen, FrozenFigure)
+    assert frozen is not fig and frozen.to_dict() == fig.to_dict()
+    assert frozen.to_dict() is frozen.to_dict()
+    assert freeze_figure(frozen) is frozen
+
+
+def test_mutation_drops_memo():
+    """어떤 경로로 고쳐도 다음 to_dict() 는 바뀐 내용"""
+    frozen = freeze_figure(build_line(frame()))
+    edits = [
+        lambda f: f.update_layout(title="갱신"),
+        lambda f: f.update_traces(mode="lines+markers"),
+        lambda f: setattr(f.layout.title, "text", "속성"),
+        lambda f: setattr(f.data[0], "name", "트레이스"),
+        lambda f: setattr(f.data[0].marker, "color", "red"),
+        lambda f: f.add_hline(y=2.0),
+        lambda f: f.add_trace(go.Scatter(x=[1], y=[1])),
+        lambda f: f.plotly_restyle({"opacity": 0.5}),
+        lambda f: setattr(f, "layout", {"title": {"text": "교체"}}),
+    ]
+    for edit in edits:
+        before = frozen.to_dict()
+        edit(frozen)
+        assert frozen.to_dict() is not before
+        assert frozen.to_dict() == go.Figure(frozen).to_dict()
+
+
+def test_pickle_does_not_touch_shared_memo():
+    frozen = freeze_figure(build_line(frame()))
+    memo = frozen.to_dict()
+    restored = pickle.loads(pickle.dumps(frozen))
+    assert isinstance(restored, FrozenFigure)
+    assert set(memo) == {"data", "layout"} and restored.to_dict() == memo
+
+
+def test_cache_returns_same_frozen_figure():
+    cache = FigureCache()
+    first = cache.get(build_line, frame(), title="a")
+    assert cache.get(build_line, frame(), title="a") is first
+    assert cache.get(build_line, frame(), title="b") is not first
+    assert [(s["그래프"], s["적중"], s["미적중"]) for s in cache.stats()] == [("build_line", 1, 2)]
@@ -0,0 +1,34 @@
+import json
+import threading
+
+from onion_profile import RUN_PREFIX, ProfileRegistry
+
+
+def test_log_written_by_background_writer(tmp_path):
+    """여러 세션 스레드의 리런 기록이 빠짐없이 한 줄씩 쓰인다"""
+    path = tmp_path / "profile.jsonl"
+    registry = ProfileRegistry(log_path=str(path))
+
+    def session(i):
+        for _ in range(50):
+            registry.observe_run(f"s{i}", "전체", 12.5, {"계산": 10.0})
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    registry.flush_log()
+
+    records = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert len(records) == 400
+    assert {r["session"] for r in records} == {f"s{i}" for i in range(8)}
+    assert records[0]["sections"] == {"계산": 10.0}
+    assert registry.histograms[RUN_PREFIX + "전체"].count == 400
+
+
+def test_unwritable_log_does_not_block(tmp_path):
+    registry = ProfileRegistry(log_path=str(tmp_path / "missing" / "profile.jsonl"))
+    registry.observe_run("s", "전체", 1.0, {})
+    registry.flush_log()
+    assert registry.histograms[RUN_PREFIX + "전체"].count == 1
@@ -0,0 +1,28 @@
+import numpy as np
+
+from onion_session import SessionRegistry
+
+
+def test_sample_reuses_measurement_within_interval(monkeypatch):
+    """간격 안의 리런은 세션 상태를 다시 돌지 않고 마지막 측정을 돌려준다"""
+    import onion_session
+
+    calls = []
+    real = onion_session.session_memory
+    monkeypatch.setattr(onion_session, "session_memory", lambda state: calls.append(1) or real(state))
+    clock = [1000.0]
+    monkeypatch.setattr(onion_session.time, "time", lambda: clock[0])
+
+    registry = SessionRegistry()
+    state = {"a": np.zeros(1024)}
+    first = registry.sample("s", state, interval_sec=30)
+    state["b"] = np.zeros(4096)
+    clock[0] += 10
+    assert registry.sample("s", state, interval_sec=30) is first
+    assert len(calls) == 1
+
+    clock[0] += 25
+    second = registry.sample("s", state, interval_sec=30)
+    assert len(calls) == 2
+    assert len(second) == 2
+    assert registry.table()["키 수"].tolist() == [2]
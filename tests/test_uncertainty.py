@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from onion_catalog import get_catalog
+from onion_engine import ROLES, default_plan, plan_coefficients, stack_plans
+from onion_uncertainty import FACTOR_FLOOR, N_FIXED_DIMS, convergence_study, make_sampler, sample_inputs, transform
+
+AREA_HA = 3.0
+
+
+def catalog_plans(level_idx: int = -1):
+    """각 공정의 수준 하나(기본: 가장 기계화된 수준)를 도입안·비교안 모두에 쓴 계획"""
+    catalog = get_catalog()
+    process_data = {
+        p: {r: default_plan(catalog.mech_levels[p][level_idx], AREA_HA) for r in ROLES}
+        for p in catalog.processes
+    }
+    return stack_plans(process_data, catalog.processes)
+
+
+def test_normal_is_truncated_not_clamped():
+    u = np.random.default_rng(0).random(200_000)
+    x = transform(u, {"kind": "normal", "mean": 1.0, "std": 0.45, "low": FACTOR_FLOOR})
+    assert x.min() >= FACTOR_FLOOR
+    assert (x == FACTOR_FLOOR).mean() < 1e-4  # 하한에 확률질량이 쌓이지 않음
+    # 절단정규 평균 = μ + σ φ(α) / (1 − Φ(α))
+    assert x.mean() == pytest.approx(1.0197, abs=2e-3)
+
+
+@pytest.mark.parametrize("sampler", ["random", "halton"])
+def test_no_draw_makes_a_process_free(sampler):
+    """UI 최대 변동폭(±90% = ±2σ) 정규분포에서도 능률 배율이 0 이 되어 공정 비용이 0 이 되는 표본이 없다"""
+    plans = catalog_plans()
+    specs = {
+        "labor_cost_per_day": {"kind": "normal", "mean": 153_294.0, "std": 0.45 * 153_294.0},
+        "fuel_price": {"kind": "normal", "mean": 1_158.0, "std": 0.45 * 1_158.0},
+        "price_factor": {"kind": "normal", "mean": 1.0, "std": 0.45},
+        "eff_factor": {"kind": "normal", "mean": 1.0, "std": 0.45},
+    }
+    shape = np.shape(plans["eff_ha"])
+    u = make_sampler(sampler, N_FIXED_DIMS + int(np.prod(shape)), seed=1)(50_000)
+    draws = sample_inputs(u, specs, shape)
+    assert draws["eff_factor"].min() >= FACTOR_FLOOR
+    assert draws["price_factor"].min() >= FACTOR_FLOOR
+
+    sampled = dict(plans, eff_ha=plans["eff_ha"] * draws["eff_factor"],
+                   asset_annual_fixed=plans["asset_annual_fixed"] * draws["price_factor"])
+    coef = plan_coefficients(sampled, AREA_HA, draws["fuel_price"], draws["labor_cost_per_day"] / 8.0,
+                             5_000_000.0 * draws["price_factor"])
+    working = plans["eff_ha"] > 0
+    assert working.any()
+    cost = (coef["fixed"] + coef["variable"])[:, working]
+    assert (cost > 0).all()
+    assert (coef["time"][:, working] > 0).all()
+
+
+def test_wage_and_fuel_stay_positive_at_wide_spread():
+    """노임·유가 정규분포는 변동폭이 커도 평균의 FACTOR_FLOOR 배 이상"""
+    specs = {
+        "labor_cost_per_day": {"kind": "normal", "mean": 153_294.0, "std": 153_294.0},
+        "fuel_price": {"kind": "normal", "mean": 1_158.0, "std": 1_158.0},
+        "eff_factor": {"kind": "fixed", "value": 1.0},
+    }
+    u = make_sampler("random", N_FIXED_DIMS + 1, seed=2)(100_000)
+    draws = sample_inputs(u, specs, (1, 1))
+    assert draws["labor_cost_per_day"].min() >= FACTOR_FLOOR * 153_294.0
+    assert draws["fuel_price"].min() >= FACTOR_FLOOR * 1_158.0
+
+
+def test_convergence_study_reports_std_error_band():
+    """수렴도 행마다 표준오차와 그 신뢰구간이 나오고, 하한 < 표준오차 < 상한"""
+    specs = {
+        "labor_cost_per_day": {"kind": "normal", "mean": 153_294.0, "std": 15_000.0},
+        "fuel_price": {"kind": "normal", "mean": 1_158.0, "std": 100.0},
+        "eff_factor": {"kind": "normal", "mean": 1.0, "std": 0.1},
+    }
+    rows = convergence_study(catalog_plans(), specs, AREA_HA, 8.0, 5_000_000.0,
+                             sample_sizes=(64, 256), n_reps=4, samplers=("random",), seed=3)
+    assert [r["n_draws"] for r in rows] == [64, 256]
+    for r in rows:
+        assert 0 < r["std_error_low"] < r["std_error"] < r["std_error_high"]